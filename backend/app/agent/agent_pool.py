@@ -0,0 +1,108 @@
+"""Agent Pool - Process-wide LLM clients and compiled agent graph"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from langchain.agents import create_agent
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from langchain_openai import ChatOpenAI
+
+from app.agent.tools import get_financial_tools
+from app.services.metrics import metrics
+
+DEFAULT_MODEL = "gpt-4o"
+
+
+class AgentPool:
+    """
+    Builds chat model clients and the tool-calling agent graph once per
+    process instead of once per request.
+
+    The shared graph has no system prompt and no user baked in: callers pass
+    the system prompt as the first message and the user through
+    invocation_config(), which the tools read at call time. Reusing one
+    ChatOpenAI per configuration also keeps its HTTP connection pool warm,
+    so concurrent requests don't each pay for a new TLS handshake.
+    """
+
+    def __init__(self, model: str = DEFAULT_MODEL, temperature: float = 0.1):
+        self.model = model
+        self.temperature = temperature
+        self._lock = threading.Lock()
+        self._llms: Dict[Tuple[str, float, bool], ChatOpenAI] = {}
+        self._tools = None
+        self._tool_schema_digest = None
+        self._graph = None
+
+    def get_llm(self, temperature: Optional[float] = None, streaming: bool = True) -> ChatOpenAI:
+        """Shared chat model client for a (model, temperature, streaming) combination."""
+        key = (self.model, self.temperature if temperature is None else temperature, streaming)
+        llm = self._llms.get(key)
+        if llm is None:
+            with self._lock:
+                llm = self._llms.get(key)
+                if llm is None:
+                    llm = ChatOpenAI(
+                        model=key[0],
+                        temperature=key[1],
+                        streaming=streaming,
+                        api_key=os.getenv("OPENAI_API_KEY")
+                    )
+                    self._llms[key] = llm
+                    metrics.increment("agent_pool.llm_clients_created")
+        return llm
+
+    @property
+    def tools(self):
+        """Financial tools that resolve the user from the invocation config."""
+        if self._tools is None:
+            with self._lock:
+                if self._tools is None:
+                    self._tools = get_financial_tools()
+        return self._tools
+
+    @property
+    def tool_schema_digest(self) -> str:
+        """Hash of the tool schemas sent with every model call."""
+        if self._tool_schema_digest is None:
+            schemas = [convert_to_openai_tool(tool) for tool in self.tools]
+            encoded = json.dumps(schemas, sort_keys=True).encode()
+            self._tool_schema_digest = hashlib.sha256(encoded).hexdigest()[:12]
+        return self._tool_schema_digest
+
+    def get_graph(self):
+        """The compiled agent graph (built on first use)."""
+        if self._graph is not None:
+            metrics.increment("agent_pool.graph_reuses")
+            return self._graph
+
+        llm = self.get_llm()
+        tools = self.tools
+        with self._lock:
+            if self._graph is None:
+                start = time.perf_counter()
+                self._graph = create_agent(model=llm, tools=tools)
+                metrics.observe("agent_pool.graph_build_seconds", time.perf_counter() - start)
+                metrics.increment("agent_pool.graph_builds")
+        return self._graph
+
+    @staticmethod
+    def invocation_config(user_id: str) -> Dict[str, Any]:
+        """Per-request config carrying the user the tools should act for."""
+        return {"configurable": {"user_id": user_id}}
+
+    def reset(self):
+        """Drop every cached client and graph (e.g. after the API key changes)."""
+        with self._lock:
+            self._llms.clear()
+            self._tools = None
+            self._tool_schema_digest = None
+            self._graph = None
+
+
+# Global agent pool instance
+agent_pool = AgentPool()
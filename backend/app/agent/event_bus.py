@@ -0,0 +1,75 @@
+"""Agent Event Bus - Streams agent events to the SSE layer as they happen"""
+
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import ToolMessage
+
+from app.agent.tools import ToolResult
+
+_CLOSED = object()
+
+
+class AgentEventBus:
+    """
+    Queue of events for one agent run.
+
+    Producers (the graph stream and tool callbacks) publish from any thread;
+    the SSE generator consumes in order. Calculation events are published
+    at most once per tool call id, whichever producer sees the result first.
+    """
+
+    def __init__(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue: "asyncio.Queue[Any]" = asyncio.Queue()
+        self._lock = threading.Lock()
+        self._published_calls: Set[str] = set()
+
+    def publish(self, event: Dict[str, Any]):
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+
+    def publish_tool_result(self, message: ToolMessage) -> bool:
+        """Publish tool_end (and a calculation for typed results) once per tool call."""
+        with self._lock:
+            if message.tool_call_id in self._published_calls:
+                return False
+            self._published_calls.add(message.tool_call_id)
+
+        artifact = message.artifact if isinstance(message.artifact, ToolResult) else None
+        self.publish({
+            "type": "tool_end",
+            "tool": message.name,
+            "tool_call_id": message.tool_call_id,
+            "kind": artifact.kind if artifact else None
+        })
+        if artifact is not None:
+            self.publish({
+                "type": "calculation",
+                "tool_call_id": message.tool_call_id,
+                "kind": artifact.kind,
+                "result": artifact.data
+            })
+        return True
+
+    def close(self):
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, _CLOSED)
+
+    async def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        while True:
+            event = await self._queue.get()
+            if event is _CLOSED:
+                return
+            yield event
+
+
+class ToolResultPublisher(AsyncCallbackHandler):
+    """Callback that publishes each tool's result the moment the tool returns."""
+
+    def __init__(self, bus: AgentEventBus):
+        self.bus = bus
+
+    async def on_tool_end(self, output: Any, *, run_id, parent_run_id: Optional[Any] = None, **kwargs):
+        if isinstance(output, ToolMessage) and output.tool_call_id:
+            self.bus.publish_tool_result(output)
@@ -1,62 +1,30 @@
 """LangChain-based Financial Agent"""
 
+import asyncio
+import hashlib
 import os
-import json
+import threading
+import time
+from collections import OrderedDict
 from typing import AsyncGenerator, List, Dict, Any
 
 # Disable LangSmith tracing (prevents 404 errors)
 os.environ["LANGCHAIN_TRACING_V2"] = "false"
 os.environ["LANGCHAIN_API_KEY"] = ""
 
-from langchain.agents import create_agent
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, ToolMessage
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage, ToolMessage
 
-from app.agent.tools import get_financial_tools
+from app.agent.agent_pool import AgentPool, agent_pool
+from app.agent.event_bus import AgentEventBus, ToolResultPublisher
+from app.agent.history_assembler import history_assembler
 from app.agent.memory_manager import FinancialMemoryManager
+from app.services.metrics import metrics
 
 
-class FinancialAgent:
-    """
-    LangChain-based agent that orchestrates the Neuro-Symbolic flow.
-    Handles intent detection, tool calling, and contextual conversation.
-    """
-    
-    def __init__(self, user_id: str = "user_001"):
-        self.user_id = user_id
-        self.llm = ChatOpenAI(
-            model="gpt-4o",
-            temperature=0.1,  # Low for financial accuracy
-            streaming=True,
-            api_key=os.getenv("OPENAI_API_KEY")
-        )
-        
-        # Get financial calculation tools
-        self.tools = get_financial_tools(user_id)
-        
-        # Setup memory for contextual conversations
-        self.memory_manager = FinancialMemoryManager(user_id)
-        self._last_tool_results = []  # Store tool results from last message
-        
-        # Create agent using LangChain 1.0+ API
-        # Use create_agent which is the new way to create agents
-        self.agent_runnable = create_agent(
-            model=self.llm,
-            tools=self.tools,
-            system_prompt=self._get_system_prompt()
-        )
-    
-    def _get_system_prompt(self) -> str:
-        """System prompt with user context injected."""
-        user_context = self.memory_manager.get_user_context()
-        monthly_income = user_context.get("income", {}).get("monthly_gross", 0)
-        total_savings = user_context.get("savings", {}).get("total", 0)
-        last_dti = self.memory_manager.get_last_dti()
-        
-        dti_text = f"{last_dti:.1f}%" if last_dti > 0 else "Not calculated yet"
-        
-        return f"""You are a Financial Coach helping users prepare for homeownership.
+# Static instructions and tool list. Nothing per-user or per-turn may go in
+# here: it must stay byte-identical across requests so the provider can reuse
+# its cached prompt prefix. The user's numbers go in a later message.
+SYSTEM_PROMPT = """You are a Financial Coach helping users prepare for homeownership.
 
 CRITICAL RULES:
 1. You CANNOT perform financial calculations yourself.
@@ -67,15 +35,11 @@ CRITICAL RULES:
 6. Suggest actionable next steps based on calculations.
 7. When you call create_action_plan tool, DO NOT repeat the entire plan in your response. Just acknowledge that you've created a plan and highlight 1-2 key priorities. The structured plan will be displayed automatically.
 
-User's Current Financial Snapshot:
-- Monthly Income: ${monthly_income:,.0f}
-- Total Savings: ${total_savings:,.0f}
-- Last Calculated DTI: {dti_text}
-
 Available Tools:
 - calculate_dti: Calculate Debt-to-Income ratio
 - calculate_affordability: Determine if a home price is affordable (requires home_price parameter)
 - get_readiness_score: Get overall readiness score (0-100)
+- explore_readiness: Show the smallest debt paydown, savings or credit change that reaches each readiness level
 - create_action_plan: Create a personalized action plan with steps, timeline, and milestones
 - analyze_spending: Analyze spending patterns, detect overspending, and compare to peer benchmarks
 - plan_scenarios: Generate "what-if" scenarios to compare different financial strategies
@@ -100,6 +64,91 @@ Conversation Style:
 - Create personalized plans that address the user's specific gaps
 - When transaction analysis shows overspending, be empathetic but direct about opportunities to save
 - Ask clarifying questions when needed, but also take initiative
+"""
+
+# Identifies the static prompt revision
+PROMPT_VERSION = hashlib.sha256(SYSTEM_PROMPT.encode()).hexdigest()[:12]
+
+MAX_TRACKED_PREFIXES = 10000
+
+_prefix_lock = threading.Lock()
+# user_id -> message hashes of that user's previous cacheable prefix
+_last_prefixes: "OrderedDict[str, List[str]]" = OrderedDict()
+
+
+def _record_prompt_prefix(user_id: str, tool_schema_digest: str, prefix: List[BaseMessage]):
+    """
+    Count whether this turn's cacheable prefix extends the user's previous one.
+    
+    The prefix is the tool schemas plus every message before the per-turn
+    snapshot (system prompt, summary, history). The provider can only reuse
+    its cached prefix when the previous turn's prefix is carried over
+    unchanged, e.g. not when the summary is rewritten or old turns are
+    trimmed from the front of the window.
+    """
+    hashes = [tool_schema_digest] + [
+        hashlib.sha256(f"{message.type}\0{message.content}".encode()).hexdigest()[:12]
+        for message in prefix
+    ]
+    with _prefix_lock:
+        previous = _last_prefixes.get(user_id)
+        _last_prefixes[user_id] = hashes
+        _last_prefixes.move_to_end(user_id)
+        while len(_last_prefixes) > MAX_TRACKED_PREFIXES:
+            _last_prefixes.popitem(last=False)
+    
+    if previous is None:
+        metrics.increment("prompt.prefix_new")
+    elif hashes[:len(previous)] == previous:
+        metrics.increment("prompt.prefix_stable")
+    else:
+        metrics.increment("prompt.prefix_changed")
+
+
+class FinancialAgent:
+    """
+    LangChain-based agent that orchestrates the Neuro-Symbolic flow.
+    Handles intent detection, tool calling, and contextual conversation.
+    """
+    
+    def __init__(self, user_id: str = "user_001", pool: AgentPool = None):
+        self.user_id = user_id
+        pool = pool or agent_pool
+        
+        with metrics.timer("agent.setup_seconds"):
+            # LLM client, tools and compiled graph are shared across requests
+            self.llm = pool.get_llm()
+            self.tools = pool.tools
+            self.agent_runnable = pool.get_graph()
+            self._tool_schema_digest = pool.tool_schema_digest
+            self._config = pool.invocation_config(user_id)
+            
+            # Setup memory for contextual conversations
+            self.memory_manager = FinancialMemoryManager(user_id)
+            self._last_tool_results = []  # Store tool results from last message
+            self._last_error = None
+            self._run_task = None
+            self._cancelled = False
+    
+    def cancel(self):
+        """Stop the in-flight run, including its model call and tool jobs (e.g. the client left)."""
+        self._cancelled = True
+        if self._run_task is not None and not self._run_task.done():
+            self._run_task.cancel()
+    
+    def _get_context_message(self) -> str:
+        """Per-user snapshot, sent after the static prompt so the prefix stays cacheable."""
+        user_context = self.memory_manager.get_user_context()
+        monthly_income = user_context.get("income", {}).get("monthly_gross", 0)
+        total_savings = user_context.get("savings", {}).get("total", 0)
+        last_dti = self.memory_manager.get_last_dti()
+        
+        dti_text = f"{last_dti:.1f}%" if last_dti > 0 else "Not calculated yet"
+        
+        return f"""User's Current Financial Snapshot:
+- Monthly Income: ${monthly_income:,.0f}
+- Total Savings: ${total_savings:,.0f}
+- Last Calculated DTI: {dti_text}
 """
     
     async def process_message(
@@ -109,137 +158,124 @@ Conversation Style:
     ) -> AsyncGenerator[str, None]:
         """
         Process user message with full conversation context.
-        Streams response chunks for real-time UX.
+        Streams response text chunks for real-time UX.
         """
-        # Load conversation history from memory
-        chat_history = []
-        for msg in self.memory_manager.get_chat_history():
-            if msg["role"] == "user":
-                chat_history.append(HumanMessage(content=msg["content"]))
-            elif msg["role"] == "assistant":
-                chat_history.append(AIMessage(content=msg["content"]))
+        async for event in self.stream_events(user_message, conversation_history):
+            if event["type"] == "text":
+                yield event["content"]
+    
+    async def stream_events(
+        self,
+        user_message: str,
+        conversation_history: List[Dict[str, str]] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Process user message and stream typed events as the agent runs.
         
-        # Add any provided history (from frontend)
-        if conversation_history:
-            for msg in conversation_history:
-                if msg["role"] == "user":
-                    chat_history.append(HumanMessage(content=msg["content"]))
-                elif msg["role"] == "assistant":
-                    chat_history.append(AIMessage(content=msg["content"]))
+        Yields:
+            {"type": "text", "content": ...} for each model token,
+            {"type": "tool_start", "tool": ..., "tool_call_id": ...} when the
+            model requests a tool, and {"type": "tool_end", ...} followed by
+            {"type": "calculation", "kind": ..., "result": ...} as soon as it returns
+        """
+        # Server-side memory is authoritative; only client turns it doesn't
+        # already hold (by content hash) are merged in, so clients may send
+        # just the new messages or resend the whole conversation
+        for msg in history_assembler.new_turns(self.memory_manager.messages, conversation_history):
+            self.memory_manager.add_message(msg["role"], msg["content"])
+        
+        # Newest turns within the token budget; older ones arrive as a summary
+        history = history_assembler.assemble(self.user_id, self.memory_manager.messages)
         
         # Prepare messages for agent
-        # LangChain 1.0+ create_agent expects messages in the input
+        # Static prompt, summary and history form a prefix that only grows turn
+        # to turn; the per-user snapshot sits just before the new question
+        prompt = [SystemMessage(content=SYSTEM_PROMPT)]
+        if history.summary:
+            prompt.append(SystemMessage(content=history.summary))
+        prompt += history.messages
+        _record_prompt_prefix(self.user_id, self._tool_schema_digest, prompt)
         input_data = {
-            "messages": chat_history + [HumanMessage(content=user_message)]
+            "messages": prompt
+            + [SystemMessage(content=self._get_context_message()), HumanMessage(content=user_message)]
         }
         
-        # Execute agent with streaming
         full_response = ""
+        tool_results = []
+        self._last_tool_results = tool_results
+        self._last_error = None
+        started = time.perf_counter()
+        first_token_at = None
+        
+        # Tool results reach the bus from the callback as each tool returns,
+        # without waiting for the rest of the graph step
+        bus = AgentEventBus()
+        config = dict(self._config, callbacks=[ToolResultPublisher(bus)])
+        run = self._run_task = asyncio.create_task(self._run_graph(input_data, config, bus))
         
         try:
-            # Use invoke first to get the full response, then we'll handle streaming
-            response = await self.agent_runnable.ainvoke(input_data)
+            async for event in bus:
+                if event["type"] == "text":
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        metrics.observe("agent.time_to_first_token_seconds", first_token_at - started)
+                    full_response += event["content"]
+                elif event["type"] == "calculation":
+                    if not tool_results:
+                        metrics.observe("agent.time_to_first_calculation_seconds", time.perf_counter() - started)
+                    self.memory_manager.store_calculation(event["kind"], event["result"])
+                    tool_results.append((event["kind"], event["result"]))
+                yield event
             
-            # Extract tool results and final response from the agent
-            tool_results = []
-            if "messages" in response:
-                # First pass: Extract all tool results
-                for message in response["messages"]:
-                    # Check if this is a ToolMessage (result from tool execution)
-                    if isinstance(message, ToolMessage) or (hasattr(message, "__class__") and "ToolMessage" in str(type(message))):
-                        if hasattr(message, "content") and message.content:
-                            content = str(message.content)
-                            # Try to parse as JSON (tool results)
-                            try:
-                                result = json.loads(content)
-                                if isinstance(result, dict):
-                                    # Store calculation results
-                                    if "dti" in result and "is_affordable" not in result:
-                                        self.memory_manager.store_calculation("dti", result)
-                                        tool_results.append(("dti", result))
-                                    elif "is_affordable" in result:
-                                        self.memory_manager.store_calculation("affordability", result)
-                                        tool_results.append(("affordability", result))
-                                    elif "readiness_score" in result:
-                                        self.memory_manager.store_calculation("readiness", result)
-                                        tool_results.append(("readiness", result))
-                                    elif "action_plan" in result or "priority_actions" in result or "goal" in result:
-                                        self.memory_manager.store_calculation("action_plan", result)
-                                        tool_results.append(("action_plan", result))
-                                    elif "spending_by_category" in result or "overspending_alerts" in result or "peer_comparisons" in result:
-                                        self.memory_manager.store_calculation("transaction_analysis", result)
-                                        tool_results.append(("transaction_analysis", result))
-                                    elif "goal_recommendation" in result:
-                                        self.memory_manager.store_calculation("goal_recommendation", result)
-                                        tool_results.append(("goal_recommendation", result))
-                            except json.JSONDecodeError:
-                                pass  # Not JSON, continue
-                    # Also check regular messages that might contain JSON (fallback)
-                    elif hasattr(message, "content") and message.content:
-                        content = str(message.content)
-                        # Skip if it's an AIMessage (those are responses, not tool results)
-                        if isinstance(message, AIMessage):
-                            continue
-                        # Try to parse as JSON (tool results)
-                        try:
-                            result = json.loads(content)
-                            if isinstance(result, dict):
-                                # Store calculation results
-                                if "dti" in result and "is_affordable" not in result:
-                                    self.memory_manager.store_calculation("dti", result)
-                                    tool_results.append(("dti", result))
-                                elif "is_affordable" in result:
-                                    self.memory_manager.store_calculation("affordability", result)
-                                    tool_results.append(("affordability", result))
-                                elif "readiness_score" in result:
-                                    self.memory_manager.store_calculation("readiness", result)
-                                    tool_results.append(("readiness", result))
-                                elif "action_plan" in result or "priority_actions" in result or "goal" in result:
-                                    self.memory_manager.store_calculation("action_plan", result)
-                                    tool_results.append(("action_plan", result))
-                                elif "goal_recommendation" in result:
-                                    self.memory_manager.store_calculation("goal_recommendation", result)
-                                    tool_results.append(("goal_recommendation", result))
-                        except json.JSONDecodeError:
-                            pass  # Not JSON, continue
-                
-                # Second pass: Find the final text response (last non-tool message)
-                for message in reversed(response["messages"]):
-                    if hasattr(message, "content") and message.content:
-                        content = str(message.content)
-                        # Skip JSON (tool results)
-                        try:
-                            json.loads(content)
-                            continue  # This is a tool result, skip it
-                        except json.JSONDecodeError:
-                            # This is a text response - stream it
-                            full_response = content
-                            # Stream word by word for better UX
-                            words = content.split()
-                            for i, word in enumerate(words):
-                                yield word + (" " if i < len(words) - 1 else "")
-                            break  # Found the response, stop looking
-                
-                # Store tool results for later retrieval
-                self._last_tool_results = tool_results
-                            
+            await run
+            metrics.observe("agent.response_seconds", time.perf_counter() - started)
+        
+        except asyncio.CancelledError:
+            if not self._cancelled:
+                raise
+            # Cancelled through cancel(): nobody is listening, so nothing is saved
+            metrics.increment("agent.runs_cancelled")
+            self._last_error = "cancelled"
+            return
+        
         except Exception as e:
             error_msg = f"Error processing message: {str(e)}"
-            yield error_msg
+            yield {"type": "text", "content": error_msg}
             full_response = error_msg
             self._last_tool_results = []
+            self._last_error = str(e)
+        
+        finally:
+            # The consumer stopped early (e.g. the response task was cancelled)
+            if not run.done():
+                run.cancel()
+                metrics.increment("agent.runs_cancelled")
         
         # Save to memory
         self.memory_manager.add_message("user", user_message)
         self.memory_manager.add_message("assistant", full_response)
-        
-        # Extract and store any calculations for future reference
-        # This would be enhanced to parse tool outputs
-        self._extract_and_store_calculations(full_response)
     
-    def _extract_and_store_calculations(self, response: str):
-        """Extract calculation results from tool outputs for future context."""
-        # In a full implementation, we'd parse the tool execution results
-        # For now, we rely on the memory manager's last_calculations
-        pass
-
+    async def _run_graph(self, input_data: Dict[str, Any], config: Dict[str, Any], bus: AgentEventBus):
+        """Run the agent graph, publishing tokens and tool events to the bus."""
+        try:
+            # "messages" carries model tokens as they are generated,
+            # "updates" carries each finished step (tool requests and tool results)
+            async for mode, chunk in self.agent_runnable.astream(
+                input_data, config=config, stream_mode=["messages", "updates"]
+            ):
+                if mode == "messages":
+                    message, _ = chunk
+                    if isinstance(message, AIMessage) and isinstance(message.content, str) and message.content:
+                        bus.publish({"type": "text", "content": message.content})
+                    continue
+                
+                for node, update in chunk.items():
+                    for message in (update or {}).get("messages", []):
+                        if isinstance(message, AIMessage):
+                            for tool_call in message.tool_calls:
+                                bus.publish({"type": "tool_start", "tool": tool_call["name"], "tool_call_id": tool_call["id"]})
+                        elif isinstance(message, ToolMessage):
+                            # Normally already published by the callback; deduplicated by call id
+                            bus.publish_tool_result(message)
+        finally:
+            bus.close()
@@ -0,0 +1,216 @@
+"""History Assembler - Token-budgeted, deduplicated chat history for the agent"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from app.services.metrics import metrics
+
+ENCODING_NAME = "o200k_base"  # gpt-4o tokenizer
+MESSAGE_OVERHEAD_TOKENS = 4  # Role and separators per chat message
+
+_encoding = None
+_encoding_failed = False
+_encoding_lock = threading.Lock()
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count tokens with the local tiktoken encoding.
+
+    Falls back to ~4 characters per token if the encoding can't be loaded
+    (e.g. no network to fetch the BPE file on first use).
+    """
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        with _encoding_lock:
+            if _encoding is None and not _encoding_failed:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding(ENCODING_NAME)
+                except Exception:
+                    _encoding_failed = True
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def _turn_hash(message: Dict[str, str]) -> str:
+    """Identity of a turn: role plus whitespace/case-normalized content."""
+    content = " ".join(message.get("content", "").split()).lower()
+    return hashlib.sha1(f"{message.get('role')}\0{content}".encode()).hexdigest()
+
+
+def _contains_run(haystack: List[str], run: List[str]) -> bool:
+    return any(haystack[i:i + len(run)] == run for i in range(len(haystack) - len(run) + 1))
+
+
+def _first_sentence(text: str, max_words: int = 25) -> str:
+    sentence = re.split(r"(?<=[.!?])\s", text.strip(), maxsplit=1)[0]
+    words = sentence.split()
+    return " ".join(words[:max_words]) + ("..." if len(words) > max_words else "")
+
+
+def _summary_line(message: Dict[str, str]) -> str:
+    """Extractive one-liner: the user's question, or the coach's figures."""
+    content = message.get("content", "")
+    if message.get("role") == "user":
+        return f"- User asked: {_first_sentence(content)}"
+    # Sentences with numbers carry the facts the model may need to refer back to
+    figures = [s for s in re.split(r"(?<=[.!?])\s", content) if re.search(r"[$%]|\d", s)]
+    return f"- Coach: {_first_sentence(figures[0] if figures else content)}"
+
+
+class AssembledHistory(NamedTuple):
+    messages: List[BaseMessage]
+    summary: Optional[str]
+    tokens: int
+
+
+class HistoryAssembler:
+    """
+    Builds the history part of the prompt from stored turns.
+
+    The newest turns are kept verbatim up to a token budget (counted with
+    the local tokenizer, not by message count). Older turns are folded into
+    an extractive rolling summary that is cached per user and only extended
+    when the window moves, so steady-state turns don't re-summarize.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 2000,
+        summary_token_budget: int = 300,
+        token_counter: Callable[[str], int] = count_tokens,
+        max_cached_summaries: int = 10000
+    ):
+        self.token_budget = token_budget
+        self.summary_token_budget = summary_token_budget
+        self.count_tokens = token_counter
+        self.max_cached_summaries = max_cached_summaries
+        self._lock = threading.Lock()
+        # user_id -> (hashes of the folded turns, summary lines)
+        self._summaries: "OrderedDict[str, Tuple[List[str], List[str]]]" = OrderedDict()
+
+    def new_turns(self, stored: List[Dict[str, str]], incoming: Optional[List[Dict[str, str]]]) -> List[Dict[str, str]]:
+        """
+        Turns from the client's history that the server doesn't have yet.
+
+        The client's history is aligned with the stored turns by sequence,
+        not by set membership: the longest run of the newest stored turns
+        found in the client's history marks where the new turns begin. This
+        keeps repeated turns ("ok", "yes") and copes with a client that
+        resends turns the ring buffer has already dropped.
+        """
+        turns = [
+            {"role": message["role"], "content": message["content"]}
+            for message in incoming or []
+            if message.get("role") in ("user", "assistant") and message.get("content")
+        ]
+        if not turns or not stored:
+            return turns
+
+        stored_hashes = [_turn_hash(message) for message in stored]
+        hashes = [_turn_hash(message) for message in turns]
+        overlap, start = 0, 0
+        for end in range(len(hashes), 0, -1):
+            length = 0
+            while (
+                length < min(end, len(stored_hashes))
+                and hashes[end - 1 - length] == stored_hashes[-1 - length]
+            ):
+                length += 1
+            if length > overlap:
+                overlap, start = length, end
+
+        if overlap == 0 and len(hashes) > 1 and _contains_run(stored_hashes, hashes):
+            # The client is behind the server (e.g. another tab moved on)
+            overlap, start = len(hashes), len(hashes)
+        metrics.increment("history.duplicates_dropped", start)
+        return turns[start:]
+
+    def assemble(self, user_id: str, stored: List[Dict[str, str]]) -> AssembledHistory:
+        """Recent turns within the token budget plus a summary of older ones."""
+        # Back-to-back repeats (e.g. a retried send) add nothing
+        turns = []
+        previous = None
+        for message in stored:
+            digest = _turn_hash(message)
+            if digest != previous:
+                turns.append(message)
+            previous = digest
+
+        kept: List[Dict[str, str]] = []
+        tokens = 0
+        for message in reversed(turns):
+            cost = self.count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+            if kept and tokens + cost > self.token_budget:
+                break
+            kept.append(message)
+            tokens += cost
+        kept.reverse()
+
+        folded = turns[:len(turns) - len(kept)]
+        summary = self._summarize(user_id, folded) if folded else None
+        if summary:
+            tokens += self.count_tokens(summary) + MESSAGE_OVERHEAD_TOKENS
+
+        metrics.observe("history.prompt_tokens", tokens)
+        metrics.increment("history.folded_turns", len(folded))
+        messages = [
+            HumanMessage(content=m["content"]) if m["role"] == "user" else AIMessage(content=m["content"])
+            for m in kept
+        ]
+        return AssembledHistory(messages, summary, tokens)
+
+    def forget(self, user_id: str):
+        """Drop a user's cached summary."""
+        with self._lock:
+            self._summaries.pop(user_id, None)
+
+    @staticmethod
+    def _carried_over(previous: List[str], current: List[str]) -> Optional[int]:
+        """How many of the current folded turns the previous summary covers (None if unrelated)."""
+        if not previous or not current:
+            return None
+        try:
+            dropped = previous.index(current[0])
+        except ValueError:
+            return None
+        overlap = previous[dropped:]
+        return len(overlap) if current[:len(overlap)] == overlap else None
+
+    def _summarize(self, user_id: str, folded: List[Dict[str, str]]) -> str:
+        hashes = [_turn_hash(message) for message in folded]
+        with self._lock:
+            cached = self._summaries.get(user_id)
+
+        if cached is not None and cached[0] == hashes:
+            metrics.increment("history.summary_cache_hits")
+            lines = cached[1]
+        else:
+            # Extend the previous summary when the window only moved forward
+            # (the oldest stored turns may have left the ring buffer meanwhile)
+            carried = self._carried_over(cached[0], hashes) if cached is not None else None
+            if carried is not None:
+                lines = cached[1] + [_summary_line(m) for m in folded[carried:]]
+            else:
+                lines = [_summary_line(m) for m in folded]
+            # Oldest lines drop out first once the summary outgrows its budget
+            while len(lines) > 1 and self.count_tokens("\n".join(lines)) > self.summary_token_budget:
+                lines = lines[1:]
+            with self._lock:
+                self._summaries[user_id] = (hashes, lines)
+                self._summaries.move_to_end(user_id)
+                while len(self._summaries) > self.max_cached_summaries:
+                    self._summaries.popitem(last=False)
+
+        return "Summary of earlier conversation:\n" + "\n".join(lines)
+
+
+# Global history assembler instance
+history_assembler = HistoryAssembler()
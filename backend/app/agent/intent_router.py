@@ -0,0 +1,149 @@
+"""Intent Router - Deterministic fast path for pure calculation questions"""
+
+import re
+from typing import Any, Dict, NamedTuple, Optional
+
+from app.calculator.dti_calculator import DTICalculator
+from app.calculator.affordability import AffordabilityCalculator
+from app.calculator.readiness_score import ReadinessScoreCalculator
+from app.services.calculation_cache import calculation_cache
+
+# Prices outside this range are more likely a misparse than a real question
+MIN_HOME_PRICE = 10000
+MAX_HOME_PRICE = 100000000
+
+_ASK = r"(?:please\s+)?(?:(?:what(?:'s| is)|show(?: me)?|calculate|check|get|tell me)\s+)?"
+_PLEASE = r"(?:\s+please)?"
+_PRICE = r"\$?\s?(?P<amount>\d[\d,]*(?:\.\d+)?)\s?(?P<unit>k|m|thousand|million)?"
+_PROPERTY = r"(?:\s+(?:home|house|condo|townhouse|property|place))?"
+
+_PATTERNS = [
+    ("dti", re.compile(
+        _ASK + r"(?:my\s+)?(?:current\s+)?(?:dti|debt[- ]to[- ]income)(?:\s+ratio)?" + _PLEASE
+    )),
+    ("readiness", re.compile(
+        _ASK + r"(?:my\s+)?(?:current\s+|overall\s+|homeownership\s+)?readiness(?:\s+score)?" + _PLEASE
+        + r"|how ready am i(?:\s+to\s+(?:buy|own)\s+a\s+(?:home|house))?"
+    )),
+    ("affordability", re.compile(
+        r"(?:(?:can|could) i (?:afford|buy)|(?P<is>is)) (?:a |an )?" + _PRICE + _PROPERTY
+        + r"(?P<affordable> affordable(?: for me)?)?"
+    )),
+]
+
+_UNITS = {None: 1, "k": 1000, "thousand": 1000, "m": 1000000, "million": 1000000}
+
+
+class IntentMatch(NamedTuple):
+    intent: str
+    args: Dict[str, Any]
+
+
+class RoutedAnswer(NamedTuple):
+    kind: str
+    result: Dict[str, Any]
+    text: str
+
+
+def normalize(message: str) -> str:
+    """Lowercase, unify apostrophes, collapse whitespace, drop trailing punctuation."""
+    text = message.lower().replace("’", "'").strip()
+    text = re.sub(r"\s+", " ", text)
+    return text.rstrip("?!. ")
+
+
+class IntentRouter:
+    """
+    Answers unambiguous calculation questions ("What is my DTI?", "Can I
+    afford a $400k home?") straight from the calculators, without a model
+    call. Anything it isn't sure about returns None and goes to the agent.
+    """
+
+    def __init__(self):
+        self.dti_calc = DTICalculator()
+        self.affordability_calc = AffordabilityCalculator()
+        self.readiness_calc = ReadinessScoreCalculator()
+
+    def match(self, message: str) -> Optional[IntentMatch]:
+        """Recognize a whole-message calculation intent."""
+        text = normalize(message)
+        for intent, pattern in _PATTERNS:
+            found = pattern.fullmatch(text)
+            if not found:
+                continue
+            if intent != "affordability":
+                return IntentMatch(intent, {})
+
+            # "Is $X affordable" needs the adjective; "can I afford $X" must not repeat it
+            if bool(found.group("is")) != bool(found.group("affordable")):
+                return None
+            amount = found.group("amount").replace(",", "")
+            try:
+                price = float(amount) * _UNITS[found.group("unit")]
+            except ValueError:
+                return None
+            if not MIN_HOME_PRICE <= price <= MAX_HOME_PRICE:
+                return None
+            return IntentMatch(intent, {"home_price": price})
+        return None
+
+    def answer(self, user_id: str, message: str) -> Optional[RoutedAnswer]:
+        """Run the matching calculator and narrate it, or None if not confident."""
+        intent = self.match(message)
+        if intent is None:
+            return None
+
+        # Same cache entries as the agent's tools
+        if intent.intent == "dti":
+            result = calculation_cache.get_or_compute(user_id, "dti", self.dti_calc.calculate)
+        elif intent.intent == "readiness":
+            result = calculation_cache.get_or_compute(user_id, "readiness", self.readiness_calc.calculate)
+        else:
+            home_price = intent.args["home_price"]
+            result = calculation_cache.get_or_compute(
+                user_id, "affordability",
+                lambda context: self.affordability_calc.check_affordability(home_price, context),
+                home_price=home_price
+            )
+
+        # Calculator errors (e.g. missing income) need the agent's judgement
+        if "error" in result:
+            return None
+        return RoutedAnswer(intent.intent, result, self._narrate(intent.intent, result))
+
+    def _narrate(self, intent: str, result: Dict[str, Any]) -> str:
+        """Templated narration using only numbers from the calculator."""
+        if intent == "dti":
+            return (
+                f"Your debt-to-income ratio is {result['dti']:.1f}%: "
+                f"${result['total_monthly_debts']:,.0f} in monthly debt payments against "
+                f"${result['monthly_income']:,.0f} of gross monthly income. {result['message']} "
+                f"Most lenders look for {result['guideline_max']:.0f}% or lower."
+            )
+
+        if intent == "readiness":
+            text = (
+                f"Your homeownership readiness score is {result['readiness_score']}/100 "
+                f"({result['level'].replace('_', ' ')}). {result['message']}"
+            )
+            recommendations = result.get("recommendations") or []
+            if recommendations:
+                text += f" Top recommendation: {recommendations[0]}."
+            return text
+
+        if result["is_affordable"]:
+            return (
+                f"Yes, a ${result['home_price']:,.0f} home looks affordable. Your estimated monthly "
+                f"payment would be ${result['monthly_payment']:,.0f}, bringing your DTI to "
+                f"{result['dti']:.1f}%, and you have the ${result['required_down_payment']:,.0f} "
+                f"needed for a 20% down payment."
+            )
+        return (
+            f"A ${result['home_price']:,.0f} home is a stretch right now: {result['reasoning']}. "
+            f"Based on your income and debts, homes up to about "
+            f"${result['max_affordable_home_price']:,.0f} fit the lending guidelines."
+        )
+
+
+# Global intent router instance
+intent_router = IntentRouter()
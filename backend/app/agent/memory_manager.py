@@ -1,32 +1,52 @@
 """Memory Manager for Conversation Context"""
 
-import json
 from typing import List, Dict, Any
-from pathlib import Path
+
+from app.agent.history_assembler import history_assembler
+from app.services.conversation_store import ConversationStore, conversation_store
+from app.services.user_context_repository import user_context_repository
 
 
 class FinancialMemoryManager:
     """
     Manages conversation memory and user context for contextual conversations.
+    
+    Messages and calculations live in the process-wide conversation store,
+    so they survive across requests instead of starting empty every time.
     """
     
-    def __init__(self, user_id: str, window_size: int = 10):
+    def __init__(self, user_id: str, window_size: int = 10, store: ConversationStore = None):
         self.user_id = user_id
         self.window_size = window_size
-        self.messages: List[Dict[str, str]] = []
-        self.user_context = self._load_user_context()
-        self.last_calculations: Dict[str, Any] = {}
+        self.store = store or conversation_store
+        self.user_context = user_context_repository.get(user_id)
+    
+    @property
+    def messages(self) -> List[Dict[str, str]]:
+        """All stored messages for this user, oldest first."""
+        return self.store.get_messages(self.user_id)
+    
+    @property
+    def last_calculations(self) -> Dict[str, Any]:
+        """Latest calculation per kind, plus "last"."""
+        return self.store.get_calculations(self.user_id)
+    
+    def has_history(self) -> bool:
+        """Whether the server already holds messages for this user."""
+        return bool(self.store.get_messages(self.user_id, limit=1))
+    
+    def reset(self):
+        """Forget this user's conversation (e.g. the client started a new one)."""
+        self.store.clear(self.user_id)
+        history_assembler.forget(self.user_id)
     
     def get_chat_history(self) -> List[Dict[str, str]]:
         """Get conversation history for LangChain (last N messages)."""
-        return self.messages[-self.window_size:] if len(self.messages) > self.window_size else self.messages
+        return self.store.get_messages(self.user_id, limit=self.window_size)
     
     def add_message(self, role: str, content: str):
         """Add message to memory."""
-        self.messages.append({"role": role, "content": content})
-        # Keep only last N messages
-        if len(self.messages) > self.window_size * 2:
-            self.messages = self.messages[-self.window_size:]
+        self.store.append(self.user_id, role, content)
     
     def get_user_context(self) -> Dict[str, Any]:
         """Get user's financial context."""
@@ -36,25 +56,9 @@ class FinancialMemoryManager:
         """Get last calculated DTI for context."""
         dti_calc = self.last_calculations.get("dti")
         if dti_calc and isinstance(dti_calc, dict):
-            return dti_calc.get("dti", 0)
+            return dti_calc.get("dti", 0) or 0
         return 0
     
     def store_calculation(self, calculation_type: str, result: Dict):
         """Store calculation result for future reference."""
-        self.last_calculations[calculation_type] = result
-        self.last_calculations["last"] = result
-    
-    def _load_user_context(self) -> Dict[str, Any]:
-        """Load from JSON file."""
-        try:
-            data_path = Path(__file__).parent.parent / "data" / "mock_user_context.json"
-            with open(data_path, "r") as f:
-                data = json.load(f)
-                return data.get(self.user_id, data.get("user_001", {}))
-        except FileNotFoundError:
-            return {
-                "income": {"monthly_gross": 0},
-                "debts": [],
-                "savings": {"total": 0}
-            }
-
+        self.store.store_calculation(self.user_id, calculation_type, result)
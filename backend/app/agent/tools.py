@@ -1,52 +1,204 @@
 """LangChain Tools for Financial Calculations"""
 
-from langchain_core.tools import tool
-from typing import Dict, Any
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import StructuredTool, tool
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 import json
-from pathlib import Path
 
 from app.calculator.dti_calculator import DTICalculator
 from app.calculator.affordability import AffordabilityCalculator
 from app.calculator.readiness_score import ReadinessScoreCalculator
 from app.calculator.transaction_analyzer import TransactionAnalyzer
+from app.calculator.scenario_engine import ScenarioEngine
+from app.services.calculation_cache import calculation_cache
+from app.services.calculation_pool import calculation_pool
+from app.services.user_context_repository import DEFAULT_USER_ID, user_context_repository
 
 
-def _load_user_context(user_id: str) -> Dict[str, Any]:
-    """Load user context from JSON file."""
-    try:
-        data_path = Path(__file__).parent.parent / "data" / "mock_user_context.json"
-        with open(data_path, "r") as f:
-            data = json.load(f)
-            return data.get(user_id, data.get("user_001", {}))
-    except FileNotFoundError:
-        return {
-            "income": {"monthly_gross": 0},
-            "debts": [],
-            "savings": {"total": 0}
+class ToolResult(NamedTuple):
+    """A tool's full result tagged with its calculation kind (the tool message artifact)."""
+    kind: str
+    data: Dict[str, Any]
+
+
+def _dti_view(result: Dict[str, Any]) -> Dict[str, Any]:
+    view = {key: result.get(key) for key in (
+        "dti", "monthly_income", "total_monthly_debts", "status", "guideline_max", "is_within_guidelines"
+    )}
+    # A list, not a dict by type: two credit cards are two payments
+    view["debt_payments"] = [
+        {"type": debt.get("type"), "monthly_payment": debt.get("monthly_payment")}
+        for debt in result.get("debt_breakdown", [])
+    ]
+    return view
+
+
+def _affordability_view(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: result.get(key) for key in (
+        "home_price", "is_affordable", "dti", "front_end_ratio", "monthly_payment",
+        "required_down_payment", "current_savings", "max_affordable_home_price", "reasoning"
+    )}
+
+
+def _readiness_view(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "readiness_score": result.get("readiness_score"),
+        "level": result.get("level"),
+        # Points as "x/y" plus each component's current figures (DTI, credit
+        # score, savings vs. target, employment) the coaching refers to
+        "breakdown": {
+            name: {
+                "points": f"{part.get('points')}/{part.get('max_points')}",
+                **{key: value for key, value in part.items() if key not in ("points", "max_points")}
+            }
+            for name, part in result.get("breakdown", {}).items()
+        },
+        "recommendations": result.get("recommendations", [])
+    }
+
+
+def _readiness_grid_view(result: Dict[str, Any]) -> Dict[str, Any]:
+    # The score surface is for charts; the thresholds answer "what would it take"
+    return {"current_score": result.get("current_score"), "thresholds": result.get("thresholds")}
+
+
+def _action_plan_view(result: Dict[str, Any]) -> Dict[str, Any]:
+    # The UI renders the full plan; the model only highlights priorities
+    return {
+        "goal": result.get("goal"),
+        "current_status": result.get("current_status"),
+        "timeline_months": result.get("timeline_months"),
+        "priority_actions": [
+            {key: action.get(key) for key in ("action", "priority", "target")}
+            for action in result.get("priority_actions", [])
+        ],
+        "milestones": [f"{m.get('milestone')}: {m.get('target')}" for m in result.get("milestones", [])]
+    }
+
+
+def _transaction_analysis_view(result: Dict[str, Any]) -> Dict[str, Any]:
+    view = {key: result.get(key) for key in (
+        "analysis_period_months", "average_monthly_income", "total_monthly_spending",
+        "monthly_savings", "savings_rate_percentage", "overspending_alerts", "recommendations", "summary"
+    )}
+    view["top_spending_categories"] = {
+        item.get("category"): item.get("monthly_average") for item in result.get("top_spending_categories", [])
+    }
+    # Only categories above the peer average are worth narrating
+    view["over_peer_average"] = {
+        category: comparison.get("variance_percentage")
+        for category, comparison in result.get("peer_comparisons", {}).items()
+        if comparison.get("is_over_budget")
+    }
+    return view
+
+
+def _scenario_plan_view(result: Dict[str, Any]) -> Dict[str, Any]:
+    scenarios = []
+    for scenario in result.get("scenarios", []):
+        final = scenario.get("final", {})
+        compact = {
+            "name": scenario.get("name"),
+            "savings_p10_p50": [final.get("savings", {}).get("p10"), final.get("savings", {}).get("p50")],
+            "dti_p50": final.get("dti", {}).get("p50"),
+            "readiness_p50": final.get("readiness_score", {}).get("p50"),
+            "total_debt": final.get("total_debt"),
+            "probability_readiness_80": scenario.get("probability_readiness_80")
         }
+        for key in ("home_price", "probability_affordable", "likely_affordable_month"):
+            if key in scenario:
+                compact[key] = scenario[key]
+        scenarios.append(compact)
+    return {
+        "horizon_months": result.get("horizon_months"),
+        "best_scenario": result.get("best_scenario"),
+        "scenarios": scenarios
+    }
+
+
+def _goal_recommendation_view(result: Dict[str, Any]) -> Dict[str, Any]:
+    goal = result.get("goal_recommendation", {})
+    return {key: goal.get(key) for key in (
+        "type", "targetAmount", "targetDate", "monthlyContribution", "priority", "reason", "riskFactors"
+    )}
+
+
+# Per kind: the fields the model needs to narrate a result. The full result
+# still goes to the UI (calculation SSE event) through the artifact.
+_LLM_VIEWS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "dti": _dti_view,
+    "affordability": _affordability_view,
+    "readiness": _readiness_view,
+    "readiness_grid": _readiness_grid_view,
+    "action_plan": _action_plan_view,
+    "transaction_analysis": _transaction_analysis_view,
+    "scenario_plan": _scenario_plan_view,
+    "goal_recommendation": _goal_recommendation_view,
+}
+
+
+def llm_view(kind: str, result: Dict[str, Any]) -> str:
+    """Minified JSON of the model-facing fields of a result."""
+    view = _LLM_VIEWS.get(kind)
+    if view is not None and "error" not in result:
+        result = view(result)
+    return json.dumps(result, separators=(",", ":"), default=str)
 
 
-def get_financial_tools(user_id: str):
-    """Create LangChain tools for financial calculations."""
+def _respond(kind: str, result: Dict[str, Any]) -> Tuple[str, ToolResult]:
+    """Tool output: compact JSON for the model, full typed result as the artifact."""
+    return llm_view(kind, result), ToolResult(kind, result)
+
+
+def _add_async_variant(financial_tool: StructuredTool) -> StructuredTool:
+    """
+    Give a sync tool a coroutine that runs it on the bounded calculation pool.
+    
+    The agent's tool node awaits sibling tool calls concurrently, so several
+    calculations requested in one step overlap instead of running in turn,
+    and none of them blocks the event loop.
+    """
+    func = financial_tool.func
+    
+    async def run_in_pool(*args, config: RunnableConfig = None, **kwargs):
+        return await calculation_pool.run(func, *args, config=config, **kwargs)
+    
+    financial_tool.coroutine = run_in_pool
+    return financial_tool
+
+
+def get_financial_tools(user_id: Optional[str] = None):
+    """
+    Create LangChain tools for financial calculations.
+    
+    With a user_id the tools are bound to that user. Without one they read
+    the user from config["configurable"]["user_id"] at call time, so a single
+    set of tools (and one compiled agent graph) can serve every user.
+    """
+    
+    def _user(config: Optional[RunnableConfig]) -> str:
+        if user_id:
+            return user_id
+        return ((config or {}).get("configurable") or {}).get("user_id", DEFAULT_USER_ID)
     
     dti_calc = DTICalculator()
     affordability_calc = AffordabilityCalculator()
     readiness_calc = ReadinessScoreCalculator()
     transaction_analyzer = TransactionAnalyzer()
+    scenario_engine = ScenarioEngine()
     
-    @tool
-    def calculate_dti() -> str:
+    @tool(response_format="content_and_artifact")
+    def calculate_dti(config: RunnableConfig = None) -> Tuple[str, ToolResult]:
         """Calculate the user's Debt-to-Income ratio. 
         
         Use this when user asks about DTI, debt ratio, or how much debt they have relative to income.
         Returns a JSON string with DTI calculation results.
         """
-        user_context = _load_user_context(user_id)
-        result = dti_calc.calculate(user_context)
-        return json.dumps(result, indent=2)
+        result = calculation_cache.get_or_compute(_user(config), "dti", dti_calc.calculate)
+        return _respond("dti", result)
     
-    @tool
-    def calculate_affordability(home_price: float) -> str:
+    @tool(response_format="content_and_artifact")
+    def calculate_affordability(home_price: float, config: RunnableConfig = None) -> Tuple[str, ToolResult]:
         """Check if a home price is affordable based on user's financial situation.
         
         Args:
@@ -55,23 +207,54 @@ def get_financial_tools(user_id: str):
         Use this when user asks 'Can I afford X?', 'Is X affordable?', or similar affordability questions.
         Returns a JSON string with affordability analysis.
         """
-        user_context = _load_user_context(user_id)
-        result = affordability_calc.check_affordability(home_price, user_context)
-        return json.dumps(result, indent=2)
+        result = calculation_cache.get_or_compute(
+            _user(config), "affordability",
+            lambda context: affordability_calc.check_affordability(home_price, context),
+            home_price=home_price
+        )
+        return _respond("affordability", result)
     
-    @tool
-    def get_readiness_score() -> str:
+    @tool(response_format="content_and_artifact")
+    def get_readiness_score(config: RunnableConfig = None) -> Tuple[str, ToolResult]:
         """Get the user's overall readiness score (0-100) for homeownership.
         
         Use this when user asks about readiness, how ready they are, or their overall status.
         Returns a JSON string with readiness score and breakdown.
         """
-        user_context = _load_user_context(user_id)
-        result = readiness_calc.calculate(user_context)
-        return json.dumps(result, indent=2)
+        result = calculation_cache.get_or_compute(_user(config), "readiness", readiness_calc.calculate)
+        return _respond("readiness", result)
     
-    @tool
-    def create_action_plan(goal: str = "homeownership") -> str:
+    @tool(response_format="content_and_artifact")
+    def explore_readiness(
+        debt_reductions: Optional[List[float]] = None,
+        added_savings: Optional[List[float]] = None,
+        credit_scores: Optional[List[int]] = None,
+        config: RunnableConfig = None
+    ) -> Tuple[str, ToolResult]:
+        """Show how the readiness score changes with debt paydown, extra savings and credit score.
+        
+        Args:
+            debt_reductions: Monthly debt payment reductions to try (default: 0 to all current payments)
+            added_savings: Extra savings amounts to try (default: 0 to the down payment gap)
+            credit_scores: Credit scores to try (default: current score only)
+        
+        Use this when user asks "how much do I need to pay down/save to reach 80?",
+        or what it would take to reach the next readiness level. Prefer this over
+        calling get_readiness_score repeatedly.
+        Returns a JSON string with the score surface and the smallest change reaching each level.
+        """
+        try:
+            result = calculation_cache.get_or_compute(
+                _user(config), "readiness_grid",
+                lambda context: readiness_calc.calculate_grid(context, debt_reductions, added_savings, credit_scores),
+                debt_reductions=debt_reductions, added_savings=added_savings, credit_scores=credit_scores
+            )
+        except ValueError as e:
+            result = {"error": str(e)}
+        return _respond("readiness_grid", result)
+    
+    @tool(response_format="content_and_artifact")
+    def create_action_plan(goal: str = "homeownership", config: RunnableConfig = None) -> Tuple[str, ToolResult]:
         """Create a personalized action plan to help the user achieve their homeownership goals.
         
         Args:
@@ -80,11 +263,9 @@ def get_financial_tools(user_id: str):
         Use this when user asks for a plan, roadmap, steps to take, or "what should I do next?"
         Returns a JSON string with a structured action plan including steps, timeline, and priorities.
         """
-        user_context = _load_user_context(user_id)
-        readiness_calc = ReadinessScoreCalculator()
-        readiness = readiness_calc.calculate(user_context)
-        dti_calc = DTICalculator()
-        dti_result = dti_calc.calculate(user_context)
+        user_context = user_context_repository.get(_user(config))
+        readiness = calculation_cache.get_or_compute(_user(config), "readiness", readiness_calc.calculate)
+        dti_result = calculation_cache.get_or_compute(_user(config), "dti", dti_calc.calculate)
         
         # Generate action plan based on readiness score breakdown
         plan = {
@@ -168,10 +349,10 @@ def get_financial_tools(user_id: str):
             }
         ]
         
-        return json.dumps(plan, indent=2)
+        return _respond("action_plan", plan)
     
-    @tool
-    def analyze_spending(months: int = 3) -> str:
+    @tool(response_format="content_and_artifact")
+    def analyze_spending(months: int = 3, config: RunnableConfig = None) -> Tuple[str, ToolResult]:
         """Analyze user's spending patterns, detect overspending, and compare to peer benchmarks.
         
         Args:
@@ -186,12 +367,64 @@ def get_financial_tools(user_id: str):
         
         Returns a JSON string with spending analysis, overspending alerts, and peer benchmarks.
         """
-        user_context = _load_user_context(user_id)
-        result = transaction_analyzer.analyze(user_context, months=months)
-        return json.dumps(result, indent=2)
+        user_id = _user(config)
+        # The ledger is read after the cache has pinned the context version,
+        # so an ingest in between can't be cached under the newer version
+        result = calculation_cache.get_or_compute(
+            user_id, "transaction_analysis",
+            lambda context: transaction_analyzer.analyze(
+                context, months=months, ledger=user_context_repository.get_transaction_ledger(user_id)
+            ),
+            months=months
+        )
+        return _respond("transaction_analysis", result)
+    
+    @tool(response_format="content_and_artifact")
+    def plan_scenarios(
+        extra_debt_payment: float = 200.0,
+        additional_monthly_savings: float = 500.0,
+        home_prices: Optional[List[float]] = None,
+        months: int = 24,
+        config: RunnableConfig = None
+    ) -> Tuple[str, ToolResult]:
+        """Generate "what-if" scenarios comparing financial strategies over time.
+        
+        Args:
+            extra_debt_payment: Extra monthly payment toward debt for the debt strategy (default: 200)
+            additional_monthly_savings: Extra monthly savings for the savings strategy (default: 500)
+            home_prices: Home prices to test affordability for (e.g., [350000, 450000])
+            months: Projection horizon in months (default: 24)
+        
+        Use this when user asks 'what if', wants to compare strategies (pay down debt vs. save more),
+        or asks when they could afford a home price.
+        Returns a JSON string with projected savings, debt, DTI and readiness ranges per scenario.
+        """
+        scenarios = [{"name": "current_path"}]
+        if extra_debt_payment > 0:
+            scenarios.append({"name": "extra_debt_payment", "extra_debt_payment": extra_debt_payment})
+        if additional_monthly_savings > 0:
+            scenarios.append({"name": "higher_savings", "additional_savings": additional_monthly_savings})
+        if extra_debt_payment > 0 and additional_monthly_savings > 0:
+            scenarios.append({
+                "name": "debt_and_savings",
+                "extra_debt_payment": extra_debt_payment,
+                "additional_savings": additional_monthly_savings
+            })
+        for price in home_prices or []:
+            scenarios.append({"name": f"home_{int(price)}", "home_price": price})
+        
+        months = min(max(months, 1), 120)
+        # Fixed seed so asking the same question twice gives the same answer
+        result = calculation_cache.get_or_compute(
+            _user(config), "scenario_plan",
+            lambda context: scenario_engine.run(context, scenarios, months=months, seed=0),
+            scenarios=scenarios, months=months
+        )
+        # Median paths stay in the artifact for charts; the model gets the compact view
+        return _respond("scenario_plan", result)
     
-    @tool
-    def recommend_goal(goal_type: str, target_amount: float = 0.0, reason: str = "", priority: str = "medium", months: int = 12) -> str:
+    @tool(response_format="content_and_artifact")
+    def recommend_goal(goal_type: str, target_amount: float = 0.0, reason: str = "", priority: str = "medium", months: int = 12, config: RunnableConfig = None) -> Tuple[str, ToolResult]:
         """Recommends creating a financial goal based on the user's situation.
         
         Use this when the user asks about setting goals, saving for something, or planning for the future.
@@ -203,7 +436,7 @@ def get_financial_tools(user_id: str):
             months: Number of months to achieve the goal (default 12)
         Returns a JSON string with the goal recommendation details.
         """
-        user_context = _load_user_context(user_id)
+        user_context = user_context_repository.get(_user(config))
         monthly_income = user_context.get("income", {}).get("monthly_gross", 0)
         
         # Calculate monthly contribution if not provided
@@ -285,8 +518,7 @@ def get_financial_tools(user_id: str):
             confidence_score = 80
         elif goal_type == 'debt_payoff':
             total_debt = sum(d.get("balance", 0) for d in user_context.get("debts", []))
-            dti_calc = DTICalculator()
-            dti_result = dti_calc.calculate(user_context)
+            dti_result = calculation_cache.get_or_compute(_user(config), "dti", dti_calc.calculate)
             dti = dti_result.get("dti", 0)
             supporting_factors = [
                 f"Current total debt: ${total_debt:,.0f}",
@@ -332,6 +564,7 @@ def get_financial_tools(user_id: str):
                 ]
             }
         }
-        return json.dumps(result, indent=2)
+        return _respond("goal_recommendation", result)
     
-    return [calculate_dti, calculate_affordability, get_readiness_score, create_action_plan, analyze_spending, recommend_goal]
+    tools = [calculate_dti, calculate_affordability, get_readiness_score, explore_readiness, create_action_plan, analyze_spending, plan_scenarios, recommend_goal]
+    return [_add_async_variant(financial_tool) for financial_tool in tools]
@@ -1,6 +1,7 @@
 from .dti_calculator import DTICalculator
 from .affordability import AffordabilityCalculator
 from .readiness_score import ReadinessScoreCalculator
+from .batch_scoring import BatchScoringEngine
 
-__all__ = ["DTICalculator", "AffordabilityCalculator", "ReadinessScoreCalculator"]
+__all__ = ["DTICalculator", "AffordabilityCalculator", "ReadinessScoreCalculator", "BatchScoringEngine"]
 
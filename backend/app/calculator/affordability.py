@@ -1,6 +1,25 @@
 """Affordability Calculator - Deterministic Truth Layer"""
 
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, Optional, Sequence
+
+import numpy as np
+
+# Upper bound on points per sweep so a single request can't allocate unbounded arrays
+MAX_SWEEP_POINTS = 10000
+
+
+@lru_cache(maxsize=128)
+def annuity_factor(monthly_rate: float, num_payments: int) -> float:
+    """
+    Monthly payment per dollar borrowed: r(1+r)^n / ((1+r)^n - 1).
+    
+    Depends only on rate and term, so it is computed once per pair.
+    """
+    if monthly_rate == 0:
+        return 1 / num_payments
+    growth = (1 + monthly_rate) ** num_payments
+    return (monthly_rate * growth) / (growth - 1)
 
 
 class AffordabilityCalculator:
@@ -122,6 +141,91 @@ class AffordabilityCalculator:
             }
         }
     
+    def sweep(
+        self,
+        user_context: Dict[str, Any],
+        home_prices: Optional[Sequence[float]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        step: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Check affordability for many home prices in one vectorized call.
+        
+        Args:
+            user_context: User financial data
+            home_prices: Explicit prices to evaluate, or
+            min_price/max_price/step: An inclusive price range
+            
+        Returns:
+            Dictionary of per-price arrays (home_prices, monthly_payment, dti,
+            front_end_ratio, is_affordable) plus user-level limits
+        """
+        from app.calculator.batch_scoring import BatchScoringEngine
+        
+        if home_prices is not None:
+            prices = np.asarray(home_prices, dtype=np.float64)
+        else:
+            if min_price is None or max_price is None or not step or step <= 0 or max_price < min_price:
+                raise ValueError("Provide home_prices, or min_price <= max_price and a positive step")
+            if (max_price - min_price) / step + 1 > MAX_SWEEP_POINTS:
+                raise ValueError(f"Sweep is limited to {MAX_SWEEP_POINTS} prices")
+            prices = np.arange(min_price, max_price + step / 2, step, dtype=np.float64)
+        if prices.size > MAX_SWEEP_POINTS:
+            raise ValueError(f"Sweep is limited to {MAX_SWEEP_POINTS} prices")
+        
+        monthly_income = user_context.get("income", {}).get("monthly_gross", 0)
+        if monthly_income == 0:
+            return {
+                "error": "Monthly income is required for affordability calculation",
+                "is_affordable": False
+            }
+        
+        monthly_debts = sum(debt.get("monthly_payment", 0) for debt in user_context.get("debts", []))
+        savings = user_context.get("savings", {}).get("total", 0)
+        
+        engine = BatchScoringEngine(self.interest_rate, self.loan_term_years)
+        result = engine.score_affordability(prices, monthly_income, monthly_debts, savings)
+        
+        return {
+            "home_prices": prices,
+            "monthly_payment": result["monthly_payment"],
+            "dti": result["dti"],
+            "front_end_ratio": result["front_end_ratio"],
+            "is_affordable": result["is_affordable"],
+            "max_affordable_home_price": float(result["max_affordable_home_price"].flat[0]) if prices.size else 0.0,
+            "current_savings": round(savings, 2),
+            "guidelines": {
+                "max_dti": 43.0,
+                "max_front_end_ratio": 28.0,
+                "down_payment_percent": 20.0
+            }
+        }
+    
+    def amortization_schedule(
+        self,
+        loan_amount: float,
+        extra_principal: float = 0.0,
+        extra_payments: Optional[Dict[int, float]] = None
+    ):
+        """
+        Lazy amortization schedule for a loan under this calculator's rate and term.
+        
+        Args:
+            loan_amount: Amount borrowed (home price minus down payment)
+            extra_principal: Extra principal paid every month
+            extra_payments: One-off extra principal payments keyed by month
+        """
+        from app.calculator.amortization import AmortizationSchedule
+        
+        return AmortizationSchedule(
+            loan_amount,
+            interest_rate=self.interest_rate,
+            loan_term_years=self.loan_term_years,
+            extra_principal=extra_principal,
+            extra_payments=extra_payments
+        )
+    
     def _calculate_monthly_payment(self, loan_amount: float) -> float:
         """Calculate monthly P&I payment using standard mortgage formula."""
         if loan_amount <= 0:
@@ -131,9 +235,7 @@ class AffordabilityCalculator:
             return loan_amount / self.num_payments
         
         # PMT = P * (r(1+r)^n) / ((1+r)^n - 1)
-        numerator = self.monthly_rate * ((1 + self.monthly_rate) ** self.num_payments)
-        denominator = ((1 + self.monthly_rate) ** self.num_payments) - 1
-        return loan_amount * (numerator / denominator)
+        return loan_amount * annuity_factor(self.monthly_rate, self.num_payments)
     
     def _calculate_max_loan(self, max_monthly_payment: float) -> float:
         """Calculate max loan amount given max monthly payment."""
@@ -144,7 +246,4 @@ class AffordabilityCalculator:
             return max_monthly_payment * self.num_payments
         
         # Reverse the PMT formula
-        numerator = ((1 + self.monthly_rate) ** self.num_payments) - 1
-        denominator = self.monthly_rate * ((1 + self.monthly_rate) ** self.num_payments)
-        return max_monthly_payment * (numerator / denominator)
-
+        return max_monthly_payment / annuity_factor(self.monthly_rate, self.num_payments)
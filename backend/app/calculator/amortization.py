@@ -0,0 +1,197 @@
+"""Amortization Schedule - Lazy month-by-month mortgage schedules"""
+
+import math
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from app.calculator.affordability import annuity_factor
+
+
+class AmortizationSchedule:
+    """
+    Fixed-rate amortization schedule that never materializes more rows
+    than asked for.
+
+    Rows are produced by a generator, so memory stays constant for any
+    term. Paging jumps straight to the requested month using the closed-form
+    balance B_k = P*g^k - M*(g^k - 1)/r - sum(X_j * g^(k-j)), where g = 1 + r,
+    M is the scheduled payment plus recurring extra principal and X_j are
+    one-off extra payments. Months before the page are never computed.
+    NO LLM, NO HALLUCINATION - Pure deterministic math.
+    """
+
+    def __init__(
+        self,
+        loan_amount: float,
+        interest_rate: float = 0.065,
+        loan_term_years: int = 30,
+        extra_principal: float = 0.0,
+        extra_payments: Optional[Dict[int, float]] = None
+    ):
+        """
+        Args:
+            loan_amount: Amount borrowed
+            interest_rate: Annual interest rate (default 6.5%)
+            loan_term_years: Loan term in years (default 30)
+            extra_principal: Extra principal paid every month
+            extra_payments: One-off extra principal payments keyed by month (1-based)
+        """
+        if loan_amount < 0 or extra_principal < 0:
+            raise ValueError("loan_amount and extra_principal must not be negative")
+        self.loan_amount = loan_amount
+        self.monthly_rate = interest_rate / 12
+        self.num_payments = loan_term_years * 12
+        self.extra_principal = extra_principal
+        self.extra_payments = {int(m): a for m, a in (extra_payments or {}).items() if a > 0}
+        self.monthly_payment = (
+            loan_amount * annuity_factor(self.monthly_rate, self.num_payments) if loan_amount > 0 else 0.0
+        )
+
+    def _growth(self, months):
+        """(1 + r)^k and (g^k - 1)/r, handling a zero rate."""
+        if self.monthly_rate == 0:
+            return np.ones_like(months, dtype=np.float64) if isinstance(months, np.ndarray) else 1.0, months
+        growth = (1 + self.monthly_rate) ** months
+        return growth, (growth - 1) / self.monthly_rate
+
+    def balance_after(self, month: int) -> float:
+        """Remaining balance after `month` payments (0 once paid off)."""
+        if month <= 0:
+            return max(self.loan_amount, 0.0)
+
+        growth, accumulated = self._growth(month)
+        balance = (
+            self.loan_amount * growth
+            - (self.monthly_payment + self.extra_principal) * accumulated
+        )
+        for paid_month, amount in self.extra_payments.items():
+            if paid_month <= month:
+                balance -= amount * (1 + self.monthly_rate) ** (month - paid_month)
+        # Guard against float dust at payoff
+        return balance if balance > 0.005 else 0.0
+
+    def iter_rows(self, start_month: int = 1, end_month: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield schedule rows for months start_month..end_month (inclusive).
+
+        Stops early once the loan is paid off.
+        """
+        start_month = max(start_month, 1)
+        end_month = self.num_payments if end_month is None else min(end_month, self.num_payments)
+        balance = self.balance_after(start_month - 1)
+
+        for month in range(start_month, end_month + 1):
+            if balance <= 0:
+                return
+            interest = balance * self.monthly_rate
+            principal = min(self.monthly_payment - interest, balance)
+            if month == self.num_payments:
+                principal = balance
+            extra = min(self.extra_principal + self.extra_payments.get(month, 0.0), balance - principal)
+            balance = balance - principal - extra
+            if balance <= 0.005:
+                balance = 0.0
+
+            yield {
+                "month": month,
+                "payment": round(principal + interest, 2),
+                "principal": round(principal, 2),
+                "interest": round(interest, 2),
+                "extra_principal": round(extra, 2),
+                "balance": round(balance, 2)
+            }
+
+    def page(self, start_month: int = 1, end_month: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Materialize one page of rows (e.g. months 300-312 for the UI)."""
+        return list(self.iter_rows(start_month, end_month))
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Full schedule as NumPy columns for bulk export.
+
+        Balances come from the closed form over all months at once; the
+        generator is only used when one-off extra payments are present.
+        """
+        if self.extra_payments:
+            rows = list(self.iter_rows())
+            return {
+                key: np.array([row[key] for row in rows], dtype=np.int64 if key == "month" else np.float64)
+                for key in ("month", "payment", "principal", "interest", "extra_principal", "balance")
+            }
+
+        months = np.arange(1, self.num_payments + 1)
+        growth, accumulated = self._growth(months.astype(np.float64))
+        balances = self.loan_amount * growth - (self.monthly_payment + self.extra_principal) * accumulated
+        balances[-1] = 0.0
+        balances = np.where(balances > 0.005, balances, 0.0)
+        previous = np.concatenate(([max(self.loan_amount, 0.0)], balances[:-1]))
+
+        active = previous > 0
+        months, balances, previous = months[active], balances[active], previous[active]
+        interest = previous * self.monthly_rate
+        principal = np.minimum(self.monthly_payment - interest, previous)
+        if len(months) and months[-1] == self.num_payments:
+            principal[-1] = previous[-1]
+        extra = np.maximum(previous - balances - principal, 0.0)
+
+        return {
+            "month": months,
+            "payment": np.round(principal + interest, 2),
+            "principal": np.round(principal, 2),
+            "interest": np.round(interest, 2),
+            "extra_principal": np.round(extra, 2),
+            "balance": np.round(balances, 2)
+        }
+
+    def payoff_month(self) -> int:
+        """
+        Month of the final payment (0 for no loan).
+
+        Solved from the closed-form balance; with one-off extra payments the
+        rows are walked instead (still one row in memory at a time).
+        """
+        if self.loan_amount <= 0:
+            return 0
+        if self.extra_payments:
+            return max((row["month"] for row in self.iter_rows()), default=0)
+
+        payment = self.monthly_payment + self.extra_principal
+        if self.monthly_rate == 0:
+            month = math.ceil(self.loan_amount / payment)
+        else:
+            month = math.ceil(
+                math.log(payment / (payment - self.loan_amount * self.monthly_rate))
+                / math.log1p(self.monthly_rate)
+            )
+        month = min(max(month, 1), self.num_payments)
+        # The log can land a month off around the payoff dust threshold
+        while month > 1 and self.balance_after(month - 1) == 0:
+            month -= 1
+        while month < self.num_payments and self.balance_after(month) > 0:
+            month += 1
+        return month
+
+    def summary(self) -> Dict[str, Any]:
+        """Payoff month and totals for the whole schedule, without building it."""
+        if self.extra_payments:
+            payoff_month, total_interest = 0, 0.0
+            for row in self.iter_rows():
+                payoff_month = row["month"]
+                total_interest += row["interest"]
+        else:
+            payoff_month = self.payoff_month()
+            # Level payments until the last one, which clears the balance
+            total_paid = (
+                (self.monthly_payment + self.extra_principal) * (payoff_month - 1)
+                + self.balance_after(payoff_month - 1) * (1 + self.monthly_rate)
+            ) if payoff_month else 0.0
+            total_interest = max(total_paid - self.loan_amount, 0.0)
+        return {
+            "loan_amount": round(self.loan_amount, 2),
+            "monthly_principal_interest": round(self.monthly_payment, 2),
+            "extra_principal": round(self.extra_principal, 2),
+            "payoff_month": payoff_month,
+            "total_interest": round(total_interest, 2),
+            "total_paid": round(self.loan_amount + total_interest, 2)
+        }
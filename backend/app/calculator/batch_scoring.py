@@ -0,0 +1,204 @@
+"""Batch Scoring Engine - Vectorized DTI, readiness and affordability"""
+
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.calculator.affordability import annuity_factor
+
+# Tier tables mirroring the scalar calculators' if/elif chains.
+# "upper" edges are inclusive upper bounds (value <= edge), "lower" edges
+# are inclusive lower bounds (value >= edge).
+DTI_STATUS_UPPER = np.array([36.0, 43.0, 50.0])
+DTI_STATUSES = np.array(["excellent", "good", "fair", "poor"])
+
+READINESS_DTI_UPPER = np.array([36.0, 43.0, 50.0, 60.0])
+READINESS_DTI_POINTS = np.array([40, 35, 25, 15, 5])
+
+CREDIT_LOWER = np.array([600, 640, 680, 720, 760])
+CREDIT_POINTS = np.array([5, 10, 15, 20, 25, 30])
+
+EMPLOYMENT_LOWER = np.array([6, 12, 24])
+EMPLOYMENT_POINTS = np.array([2, 5, 7, 10])
+
+READINESS_LEVEL_LOWER = np.array([50, 65, 80])
+READINESS_LEVELS = np.array(["needs_improvement", "fair", "good", "excellent"])
+
+TARGET_DOWN_PAYMENT = 80000
+
+
+def _upper_tier(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Tier index for `value <= edge` chains."""
+    return np.searchsorted(edges, values, side="left")
+
+
+def _lower_tier(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Tier index for `value >= edge` chains (ascending edges)."""
+    return np.searchsorted(edges, values, side="right")
+
+
+def context_arrays(user_contexts: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Flatten user contexts (JSON format) into the engine's input arrays.
+
+    Returns:
+        Dict with monthly_income, monthly_debts, savings, credit_scores and
+        employment_months arrays, one entry per user
+    """
+    return {
+        "monthly_income": np.array(
+            [c.get("income", {}).get("monthly_gross", 0) for c in user_contexts], dtype=np.float64
+        ),
+        "monthly_debts": np.array(
+            [sum(d.get("monthly_payment", 0) for d in c.get("debts", [])) for c in user_contexts],
+            dtype=np.float64
+        ),
+        "savings": np.array(
+            [c.get("savings", {}).get("total", 0) for c in user_contexts], dtype=np.float64
+        ),
+        "credit_scores": np.array(
+            [c.get("credit", {}).get("score", 0) for c in user_contexts], dtype=np.float64
+        ),
+        "employment_months": np.array(
+            [c.get("income", {}).get("employment_length_months", 0) for c in user_contexts],
+            dtype=np.float64
+        ),
+    }
+
+
+class BatchScoringEngine:
+    """
+    Scores many users at once with NumPy instead of one dict at a time.
+    Same rules as DTICalculator, ReadinessScoreCalculator and
+    AffordabilityCalculator - NO LLM, NO HALLUCINATION.
+
+    All inputs are equal-length arrays (one element per user); results are
+    dicts of arrays in the same order.
+    """
+
+    def __init__(self, interest_rate: float = 0.065, loan_term_years: int = 30):
+        self.interest_rate = interest_rate
+        self.loan_term_years = loan_term_years
+        self.monthly_rate = interest_rate / 12
+        self.num_payments = loan_term_years * 12
+
+        self._payment_factor = annuity_factor(self.monthly_rate, self.num_payments)
+
+    def score_dti(self, monthly_income: np.ndarray, monthly_debts: np.ndarray) -> Dict[str, np.ndarray]:
+        """Vectorized DTICalculator.calculate (dti is NaN where income is 0)."""
+        income = np.asarray(monthly_income, dtype=np.float64)
+        debts = np.asarray(monthly_debts, dtype=np.float64)
+        valid = income != 0
+
+        dti = np.full(income.shape, np.nan)
+        np.divide(debts, income, out=dti, where=valid)
+        dti *= 100
+
+        status = np.where(valid, DTI_STATUSES[_upper_tier(np.nan_to_num(dti), DTI_STATUS_UPPER)], "")
+        return {
+            "valid": valid,
+            "dti": np.round(dti, 2),
+            "status": status,
+            "is_within_guidelines": valid & (np.nan_to_num(dti) <= 43.0),
+        }
+
+    def score_readiness(
+        self,
+        monthly_income: np.ndarray,
+        monthly_debts: np.ndarray,
+        savings: np.ndarray,
+        credit_scores: np.ndarray,
+        employment_months: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """Vectorized ReadinessScoreCalculator.calculate."""
+        income = np.asarray(monthly_income, dtype=np.float64)
+        debts = np.asarray(monthly_debts, dtype=np.float64)
+
+        # Same operation order as the scalar path so tier edges agree exactly
+        ratio = np.ones(np.broadcast(income, debts).shape)
+        np.divide(debts, income, out=ratio, where=income > 0)
+        dti = ratio * 100
+
+        dti_points = READINESS_DTI_POINTS[_upper_tier(dti, READINESS_DTI_UPPER)]
+        credit_points = CREDIT_POINTS[_lower_tier(np.asarray(credit_scores), CREDIT_LOWER)]
+        savings_ratio = np.minimum(np.asarray(savings, dtype=np.float64) / TARGET_DOWN_PAYMENT, 1.0)
+        savings_points = np.trunc(savings_ratio * 20).astype(np.int64)
+        employment_points = EMPLOYMENT_POINTS[_lower_tier(np.asarray(employment_months), EMPLOYMENT_LOWER)]
+
+        total = dti_points + credit_points + savings_points + employment_points
+        return {
+            "readiness_score": total,
+            "level": READINESS_LEVELS[_lower_tier(total, READINESS_LEVEL_LOWER)],
+            "dti_points": dti_points,
+            "credit_points": credit_points,
+            "savings_points": savings_points,
+            "employment_points": employment_points,
+            "current_dti": np.round(dti, 2),
+        }
+
+    def score_affordability(
+        self,
+        home_price,
+        monthly_income: np.ndarray,
+        monthly_debts: np.ndarray,
+        savings: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """
+        Vectorized AffordabilityCalculator.check_affordability.
+
+        home_price may be a scalar or an array broadcastable against the
+        user arrays. Users with zero income are never affordable.
+        """
+        income = np.asarray(monthly_income, dtype=np.float64)
+        debts = np.asarray(monthly_debts, dtype=np.float64)
+        savings = np.asarray(savings, dtype=np.float64)
+        price = np.asarray(home_price, dtype=np.float64)
+        price = np.broadcast_to(price, np.broadcast(price, income, debts, savings).shape)
+        valid = income != 0
+        safe_income = np.where(valid, income, 1.0)
+
+        required_down_payment = price * 0.20
+        loan_amount = price - required_down_payment
+        monthly_pi = np.where(loan_amount > 0, loan_amount * self._payment_factor, 0.0)
+        monthly_taxes_insurance = (price * 0.012) / 12
+        total_monthly_payment = monthly_pi + monthly_taxes_insurance
+
+        dti = (total_monthly_payment + debts) / safe_income * 100
+        front_end_ratio = total_monthly_payment / safe_income * 100
+        can_afford_down_payment = savings >= required_down_payment
+        is_affordable = valid & (dti <= 43.0) & (front_end_ratio <= 28.0) & can_afford_down_payment
+
+        max_monthly_payment = income * 0.28 - debts
+        max_home_price = np.where(
+            max_monthly_payment > 0, max_monthly_payment / self._payment_factor / 0.80, 0.0
+        )
+
+        return {
+            "valid": valid,
+            "is_affordable": is_affordable,
+            "dti": np.round(dti, 2),
+            "front_end_ratio": np.round(front_end_ratio, 2),
+            "monthly_payment": np.round(total_monthly_payment, 2),
+            "monthly_principal_interest": np.round(monthly_pi, 2),
+            "required_down_payment": np.round(required_down_payment, 2),
+            "can_afford_down_payment": can_afford_down_payment,
+            "max_affordable_home_price": np.round(max_home_price, 2),
+        }
+
+    def score(
+        self,
+        monthly_income: np.ndarray,
+        monthly_debts: np.ndarray,
+        savings: np.ndarray,
+        credit_scores: np.ndarray,
+        employment_months: np.ndarray,
+        home_price: float = 400000
+    ) -> Dict[str, Dict[str, np.ndarray]]:
+        """Score DTI, readiness and affordability for every user in one call."""
+        return {
+            "dti": self.score_dti(monthly_income, monthly_debts),
+            "readiness": self.score_readiness(
+                monthly_income, monthly_debts, savings, credit_scores, employment_months
+            ),
+            "affordability": self.score_affordability(home_price, monthly_income, monthly_debts, savings),
+        }
@@ -1,6 +1,12 @@
 """Readiness Score Calculator - Deterministic Truth Layer"""
 
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from app.calculator.batch_scoring import BatchScoringEngine, READINESS_LEVEL_LOWER, READINESS_LEVELS
+
+MAX_GRID_POINTS = 1_000_000
 
 
 class ReadinessScoreCalculator:
@@ -129,6 +135,106 @@ class ReadinessScoreCalculator:
             )
         }
     
+    def calculate_grid(
+        self,
+        user_context: Dict[str, Any],
+        debt_reductions: Optional[List[float]] = None,
+        added_savings: Optional[List[float]] = None,
+        credit_scores: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Evaluate the readiness score over a what-if grid in one vectorized pass.
+        
+        Args:
+            user_context: User financial data
+            debt_reductions: Monthly debt payment reductions to try
+                (default: 0 to all current payments, 11 steps)
+            added_savings: Extra savings amounts to try
+                (default: 0 to the remaining down payment gap, 11 steps)
+            credit_scores: Credit scores to try (default: current score only)
+            
+        Returns:
+            Dictionary with the grid axes, the score surface (indexed
+            [debt_reduction][added_savings][credit_score]) and, for each
+            readiness level, the smallest change that reaches it
+        
+        Raises:
+            ValueError: If the grid is larger than MAX_GRID_POINTS
+        """
+        income = user_context.get("income", {})
+        monthly_income = income.get("monthly_gross", 0)
+        monthly_debts = sum(debt.get("monthly_payment", 0) for debt in user_context.get("debts", []))
+        total_savings = user_context.get("savings", {}).get("total", 0)
+        current_credit = user_context.get("credit", {}).get("score", 0)
+        
+        if debt_reductions is None:
+            debt_reductions = np.linspace(0, monthly_debts, 11)
+        if added_savings is None:
+            added_savings = np.linspace(0, max(80000 - total_savings, 0), 11)
+        if credit_scores is None:
+            credit_scores = []
+        # Axes always include "no change" so single-lever answers exist
+        credit_axis = np.unique(np.append(np.asarray(credit_scores, dtype=np.float64), current_credit))
+        debt_axis = np.unique(np.append(np.clip(np.asarray(debt_reductions, dtype=np.float64), 0, monthly_debts), 0))
+        savings_axis = np.unique(np.append(np.maximum(np.asarray(added_savings, dtype=np.float64), 0), 0))
+        
+        if len(debt_axis) * len(savings_axis) * len(credit_axis) > MAX_GRID_POINTS:
+            raise ValueError(f"Grid is limited to {MAX_GRID_POINTS} points")
+        
+        scores = BatchScoringEngine().score_readiness(
+            monthly_income,
+            monthly_debts - debt_axis[:, None, None],
+            total_savings + savings_axis[None, :, None],
+            credit_axis[None, None, :],
+            income.get("employment_length_months", 0)
+        )["readiness_score"]
+        scores = np.broadcast_to(scores, (len(debt_axis), len(savings_axis), len(credit_axis)))
+        
+        current_index = int(np.searchsorted(credit_axis, current_credit))
+        current_score = self.calculate(user_context)["readiness_score"]
+        thresholds = {}
+        for level, min_score in zip(READINESS_LEVELS[1:], READINESS_LEVEL_LOWER):
+            reached = scores >= min_score
+            plane = reached[:, :, current_index]
+            
+            # Scores never drop as debt falls or savings rise, so the first
+            # reached row in each savings column is that column's minimum
+            frontier = []
+            for j in np.flatnonzero(plane.any(axis=0)):
+                i = int(np.argmax(plane[:, j]))
+                if not frontier or debt_axis[i] < frontier[-1]["debt_reduction"]:
+                    frontier.append({
+                        "added_savings": round(float(savings_axis[j]), 2),
+                        "debt_reduction": round(float(debt_axis[i]), 2)
+                    })
+            
+            thresholds[str(level)] = {
+                "min_score": int(min_score),
+                "already_met": bool(current_score >= min_score),
+                "debt_reduction_only": self._first_reached(debt_axis, plane[:, 0]),
+                "added_savings_only": self._first_reached(savings_axis, plane[0, :]),
+                "credit_score_only": self._first_reached(credit_axis[current_index:], reached[0, 0, current_index:]),
+                "combinations": frontier
+            }
+        
+        return {
+            "current_score": current_score,
+            "axes": {
+                "debt_reduction": np.round(debt_axis, 2).tolist(),
+                "added_savings": np.round(savings_axis, 2).tolist(),
+                "credit_score": credit_axis.astype(int).tolist()
+            },
+            "scores": scores.tolist(),
+            "thresholds": thresholds
+        }
+    
+    @staticmethod
+    def _first_reached(axis: np.ndarray, reached: np.ndarray) -> Optional[float]:
+        """Smallest axis value where the threshold is reached (None if never)."""
+        if not reached.any():
+            return None
+        return round(float(axis[int(np.argmax(reached))]), 2)
+    
     def _generate_recommendations(
         self, 
         dti_score: int, 
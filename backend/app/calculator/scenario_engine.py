@@ -0,0 +1,277 @@
+"""Scenario Engine - Monte Carlo "what-if" projections"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.calculator.batch_scoring import BatchScoringEngine
+
+# Runs with at least this many simulated path-months (scenarios x paths x
+# months) fan out to a process pool. Serial work costs roughly 0.3 us per
+# path-month, so the default plan (4 x 2000 x 24, ~60 ms) stays in-process
+# and only runs of ~0.15 s or more pay for pickling and worker dispatch.
+# benchmarks/scenario_benchmark.py measures the crossover.
+PARALLEL_MIN_WORK = 500_000
+
+DEFAULT_ASSUMPTIONS = {
+    "income_shock_probability": 0.01,  # Chance per month of an income shock
+    "income_shock_months": 3,  # How long a shock lasts
+    "income_shock_severity": (0.10, 0.40),  # Income lost during a shock
+    "mortgage_rate": 0.065,  # Starting 30-year mortgage rate
+    "rate_volatility": 0.0015,  # Monthly std-dev of mortgage rate changes
+    "loan_term_years": 30,
+}
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _worker_count() -> int:
+    return max(1, int(os.getenv("SCENARIO_WORKERS", os.cpu_count() or 2)))
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all engines (created on first use)."""
+    global _process_pool
+    if _process_pool is None:
+        with _process_pool_lock:
+            if _process_pool is None:
+                # Forking a process that runs an event loop and worker threads
+                # can copy a held lock into the child, so workers are spawned
+                _process_pool = ProcessPoolExecutor(
+                    max_workers=_worker_count(),
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return _process_pool
+
+
+def shutdown_process_pool():
+    """Stop the worker processes (a new pool is created on next use)."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
+
+
+def _profile(user_context: Dict[str, Any]) -> Dict[str, Any]:
+    """The few fields a projection needs (keeps worker payloads small)."""
+    income = user_context.get("income", {})
+    savings = user_context.get("savings", {})
+    monthly_gross = income.get("monthly_gross", 0)
+    return {
+        "monthly_gross": monthly_gross,
+        "monthly_net": income.get("monthly_net", monthly_gross * 0.75),
+        "employment_months": income.get("employment_length_months", 0),
+        "savings": savings.get("total", 0),
+        "monthly_savings_rate": savings.get("monthly_savings_rate", 0),
+        "credit_score": user_context.get("credit", {}).get("score", 0),
+        "debts": [
+            {
+                "balance": d.get("balance", 0),
+                "monthly_payment": d.get("monthly_payment", 0),
+                "interest_rate": d.get("interest_rate", 0),
+            }
+            for d in user_context.get("debts", [])
+        ],
+    }
+
+
+def _debt_schedule(debts: List[Dict[str, float]], months: int, extra_payment: float):
+    """
+    Deterministic debt paydown (extra payments go to the highest rate first).
+
+    Returns:
+        (total balance after each month, required payments due each month,
+         cash freed up each month by debts that have been paid off)
+    """
+    balances = np.array([d["balance"] for d in debts], dtype=np.float64)
+    payments = np.array([d["monthly_payment"] for d in debts], dtype=np.float64)
+    rates = np.array([d["interest_rate"] for d in debts], dtype=np.float64) / 100 / 12
+    order = np.argsort(-rates)
+    budget = payments.sum() + extra_payment
+
+    total_balance = np.zeros(months)
+    required = np.zeros(months)
+    freed = np.zeros(months)
+    for month in range(months):
+        active = balances > 0
+        required[month] = payments[active].sum()
+        balances = balances * (1 + rates)
+        paid = np.minimum(payments, balances)
+        balances -= paid
+        extra = extra_payment
+        for i in order:
+            if extra <= 0:
+                break
+            applied = min(extra, balances[i])
+            balances[i] -= applied
+            extra -= applied
+        total_balance[month] = balances.sum()
+        freed[month] = budget - paid.sum() - (extra_payment - extra)
+    return total_balance, required, freed
+
+
+def _percentiles(values: np.ndarray) -> Dict[str, float]:
+    p10, p50, p90 = np.percentile(values, [10, 50, 90])
+    return {"p10": round(float(p10), 2), "p50": round(float(p50), 2), "p90": round(float(p90), 2)}
+
+
+def _simulate(job: tuple) -> Dict[str, Any]:
+    """Run every path for one scenario (top-level so it can run in a worker process)."""
+    profile, scenario, months, n_paths, seed, assumptions = job
+    rng = np.random.default_rng(seed)
+
+    # Income shocks: a shock cuts income by a per-path severity for N months
+    shocks = rng.random((n_paths, months)) < assumptions["income_shock_probability"]
+    started = np.cumsum(shocks, axis=1)
+    duration = assumptions["income_shock_months"]
+    ended = np.concatenate([np.zeros((n_paths, duration)), started[:, :-duration]], axis=1)[:, :months]
+    severity = rng.uniform(*assumptions["income_shock_severity"], size=(n_paths, 1))
+    income_factor = np.where(started - ended > 0, 1 - severity, 1.0)
+    income = profile["monthly_gross"] * income_factor
+
+    debt_balance, debt_payments, freed = _debt_schedule(
+        profile["debts"], months, scenario.get("extra_debt_payment", 0.0)
+    )
+
+    # Savings: planned contributions plus freed-up debt payments, minus lost net income
+    contributions = (
+        profile["monthly_savings_rate"]
+        + scenario.get("additional_savings", 0.0)
+        + freed
+        - profile["monthly_net"] * (1 - income_factor)
+    )
+    savings = np.empty((n_paths, months))
+    balance = np.full(n_paths, float(profile["savings"]))
+    for month in range(months):
+        balance = np.maximum(balance + contributions[:, month], 0.0)
+        savings[:, month] = balance
+
+    payments = np.broadcast_to(debt_payments, (n_paths, months))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dti = np.where(income > 0, payments / income * 100, np.nan)
+
+    readiness = BatchScoringEngine().score_readiness(
+        income.ravel(),
+        payments.ravel(),
+        savings.ravel(),
+        np.full(n_paths * months, profile["credit_score"]),
+        np.broadcast_to(profile["employment_months"] + np.arange(1, months + 1), (n_paths, months)).ravel()
+    )["readiness_score"].reshape(n_paths, months)
+
+    result = {
+        "name": scenario["name"],
+        "strategy": {k: v for k, v in scenario.items() if k != "name"},
+        "final": {
+            "savings": _percentiles(savings[:, -1]),
+            "dti": _percentiles(np.nan_to_num(dti[:, -1], nan=100.0)),
+            "readiness_score": _percentiles(readiness[:, -1]),
+            "total_debt": round(float(debt_balance[-1]), 2),
+        },
+        "probability_readiness_80": round(float((readiness[:, -1] >= 80).mean()), 3),
+        "median_path": {
+            "savings": np.round(np.median(savings, axis=0), 2).tolist(),
+            "dti": np.round(np.nanmedian(dti, axis=0), 2).tolist(),
+            "readiness_score": np.median(readiness, axis=0).tolist(),
+            "total_debt": np.round(debt_balance, 2).tolist(),
+        },
+    }
+
+    home_price = scenario.get("home_price")
+    if home_price:
+        # Mortgage rate follows a random walk; affordability uses the same rules
+        # as AffordabilityCalculator (20% down, 43% DTI, 28% front-end)
+        steps = rng.normal(0, assumptions["rate_volatility"], (n_paths, months))
+        rate = np.clip(assumptions["mortgage_rate"] + np.cumsum(steps, axis=1), 0.005, None) / 12
+        growth = (1 + rate) ** (assumptions["loan_term_years"] * 12)
+        housing = home_price * 0.80 * rate * growth / (growth - 1) + home_price * 0.012 / 12
+        with np.errstate(divide="ignore", invalid="ignore"):
+            affordable = (
+                (income > 0)
+                & ((housing + payments) / income * 100 <= 43.0)
+                & (housing / income * 100 <= 28.0)
+                & (savings >= home_price * 0.20)
+            )
+        by_month = affordable.mean(axis=0)
+        reached = np.flatnonzero(by_month >= 0.5)
+        result["home_price"] = home_price
+        result["probability_affordable"] = round(float(by_month[-1]), 3)
+        result["likely_affordable_month"] = int(reached[0]) + 1 if len(reached) else None
+
+    return result
+
+
+class ScenarioEngine:
+    """
+    Projects savings, debt, DTI and readiness month by month for several
+    strategies, across thousands of randomized paths (income shocks and
+    mortgage rate changes) held as NumPy arrays.
+    NO LLM, NO HALLUCINATION - Deterministic given a seed.
+    """
+
+    def __init__(
+        self,
+        n_paths: int = 2000,
+        parallel_min_work: int = PARALLEL_MIN_WORK,
+        assumptions: Optional[Dict[str, Any]] = None
+    ):
+        self.n_paths = n_paths
+        self.parallel_min_work = parallel_min_work
+        self.assumptions = {**DEFAULT_ASSUMPTIONS, **(assumptions or {})}
+
+    def _use_process_pool(self, n_jobs: int, months: int) -> bool:
+        """Fan out only when there is enough work to spread over several workers."""
+        return (
+            n_jobs > 1
+            and n_jobs * self.n_paths * months >= self.parallel_min_work
+            and _worker_count() > 1
+        )
+
+    def run(
+        self,
+        user_context: Dict[str, Any],
+        scenarios: List[Dict[str, Any]],
+        months: int = 24,
+        seed: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Run every scenario and summarize the outcomes.
+
+        Args:
+            user_context: User financial data
+            scenarios: Strategies, each with a "name" and any of
+                extra_debt_payment, additional_savings, home_price
+            months: Projection horizon
+            seed: Seed for reproducible paths
+
+        Returns:
+            Dictionary with per-scenario percentiles, median paths and the best scenario
+        """
+        profile = _profile(user_context)
+        if profile["monthly_gross"] == 0:
+            return {"error": "Monthly income is required for scenario planning", "scenarios": []}
+
+        months = max(1, months)
+        seeds = np.random.SeedSequence(seed).spawn(len(scenarios))
+        jobs = [
+            (profile, scenario, months, self.n_paths, child, self.assumptions)
+            for scenario, child in zip(scenarios, seeds)
+        ]
+        if self._use_process_pool(len(jobs), months):
+            results = list(_get_process_pool().map(_simulate, jobs))
+        else:
+            results = [_simulate(job) for job in jobs]
+
+        best = max(results, key=lambda r: r["final"]["readiness_score"]["p50"], default=None)
+        return {
+            "horizon_months": months,
+            "paths": self.n_paths,
+            "assumptions": {k: v for k, v in self.assumptions.items()},
+            "scenarios": results,
+            "best_scenario": best["name"] if best else None,
+        }
@@ -1,8 +1,9 @@
 """Transaction Analyzer - Deterministic Truth Layer for Spending Analysis"""
 
-from typing import Dict, Any, List
-from datetime import datetime, timedelta
-from collections import defaultdict
+from typing import Dict, Any, List, Optional
+
+from app.calculator.transaction_ledger import TransactionLedger
+from app.calculator.transaction_store import TransactionColumns, WindowTotals
 
 
 class TransactionAnalyzer:
@@ -22,13 +23,23 @@ class TransactionAnalyzer:
         "rent": 0.30,  # 30% of income (housing)
     }
     
-    def analyze(self, user_context: Dict[str, Any], months: int = 3) -> Dict[str, Any]:
+    def analyze(
+        self,
+        user_context: Dict[str, Any],
+        months: int = 3,
+        columns: Optional[TransactionColumns] = None,
+        ledger: Optional[TransactionLedger] = None
+    ) -> Dict[str, Any]:
         """
         Analyze transactions for overspending and peer comparison.
         
         Args:
             user_context: User financial data including transactions
             months: Number of months to analyze (default: 3)
+            columns: Pre-built columnar view of the user's transactions
+                (built from user_context when not provided)
+            ledger: Rolling aggregates for the user; when given, the window
+                is summed from its buckets instead of scanning transactions
             
         Returns:
             Dictionary with spending analysis, overspending alerts, and peer benchmarks
@@ -42,40 +53,31 @@ class TransactionAnalyzer:
                 "analysis": None
             }
         
-        # Find the most recent transaction date to use as reference point
-        # This handles mock data that may have historical dates
-        transaction_dates = [datetime.strptime(t["date"], "%Y-%m-%d") for t in transactions]
-        if not transaction_dates:
-            return {
-                "error": "No valid transaction dates found",
-                "analysis": None
-            }
-        most_recent_date = max(transaction_dates)
-        
-        # Filter transactions for the last N months from the most recent transaction
-        cutoff_date = most_recent_date - timedelta(days=months * 30)
-        recent_transactions = [
-            t for t in transactions
-            if datetime.strptime(t["date"], "%Y-%m-%d") >= cutoff_date
-        ]
-        
-        # Separate income and expenses
-        expenses = [t for t in recent_transactions if t["amount"] < 0]
-        income_transactions = [t for t in recent_transactions if t["amount"] > 0]
+        source = ledger if ledger is not None else columns
+        if source is None:
+            source = TransactionColumns.from_records(transactions)
         
+        # Window is anchored on the most recent transaction date, which
+        # handles mock data that may have historical dates
+        totals = source.window_totals(months * 30)
+        return self._build_result(totals, months, monthly_income)
+    
+    def _build_result(self, totals: WindowTotals, months: int, monthly_income: float) -> Dict[str, Any]:
+        """
+        Turn window aggregates into the analysis result.
+
+        Totals arrive as exact integer cents rather than a running float sum
+        over the transactions. A derived figure that lands on a half cent
+        (e.g. a variance of 415.345) can therefore round one cent away from
+        what float accumulation gave; this is accepted so that the columns
+        and the ledger always agree.
+        """
         # Calculate total income for the period
-        total_income = sum(t["amount"] for t in income_transactions)
+        total_income = totals.income_cents / 100
         avg_monthly_income = total_income / months if months > 0 else monthly_income
         
-        # Group expenses by category
-        category_spending = defaultdict(float)
-        category_counts = defaultdict(int)
-        
-        for expense in expenses:
-            category = expense.get("category", "other")
-            amount = abs(expense["amount"])
-            category_spending[category] += amount
-            category_counts[category] += 1
+        # Expenses grouped by category
+        category_spending = {category: cents / 100 for category, cents, _ in totals.categories}
         
         # Calculate monthly averages
         monthly_spending_by_category = {
@@ -139,7 +141,7 @@ class TransactionAnalyzer:
         
         return {
             "analysis_period_months": months,
-            "total_transactions_analyzed": len(recent_transactions),
+            "total_transactions_analyzed": totals.transaction_count,
             "average_monthly_income": round(avg_monthly_income, 2),
             "total_monthly_spending": round(total_monthly_spending, 2),
             "monthly_savings": round(avg_monthly_income - total_monthly_spending, 2),
@@ -0,0 +1,201 @@
+"""Transaction Ledger - Rolling per-category aggregates with incremental ingestion"""
+
+import threading
+from bisect import bisect_left, insort
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.calculator.transaction_store import TransactionColumns, WindowTotals
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+class _Bucket:
+    """Aggregates for one day or one calendar month."""
+
+    __slots__ = ("transaction_count", "income_cents", "categories")
+
+    def __init__(self):
+        self.transaction_count = 0
+        self.income_cents = 0
+        # category -> [expense cents, expense count, first ingestion sequence]
+        self.categories: Dict[str, list] = {}
+
+    def add_expense(self, category: str, cents: int, count: int, sequence: int):
+        slot = self.categories.get(category)
+        if slot is None:
+            self.categories[category] = [cents, count, sequence]
+        else:
+            slot[0] += cents
+            slot[1] += count
+            slot[2] = min(slot[2], sequence)
+
+
+def _month_key(day: int) -> str:
+    """YYYY-MM for a day ordinal (days since 1970-01-01)."""
+    return date.fromordinal(day + EPOCH_ORDINAL).strftime("%Y-%m")
+
+
+class TransactionLedger:
+    """
+    Rolling aggregates for one user's transactions.
+
+    Transactions are folded into per-day buckets as they are ingested, and
+    each day rolls up into a per-month bucket keyed by category. A window
+    query only touches the day buckets inside the window, so its cost is
+    O(days x categories) regardless of how many years of history exist.
+    Day (not month) buckets answer analyze() because its window is N x 30
+    days anchored on the latest transaction, not calendar months.
+    """
+
+    def __init__(self):
+        self._days: Dict[int, _Bucket] = {}
+        self._day_keys: List[int] = []
+        self._months: Dict[str, _Bucket] = {}
+        self._sequence = 0
+        # Ingestion mutates buckets that concurrent queries iterate over
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._sequence
+
+    @classmethod
+    def from_columns(cls, columns: TransactionColumns) -> "TransactionLedger":
+        """Bootstrap a ledger from a columnar view in a few vectorized passes."""
+        ledger = cls()
+        if len(columns) == 0:
+            return ledger
+
+        dates, amounts, codes = columns.dates, columns.amounts, columns.category_codes
+        days, day_index = np.unique(dates, return_inverse=True)
+        counts = np.bincount(day_index, minlength=len(days))
+        income = np.bincount(day_index, weights=np.where(amounts > 0, amounts, 0), minlength=len(days))
+
+        for i, day in enumerate(days.tolist()):
+            bucket = _Bucket()
+            bucket.transaction_count = int(counts[i])
+            bucket.income_cents = int(income[i])
+            ledger._days[day] = bucket
+
+        # One key per (day, category) pair among expenses
+        expense = np.flatnonzero(amounts < 0)
+        size = len(columns.categories)
+        keys = day_index[expense].astype(np.int64) * size + codes[expense]
+        pairs, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        spent = np.bincount(inverse, weights=-amounts[expense], minlength=len(pairs))
+        pair_counts = np.bincount(inverse, minlength=len(pairs))
+        sequences = expense[first]
+
+        for pair, cents, count, sequence in zip(
+            pairs.tolist(), spent.tolist(), pair_counts.tolist(), sequences.tolist()
+        ):
+            day = int(days[pair // size])
+            ledger._days[day].add_expense(columns.categories[pair % size], int(cents), count, sequence)
+
+        ledger._day_keys = days.tolist()
+        ledger._sequence = len(columns)
+        for day, bucket in ledger._days.items():
+            ledger._roll_into_month(day, bucket)
+        return ledger
+
+    def ingest(self, transactions: Iterable[Dict[str, Any]]) -> int:
+        """
+        Append transactions (JSON context format) to the running aggregates.
+
+        Returns:
+            Number of transactions ingested
+        """
+        with self._lock:
+            return self._ingest(transactions)
+
+    def _ingest(self, transactions: Iterable[Dict[str, Any]]) -> int:
+        ingested = 0
+        for transaction in transactions:
+            day = date.fromisoformat(transaction["date"]).toordinal() - EPOCH_ORDINAL
+            cents = int(round(transaction["amount"] * 100))
+            category = transaction.get("category", "other")
+
+            bucket = self._days.get(day)
+            if bucket is None:
+                bucket = self._days[day] = _Bucket()
+                insort(self._day_keys, day)
+            month = self._months.setdefault(_month_key(day), _Bucket())
+
+            for target in (bucket, month):
+                target.transaction_count += 1
+                if cents > 0:
+                    target.income_cents += cents
+                elif cents < 0:
+                    target.add_expense(category, -cents, 1, self._sequence)
+
+            self._sequence += 1
+            ingested += 1
+        return ingested
+
+    def window_totals(self, days: int) -> WindowTotals:
+        """Aggregate the day buckets within `days` of the most recent one."""
+        with self._lock:
+            return self._window_totals(days)
+
+    def _window_totals(self, days: int) -> WindowTotals:
+        if not self._day_keys:
+            return WindowTotals(0, 0, [])
+
+        start = bisect_left(self._day_keys, self._day_keys[-1] - days)
+        transaction_count = 0
+        income_cents = 0
+        merged: Dict[str, list] = {}
+        for day in self._day_keys[start:]:
+            bucket = self._days[day]
+            transaction_count += bucket.transaction_count
+            income_cents += bucket.income_cents
+            for category, (cents, count, sequence) in bucket.categories.items():
+                slot = merged.get(category)
+                if slot is None:
+                    merged[category] = [cents, count, sequence]
+                else:
+                    slot[0] += cents
+                    slot[1] += count
+                    slot[2] = min(slot[2], sequence)
+
+        ordered = sorted(merged.items(), key=lambda item: item[1][2])
+        categories = [(category, cents, count) for category, (cents, count, _) in ordered]
+        return WindowTotals(transaction_count, income_cents, categories)
+
+    def monthly_aggregates(self, months: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Per-month, per-category totals, oldest first.
+
+        Args:
+            months: Only return the most recent N months (default: all)
+        """
+        with self._lock:
+            keys = sorted(self._months)
+            if months is not None:
+                keys = keys[-months:] if months > 0 else []
+            return [
+                {
+                    "month": key,
+                    "transaction_count": self._months[key].transaction_count,
+                    "income": self._months[key].income_cents / 100,
+                    "spending_by_category": {
+                        category: cents / 100
+                        for category, (cents, _, _) in self._months[key].categories.items()
+                    },
+                    "category_counts": {
+                        category: count
+                        for category, (_, count, _) in self._months[key].categories.items()
+                    }
+                }
+                for key in keys
+            ]
+
+    def _roll_into_month(self, day: int, bucket: _Bucket):
+        """Add a day bucket's totals to its calendar-month bucket."""
+        month = self._months.setdefault(_month_key(day), _Bucket())
+        month.transaction_count += bucket.transaction_count
+        month.income_cents += bucket.income_cents
+        for category, (cents, count, sequence) in bucket.categories.items():
+            month.add_expense(category, cents, count, sequence)
@@ -0,0 +1,88 @@
+"""Calculation Cache - Memoized calculator results per user context version"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Set, Tuple
+
+from app.services.metrics import metrics
+from app.services.user_context_repository import user_context_repository
+
+CacheKey = Tuple[str, str, str, str]
+
+
+class CalculationCache:
+    """
+    LRU cache of deterministic calculation results shared by the agent tools
+    and the intent router.
+
+    Entries are keyed by (user_id, context version, calculation, args), so a
+    changed context never serves a stale result; when a user's version moves
+    on, that user's old entries are dropped eagerly. Cached results are
+    shared objects - callers must treat them as read-only.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[CacheKey, Any]" = OrderedDict()
+        self._user_keys: Dict[str, Set[CacheKey]] = {}
+        self._versions: Dict[str, str] = {}
+
+    def get_or_compute(self, user_id: str, name: str, compute: Callable[[Dict[str, Any]], Any], **args) -> Any:
+        """
+        Get a cached result, or compute it from the user's current context.
+
+        Args:
+            user_id: User identifier
+            name: Calculation name (e.g. "dti", "affordability")
+            compute: Called with the user context on a miss
+            **args: Calculation arguments (part of the key)
+        """
+        context, version = user_context_repository.get_with_version(user_id)
+        key = (user_id, version, name, json.dumps(args, sort_keys=True, default=str))
+
+        with self._lock:
+            if self._versions.get(user_id) != version:
+                self._drop_user(user_id)
+                self._versions[user_id] = version
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                metrics.increment("calculation_cache.hits")
+                return self._entries[key]
+
+        metrics.increment("calculation_cache.misses")
+        result = compute(context)
+
+        with self._lock:
+            # Skip storing if the context changed while we computed
+            if self._versions.get(user_id) == version:
+                self._entries[key] = result
+                self._user_keys.setdefault(user_id, set()).add(key)
+                while len(self._entries) > self.max_entries:
+                    evicted, _ = self._entries.popitem(last=False)
+                    self._user_keys.get(evicted[0], set()).discard(evicted)
+            metrics.set_gauge("calculation_cache.entries", len(self._entries))
+        return result
+
+    def invalidate(self, user_id: str = None):
+        """Drop cached results (one user, or everything)."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+                self._user_keys.clear()
+                self._versions.clear()
+            else:
+                self._drop_user(user_id)
+                self._versions.pop(user_id, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _drop_user(self, user_id: str):
+        for key in self._user_keys.pop(user_id, set()):
+            self._entries.pop(key, None)
+
+
+# Global calculation cache instance
+calculation_cache = CalculationCache()
@@ -0,0 +1,67 @@
+"""Calculation Pool - Bounded executor for CPU-bound calculator work"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.services.metrics import metrics
+
+DEFAULT_WORKERS = int(os.getenv("CALCULATION_WORKERS", min(8, os.cpu_count() or 2)))
+
+
+class CalculationPool:
+    """
+    Runs calculator and tool work off the event loop on a fixed number of
+    threads, so one user's spending analysis can't stall every other SSE
+    stream the worker is serving. NumPy releases the GIL for most of its
+    kernels, so the vectorized calculators overlap well on threads.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS):
+        self.max_workers = max(1, max_workers)
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="calculation"
+                    )
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on the pool and await its result."""
+        # Keep context variables (e.g. callback handlers) visible in the worker
+        context = contextvars.copy_context()
+        submitted = time.perf_counter()
+
+        def call():
+            metrics.observe("calculation_pool.wait_seconds", time.perf_counter() - submitted)
+            return context.run(fn, *args, **kwargs)
+
+        metrics.increment("calculation_pool.tasks")
+        future = self._get_executor().submit(call)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Jobs still queued are dropped; a running job can't be interrupted
+            if future.cancel():
+                metrics.increment("calculation_pool.cancelled")
+            raise
+
+    def shutdown(self):
+        """Stop the worker threads (a new pool is created on next use)."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+# Global calculation pool instance
+calculation_pool = CalculationPool()
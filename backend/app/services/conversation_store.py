@@ -0,0 +1,184 @@
+"""Conversation Store - Bounded server-side chat history per user"""
+
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional
+
+DEFAULT_MAX_MESSAGES = 100
+DEFAULT_MAX_USERS = 10000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class _Conversation:
+    """One user's recent messages (ring buffer) and latest calculations."""
+
+    __slots__ = ("messages", "calculations", "message_bytes", "calculation_bytes")
+
+    def __init__(self, max_messages: int):
+        self.messages: Deque[Dict[str, str]] = deque(maxlen=max_messages)
+        self.calculations: Dict[str, Any] = {}
+        self.message_bytes = 0
+        self.calculation_bytes: Dict[str, int] = {}
+
+    @property
+    def size(self) -> int:
+        return self.message_bytes + sum(self.calculation_bytes.values())
+
+
+class ConversationStore:
+    """
+    Process-wide conversation memory behind FinancialMemoryManager.
+
+    Each user gets a fixed-length ring buffer of messages plus their latest
+    calculation per kind. Users are kept in a global LRU bounded both by
+    count and by an approximate byte budget. With a spill path configured
+    (CONVERSATION_SPILL_DB), evicted conversations are written to SQLite
+    and rehydrated on the user's next request instead of being lost.
+    """
+
+    def __init__(
+        self,
+        max_messages: int = DEFAULT_MAX_MESSAGES,
+        max_users: int = DEFAULT_MAX_USERS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        spill_path: Optional[str] = None
+    ):
+        self.max_messages = max_messages
+        self.max_users = max_users
+        self.max_bytes = max_bytes
+        self.spill_path = spill_path
+        self._lock = threading.RLock()
+        self._conversations: "OrderedDict[str, _Conversation]" = OrderedDict()
+        self._bytes = 0
+        self._spill: Optional[sqlite3.Connection] = None
+
+    def get_messages(self, user_id: str, limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """A user's messages, oldest first (the last `limit` if given)."""
+        with self._lock:
+            conversation = self._get(user_id)
+            if conversation is None:
+                return []
+            messages = list(conversation.messages)
+        return messages[-limit:] if limit else messages
+
+    def append(self, user_id: str, role: str, content: str):
+        """Add a message, dropping the user's oldest one when the buffer is full."""
+        with self._lock:
+            conversation = self._get(user_id, create=True)
+            if len(conversation.messages) == conversation.messages.maxlen:
+                dropped = conversation.messages[0]
+                self._resize(conversation, message_delta=-len(dropped["content"]))
+            conversation.messages.append({"role": role, "content": content})
+            self._resize(conversation, message_delta=len(content))
+            self._enforce_limits(keep=user_id)
+
+    def get_calculations(self, user_id: str) -> Dict[str, Any]:
+        """Latest calculation per kind (plus "last") - treat as read-only."""
+        with self._lock:
+            conversation = self._get(user_id)
+            return dict(conversation.calculations) if conversation else {}
+
+    def store_calculation(self, user_id: str, kind: str, result: Dict[str, Any]):
+        """Remember a calculation as the latest of its kind and as "last"."""
+        size = len(json.dumps(result, default=str))
+        with self._lock:
+            conversation = self._get(user_id, create=True)
+            for key in (kind, "last"):
+                previous = conversation.calculation_bytes.get(key, 0)
+                conversation.calculations[key] = result
+                conversation.calculation_bytes[key] = size
+                self._bytes += size - previous
+            self._enforce_limits(keep=user_id)
+
+    def clear(self, user_id: str):
+        """Forget a user's conversation (memory and spill)."""
+        with self._lock:
+            conversation = self._conversations.pop(user_id, None)
+            if conversation is not None:
+                self._bytes -= conversation.size
+            if self.spill_path:
+                self._spill_db().execute("DELETE FROM conversations WHERE user_id = ?", (user_id,))
+                self._spill_db().commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"users": len(self._conversations), "bytes": self._bytes}
+
+    def _get(self, user_id: str, create: bool = False) -> Optional[_Conversation]:
+        conversation = self._conversations.get(user_id)
+        if conversation is not None:
+            self._conversations.move_to_end(user_id)
+            return conversation
+
+        conversation = self._load_spilled(user_id)
+        if conversation is None and create:
+            conversation = _Conversation(self.max_messages)
+        if conversation is not None:
+            self._conversations[user_id] = conversation
+            self._bytes += conversation.size
+        return conversation
+
+    def _resize(self, conversation: _Conversation, message_delta: int):
+        conversation.message_bytes += message_delta
+        self._bytes += message_delta
+
+    def _enforce_limits(self, keep: str):
+        """Evict least recently used users over the count or byte budget."""
+        while len(self._conversations) > 1 and (
+            len(self._conversations) > self.max_users or self._bytes > self.max_bytes
+        ):
+            user_id, conversation = next(iter(self._conversations.items()))
+            if user_id == keep:
+                self._conversations.move_to_end(user_id)
+                user_id, conversation = next(iter(self._conversations.items()))
+            del self._conversations[user_id]
+            self._bytes -= conversation.size
+            if self.spill_path:
+                self._write_spilled(user_id, conversation)
+
+    def _spill_db(self) -> sqlite3.Connection:
+        if self._spill is None:
+            self._spill = sqlite3.connect(self.spill_path, check_same_thread=False)
+            self._spill.execute(
+                "CREATE TABLE IF NOT EXISTS conversations ("
+                "user_id TEXT PRIMARY KEY, messages TEXT NOT NULL, calculations TEXT NOT NULL)"
+            )
+        return self._spill
+
+    def _write_spilled(self, user_id: str, conversation: _Conversation):
+        db = self._spill_db()
+        db.execute(
+            "INSERT OR REPLACE INTO conversations (user_id, messages, calculations) VALUES (?, ?, ?)",
+            (
+                user_id,
+                json.dumps(list(conversation.messages)),
+                json.dumps(conversation.calculations, default=str)
+            )
+        )
+        db.commit()
+
+    def _load_spilled(self, user_id: str) -> Optional[_Conversation]:
+        if not self.spill_path:
+            return None
+        row = self._spill_db().execute(
+            "SELECT messages, calculations FROM conversations WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        conversation = _Conversation(self.max_messages)
+        for message in json.loads(row[0]):
+            conversation.messages.append(message)
+        conversation.message_bytes = sum(len(m["content"]) for m in conversation.messages)
+        conversation.calculations = json.loads(row[1])
+        conversation.calculation_bytes = {
+            key: len(json.dumps(value)) for key, value in conversation.calculations.items()
+        }
+        return conversation
+
+
+# Global conversation store instance
+conversation_store = ConversationStore(spill_path=os.getenv("CONVERSATION_SPILL_DB") or None)
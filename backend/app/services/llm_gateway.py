@@ -0,0 +1,198 @@
+"""LLM Gateway - Admission control for outbound model calls"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional
+
+from app.services.metrics import metrics
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+DEFAULT_MAX_CONCURRENT = int(os.getenv("LLM_MAX_CONCURRENT", "16"))
+DEFAULT_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "64"))
+DEFAULT_MAX_WAIT_SECONDS = float(os.getenv("LLM_MAX_WAIT_SECONDS", "10"))
+
+# Background work may never take every slot away from interactive chat
+DEFAULT_ENDPOINT_LIMITS = {
+    "chat": DEFAULT_MAX_CONCURRENT,
+    "coach_chat": max(1, DEFAULT_MAX_CONCURRENT // 2),
+    "personalized_questions": max(1, DEFAULT_MAX_CONCURRENT // 4),
+}
+
+
+class GatewayRejected(Exception):
+    """The call was shed instead of queued (queue full, or it would miss its deadline)."""
+
+    def __init__(self, endpoint: str, reason: str, retry_after: float):
+        super().__init__(f"The coach is busy right now ({reason}). Please try again shortly.")
+        self.endpoint = endpoint
+        self.reason = reason
+        self.retry_after = max(1, round(retry_after))
+
+
+class Ticket(NamedTuple):
+    endpoint: str
+    admitted_at: float
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "endpoint", "future", "enqueued_at")
+
+    def __init__(self, priority: int, seq: int, endpoint: str, future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.endpoint = endpoint
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class LLMGateway:
+    """
+    Bounds concurrent model calls across the process.
+
+    A call needs a free global slot and a free slot for its endpoint.
+    Otherwise it waits in a bounded queue ordered by priority (interactive
+    chat before background question generation), then arrival. Calls are
+    shed up front when the queue is full or the expected wait already
+    exceeds their deadline, and on timeout while queued, so under a spike
+    some requests fail fast instead of every request slowing down.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+        endpoint_limits: Optional[Dict[str, int]] = None,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        max_wait_seconds: float = DEFAULT_MAX_WAIT_SECONDS
+    ):
+        self.max_concurrent = max_concurrent
+        self.endpoint_limits = dict(DEFAULT_ENDPOINT_LIMITS if endpoint_limits is None else endpoint_limits)
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self._in_flight = 0
+        self._endpoint_in_flight: Dict[str, int] = {}
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        # Moving average of how long a call holds its slot, for wait estimates
+        self._hold_seconds = 2.0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def acquire(
+        self,
+        endpoint: str,
+        priority: int = PRIORITY_INTERACTIVE,
+        max_wait: Optional[float] = None
+    ) -> Ticket:
+        """Wait for a slot. Raises GatewayRejected if the call is shed."""
+        max_wait = self.max_wait_seconds if max_wait is None else max_wait
+        # Waiters are only ever queued while they can't be admitted (release
+        # hands slots out immediately), so a free slot here jumps no one
+        if self._has_capacity(endpoint):
+            return self._admit(endpoint, 0.0)
+
+        expected = self._expected_wait(priority)
+        if expected > max_wait:
+            raise self._shed(endpoint, "deadline", expected)
+        if len(self._waiters) >= self.max_queue:
+            # A full queue makes room for interactive calls by dropping background ones
+            victim = max(self._waiters)
+            if victim.priority <= priority:
+                raise self._shed(endpoint, "queue_full", expected)
+            self._remove(victim)
+            victim.future.set_exception(self._shed(victim.endpoint, "displaced", expected))
+
+        waiter = _Waiter(priority, next(self._seq), endpoint, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, waiter)
+        self._record_depth()
+        try:
+            return await asyncio.wait_for(waiter.future, timeout=max_wait)
+        except asyncio.TimeoutError:
+            self._remove(waiter)
+            raise self._shed(endpoint, "timeout", self._expected_wait(priority))
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled() and waiter.future.exception() is None:
+                # Granted a slot just as the caller went away
+                self.release(waiter.future.result())
+            else:
+                self._remove(waiter)
+            raise
+
+    def release(self, ticket: Ticket):
+        """Return a slot and hand it to the best eligible waiter."""
+        held = time.monotonic() - ticket.admitted_at
+        self._hold_seconds = 0.9 * self._hold_seconds + 0.1 * held
+        self._in_flight -= 1
+        self._endpoint_in_flight[ticket.endpoint] -= 1
+
+        for waiter in sorted(self._waiters):
+            if self._in_flight >= self.max_concurrent:
+                break
+            if not waiter.future.done() and self._has_capacity(waiter.endpoint):
+                self._remove(waiter)
+                waiter.future.set_result(
+                    self._admit(waiter.endpoint, time.monotonic() - waiter.enqueued_at)
+                )
+        self._record_depth()
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        endpoint: str,
+        priority: int = PRIORITY_INTERACTIVE,
+        max_wait: Optional[float] = None
+    ) -> AsyncIterator[Ticket]:
+        ticket = await self.acquire(endpoint, priority, max_wait)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def _has_capacity(self, endpoint: str) -> bool:
+        limit = self.endpoint_limits.get(endpoint, self.max_concurrent)
+        return self._in_flight < self.max_concurrent and self._endpoint_in_flight.get(endpoint, 0) < limit
+
+    def _admit(self, endpoint: str, waited: float) -> Ticket:
+        self._in_flight += 1
+        self._endpoint_in_flight[endpoint] = self._endpoint_in_flight.get(endpoint, 0) + 1
+        metrics.increment(f"llm_gateway.{endpoint}.admitted")
+        metrics.observe("llm_gateway.wait_seconds", waited)
+        metrics.observe(f"llm_gateway.{endpoint}.wait_seconds", waited)
+        metrics.set_gauge("llm_gateway.in_flight", self._in_flight)
+        return Ticket(endpoint, time.monotonic())
+
+    def _expected_wait(self, priority: int) -> float:
+        ahead = sum(1 for waiter in self._waiters if waiter.priority <= priority)
+        return (ahead + 1) / self.max_concurrent * self._hold_seconds
+
+    def _remove(self, waiter: _Waiter):
+        if waiter in self._waiters:
+            self._waiters.remove(waiter)
+            heapq.heapify(self._waiters)
+        self._record_depth()
+
+    def _shed(self, endpoint: str, reason: str, retry_after: float) -> GatewayRejected:
+        metrics.increment(f"llm_gateway.{endpoint}.shed")
+        metrics.increment(f"llm_gateway.shed.{reason}")
+        return GatewayRejected(endpoint, reason, retry_after)
+
+    def _record_depth(self):
+        metrics.set_gauge("llm_gateway.queue_depth", len(self._waiters))
+
+
+# Global LLM gateway instance
+llm_gateway = LLMGateway()
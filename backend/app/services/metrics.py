@@ -0,0 +1,109 @@
+"""Metrics Registry - In-process counters and timings"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict
+
+
+class _Timing:
+    """Running totals plus a bounded window of recent samples for percentiles."""
+
+    __slots__ = ("count", "total", "min", "max", "recent")
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        ordered = sorted(self.recent)
+
+        def percentile(p: float) -> float:
+            return ordered[min(int(p * len(ordered)), len(ordered) - 1)] if ordered else 0.0
+
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "p50": percentile(0.50),
+            "p95": percentile(0.95),
+            "p99": percentile(0.99),
+        }
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters, gauges and timings, exposed at /api/metrics.
+
+    Timings are in seconds; percentiles cover the most recent samples only.
+    """
+
+    def __init__(self, window: int = 1024):
+        self.window = window
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._timings: Dict[str, _Timing] = {}
+
+    def increment(self, name: str, value: float = 1):
+        """Add to a counter."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float):
+        """Record the current value of something (e.g. a queue depth)."""
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float):
+        """Record one timing sample (seconds)."""
+        with self._lock:
+            timing = self._timings.get(name)
+            if timing is None:
+                timing = self._timings[name] = _Timing(self.window)
+            timing.observe(value)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Time the enclosed block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def get_counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All metrics as plain JSON-serializable dicts."""
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "timings": {name: timing.snapshot() for name, timing in self._timings.items()},
+            }
+
+    def reset(self):
+        """Clear everything (used by tests)."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timings.clear()
+
+
+# Global metrics registry instance
+metrics = MetricsRegistry()
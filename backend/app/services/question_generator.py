@@ -1,31 +1,24 @@
 """Service to generate personalized onboarding questions using LLM"""
 
-import os
 import json
 from typing import Dict, Any, List
-from langchain_openai import ChatOpenAI
-from pathlib import Path
 
+from app.agent.agent_pool import agent_pool
+from app.services.llm_gateway import PRIORITY_BACKGROUND, GatewayRejected, llm_gateway
+from app.services.single_flight import SingleFlight, request_key
+from app.services.user_context_repository import user_context_repository
 
-def _load_user_context(user_id: str) -> Dict[str, Any]:
-    """Load user context from JSON file."""
-    try:
-        data_path = Path(__file__).parent.parent / "data" / "mock_user_context.json"
-        with open(data_path, "r") as f:
-            data = json.load(f)
-            return data.get(user_id, data.get("user_001", {}))
-    except FileNotFoundError:
-        return {
-            "income": {"monthly_gross": 0},
-            "debts": [],
-            "savings": {"total": 0}
-        }
+# Global in-flight question generation calls
+question_flights = SingleFlight("personalized_questions")
 
 
 async def generate_personalized_questions(user_id: str, existing_goals: List[Dict[str, Any]] = None) -> List[str]:
     """
     Generate personalized onboarding questions based on user's financial context.
     
+    Identical requests in flight at the same time (several tabs, a
+    re-mounted component) share a single model call.
+    
     Args:
         user_id: User identifier
         existing_goals: List of existing goals (if any)
@@ -33,7 +26,18 @@ async def generate_personalized_questions(user_id: str, existing_goals: List[Dic
     Returns:
         List of personalized question strings
     """
-    user_context = _load_user_context(user_id)
+    # The prompt only depends on the context and the set of goal types
+    _, version = user_context_repository.get_with_version(user_id)
+    goal_types = sorted(str(g.get("type")) for g in existing_goals or [])
+    questions = await question_flights.do(
+        request_key(user_id, version, goal_types),
+        lambda: _generate_questions(user_id, existing_goals)
+    )
+    return list(questions)
+
+
+async def _generate_questions(user_id: str, existing_goals: List[Dict[str, Any]] = None) -> List[str]:
+    user_context = user_context_repository.get(user_id)
     
     # Get user financial snapshot
     monthly_income = user_context.get("income", {}).get("monthly_gross", 0)
@@ -45,11 +49,7 @@ async def generate_personalized_questions(user_id: str, existing_goals: List[Dic
     # Determine existing goal types
     existing_goal_types = [g.get("type") for g in (existing_goals or [])] if existing_goals else []
     
-    llm = ChatOpenAI(
-        model="gpt-4o",
-        temperature=0.7,
-        api_key=os.getenv("OPENAI_API_KEY")
-    )
+    llm = agent_pool.get_llm(temperature=0.7, streaming=False)
     
     prompt = f"""You are a Financial Coach helping users prepare for homeownership and achieve their financial goals.
 
@@ -100,7 +100,9 @@ Questions should be:
 """
 
     try:
-        response = await llm.ainvoke(prompt)
+        # Background work: waits behind interactive chat and is shed first
+        async with llm_gateway.slot("personalized_questions", priority=PRIORITY_BACKGROUND):
+            response = await llm.ainvoke(prompt)
         content = response.content.strip()
         
         # Try to parse as JSON
@@ -124,6 +126,10 @@ Questions should be:
         
         return questions[:6] if questions else _get_fallback_questions(user_context, existing_goal_types)
     
+    except GatewayRejected:
+        # Shed under load: the endpoint answers 429 rather than hiding it
+        raise
+    
     except Exception as e:
         print(f"Error generating questions: {e}")
         return _get_fallback_questions(user_context, existing_goal_types)
@@ -0,0 +1,122 @@
+"""Response Cache - Replayable answers for repeated questions"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from app.services.metrics import metrics
+from app.services.user_context_repository import user_context_repository
+
+_NUMBER = re.compile(r"(?<![\w.])\$?\s?(\d[\d,]*(?:\.\d+)?)(?:\s?(k|m|thousand|million)\b)?")
+_UNITS = {None: 1, "k": 1000, "thousand": 1000, "m": 1000000, "million": 1000000}
+
+
+def _canonical_number(match: "re.Match") -> str:
+    value = float(match.group(1).replace(",", "")) * _UNITS[match.group(2)]
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+def normalize_question(message: str) -> str:
+    """
+    Canonical form of a question for cache keys.
+
+    Case, punctuation and whitespace are ignored and numbers are written
+    out, so "Can I afford a $400k home?" and "can i afford a 400,000 home"
+    share a key.
+    """
+    text = message.lower().replace("’", "'")
+    text = _NUMBER.sub(_canonical_number, text)
+    text = re.sub(r"[^\w\s.]", " ", text)
+    # Keep decimal points, drop sentence periods
+    text = re.sub(r"(?<!\d)\.|\.(?!\d)", " ", text)
+    return " ".join(text.split())
+
+
+class CachedResponse(NamedTuple):
+    text: str
+    calculations: List[Tuple[str, Dict[str, Any]]]  # (kind, result) in emission order
+
+
+ResponseKey = Tuple[str, str, str, str]
+
+
+class ResponseCache:
+    """
+    TTL + LRU cache of complete agent answers.
+
+    Keyed by (user_id, context version, prompt version, normalized
+    question), so an answer is only replayed while the user's numbers and
+    the system prompt are unchanged. Only first questions are cached -
+    with conversation history the same words can mean something else.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 900, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[ResponseKey, Tuple[float, CachedResponse]]" = OrderedDict()
+
+    def lookup(
+        self,
+        endpoint: str,
+        user_id: str,
+        message: str,
+        prompt_version: str,
+        has_history: bool
+    ) -> Tuple[Optional[ResponseKey], Optional[CachedResponse]]:
+        """
+        Find a cached answer for this question.
+
+        Returns (key, response). The key is None when caching is bypassed,
+        and the response is None on a miss (store the answer under the key).
+        """
+        if has_history:
+            metrics.increment(f"response_cache.{endpoint}.bypassed")
+            return None, None
+
+        _, version = user_context_repository.get_with_version(user_id)
+        key = (user_id, version, prompt_version, normalize_question(message))
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        self._record(endpoint, hit=entry is not None)
+        return key, entry[1] if entry is not None else None
+
+    def put(self, key: ResponseKey, response: CachedResponse):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl_seconds, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            metrics.set_gauge("response_cache.entries", len(self._entries))
+
+    def invalidate(self, user_id: str = None):
+        """Drop cached answers (one user, or everything)."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == user_id]:
+                    del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _record(self, endpoint: str, hit: bool):
+        prefix = f"response_cache.{endpoint}"
+        metrics.increment(f"{prefix}.hits" if hit else f"{prefix}.misses")
+        hits = metrics.get_counter(f"{prefix}.hits")
+        metrics.set_gauge(f"{prefix}.hit_rate", hits / (hits + metrics.get_counter(f"{prefix}.misses")))
+
+
+# Global response cache instance
+response_cache = ResponseCache()
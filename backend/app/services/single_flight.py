@@ -0,0 +1,63 @@
+"""Single Flight - Coalesce identical concurrent requests into one call"""
+
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+from app.services.metrics import metrics
+
+T = TypeVar("T")
+
+
+def request_key(*parts: Any) -> str:
+    """Stable key for request arguments (dict order and JSON types normalized)."""
+    return json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time; concurrent callers with the
+    same key await the same result (or exception) instead of repeating the
+    work. Once the call finishes the key is free again - results are not
+    cached. The shared call is cancelled only when every caller has gone.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            metrics.increment(f"single_flight.{self.name}.calls")
+        else:
+            metrics.increment(f"single_flight.{self.name}.shared")
+
+        flight.waiters += 1
+        try:
+            # Shielded so one caller going away doesn't cancel the others' result
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def _forget(self, key: Hashable, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
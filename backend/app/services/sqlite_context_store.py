@@ -0,0 +1,264 @@
+"""SQLite Context Store - Indexed storage for user financial contexts"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    persona TEXT,
+    name TEXT,
+    version INTEGER NOT NULL DEFAULT 1,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS income (
+    user_id TEXT PRIMARY KEY REFERENCES users(user_id) ON DELETE CASCADE,
+    monthly_gross NUMERIC,
+    monthly_net NUMERIC,
+    annual_gross NUMERIC,
+    employment_status TEXT,
+    employment_length_months INTEGER,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS savings (
+    user_id TEXT PRIMARY KEY REFERENCES users(user_id) ON DELETE CASCADE,
+    checking NUMERIC,
+    savings NUMERIC,
+    total NUMERIC,
+    monthly_savings_rate NUMERIC,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS credit (
+    user_id TEXT PRIMARY KEY REFERENCES users(user_id) ON DELETE CASCADE,
+    score INTEGER,
+    last_updated TEXT,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS debts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    type TEXT,
+    balance NUMERIC,
+    monthly_payment NUMERIC,
+    interest_rate NUMERIC,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_debts_user ON debts(user_id);
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    date TEXT NOT NULL,
+    amount NUMERIC NOT NULL,
+    category TEXT,
+    description TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_user_date ON transactions(user_id, date);
+"""
+
+# Typed columns per section; any other keys round-trip through the "extra" column
+SECTION_COLUMNS = {
+    "income": ["monthly_gross", "monthly_net", "annual_gross", "employment_status", "employment_length_months"],
+    "savings": ["checking", "savings", "total", "monthly_savings_rate"],
+    "credit": ["score", "last_updated"],
+}
+DEBT_COLUMNS = ["type", "balance", "monthly_payment", "interest_rate"]
+TRANSACTION_COLUMNS = ["date", "amount", "category", "description"]
+USER_COLUMNS = ["persona", "name"]
+NESTED_KEYS = set(SECTION_COLUMNS) | {"debts", "transactions"}
+
+
+def _split(record: Dict[str, Any], columns: List[str]) -> List[Any]:
+    """Split a record into typed column values plus a JSON blob of the rest."""
+    values = [record.get(column) for column in columns]
+    extra = {k: v for k, v in record.items() if k not in columns}
+    values.append(json.dumps(extra) if extra else None)
+    return values
+
+
+def _join(row: sqlite3.Row, columns: List[str]) -> Dict[str, Any]:
+    """Rebuild a record from typed columns and the JSON "extra" blob."""
+    record = {column: row[column] for column in columns if row[column] is not None}
+    if row["extra"]:
+        record.update(json.loads(row["extra"]))
+    return record
+
+
+class SQLiteContextStore:
+    """
+    SQLite (WAL) backend for user financial contexts.
+
+    Each section of the JSON context lives in its own table keyed by
+    user_id, so reading one user is a handful of primary-key lookups
+    instead of deserializing every user. Transactions are indexed on
+    (user_id, date) for range scans.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = str(db_path)
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection (sqlite3 connections are not shareable)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def get_version(self, user_id: str) -> Optional[str]:
+        """Get the user's version token, or None if the user doesn't exist."""
+        row = self._connection().execute(
+            "SELECT version FROM users WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return f"db-{row['version']}" if row else None
+
+    def load(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Load a user's full context in the same shape as the JSON file."""
+        conn = self._connection()
+        user = conn.execute("SELECT * FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        if user is None:
+            return None
+
+        context = _join(user, USER_COLUMNS)
+        for section, columns in SECTION_COLUMNS.items():
+            row = conn.execute(f"SELECT * FROM {section} WHERE user_id = ?", (user_id,)).fetchone()
+            if row is not None:
+                context[section] = _join(row, columns)
+
+        context["debts"] = [
+            _join(row, DEBT_COLUMNS)
+            for row in conn.execute("SELECT * FROM debts WHERE user_id = ? ORDER BY id", (user_id,))
+        ]
+        context["transactions"] = [
+            _join(row, TRANSACTION_COLUMNS)
+            for row in conn.execute("SELECT * FROM transactions WHERE user_id = ? ORDER BY id", (user_id,))
+        ]
+        return context
+
+    def get_transactions(
+        self,
+        user_id: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Range scan over a user's transactions.
+
+        Args:
+            user_id: User identifier
+            start_date: Inclusive lower bound (YYYY-MM-DD), optional
+            end_date: Inclusive upper bound (YYYY-MM-DD), optional
+
+        Returns:
+            Transactions ordered by date
+        """
+        query = "SELECT * FROM transactions WHERE user_id = ?"
+        params: List[Any] = [user_id]
+        if start_date:
+            query += " AND date >= ?"
+            params.append(start_date)
+        if end_date:
+            query += " AND date <= ?"
+            params.append(end_date)
+        query += " ORDER BY date, id"
+        return [_join(row, TRANSACTION_COLUMNS) for row in self._connection().execute(query, params)]
+
+    def upsert_user(self, user_id: str, context: Dict[str, Any]):
+        """Insert or fully replace a user's context, bumping its version."""
+        conn = self._connection()
+        with conn:
+            self._write_user(conn, user_id, context)
+
+    def append_transactions(self, user_id: str, transactions: Iterable[Dict[str, Any]]) -> int:
+        """Append transactions to an existing user and bump its version."""
+        conn = self._connection()
+        rows = [[user_id] + _split(t, TRANSACTION_COLUMNS) for t in transactions]
+        with conn:
+            updated = conn.execute(
+                "UPDATE users SET version = version + 1 WHERE user_id = ?", (user_id,)
+            ).rowcount
+            if not updated:
+                raise ValueError(f"User {user_id} not found")
+            conn.executemany(
+                "INSERT INTO transactions (user_id, date, amount, category, description, extra) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def import_json(self, json_path: str) -> int:
+        """
+        Import users from the JSON context format (e.g. mock_user_context.json).
+
+        Returns:
+            Number of users imported
+        """
+        with open(json_path, "r") as f:
+            data = json.load(f)
+
+        conn = self._connection()
+        with conn:
+            for user_id, context in data.items():
+                self._write_user(conn, user_id, context)
+        return len(data)
+
+    def _write_user(self, conn: sqlite3.Connection, user_id: str, context: Dict[str, Any]):
+        """Write one user's rows; caller owns the transaction."""
+        top_level = {k: v for k, v in context.items() if k not in NESTED_KEYS}
+        persona, name, extra = _split(top_level, USER_COLUMNS)
+        conn.execute(
+            "INSERT INTO users (user_id, persona, name, extra) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET persona = excluded.persona, name = excluded.name, "
+            "extra = excluded.extra, version = users.version + 1",
+            (user_id, persona, name, extra)
+        )
+
+        for section, columns in SECTION_COLUMNS.items():
+            conn.execute(f"DELETE FROM {section} WHERE user_id = ?", (user_id,))
+            if section in context:
+                placeholders = ", ".join("?" * (len(columns) + 2))
+                conn.execute(
+                    f"INSERT INTO {section} (user_id, {', '.join(columns)}, extra) VALUES ({placeholders})",
+                    [user_id] + _split(context[section], columns)
+                )
+
+        conn.execute("DELETE FROM debts WHERE user_id = ?", (user_id,))
+        conn.executemany(
+            "INSERT INTO debts (user_id, type, balance, monthly_payment, interest_rate, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [[user_id] + _split(d, DEBT_COLUMNS) for d in context.get("debts", [])]
+        )
+
+        conn.execute("DELETE FROM transactions WHERE user_id = ?", (user_id,))
+        conn.executemany(
+            "INSERT INTO transactions (user_id, date, amount, category, description, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [[user_id] + _split(t, TRANSACTION_COLUMNS) for t in context.get("transactions", [])]
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import user contexts from JSON into SQLite")
+    parser.add_argument("db_path", help="SQLite database to create or update")
+    parser.add_argument(
+        "json_path",
+        nargs="?",
+        default=str(Path(__file__).parent.parent / "data" / "mock_user_context.json"),
+        help="JSON file in the mock_user_context.json format"
+    )
+    args = parser.parse_args()
+
+    count = SQLiteContextStore(args.db_path).import_json(args.json_path)
+    print(f"Imported {count} users into {args.db_path}")
@@ -0,0 +1,151 @@
+"""SSE - Server-sent event encoding with frame coalescing"""
+
+import asyncio
+import json
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+DEFAULT_COALESCE_SECONDS = float(os.getenv("SSE_COALESCE_MS", "20")) / 1000
+DEFAULT_COALESCE_BYTES = int(os.getenv("SSE_COALESCE_BYTES", "512"))
+# Events buffered ahead of a slow client before the source is paused
+DEFAULT_MAX_PENDING = int(os.getenv("SSE_MAX_PENDING_EVENTS", "256"))
+
+DONE = "[DONE]"
+
+# Pre-encoded frame pieces; only the payload is serialized per frame
+_DATA = b"data: "
+_END = b"\n\n"
+_TEXT_OPEN = b'data: {"type":"text","content":'
+_TEXT_CLOSE = b"}\n\n"
+
+Event = Union[Dict[str, Any], str]
+
+_SOURCE_DONE = object()
+_FLUSH_DUE = object()
+
+
+class _Failure:
+    """Carries the source's exception across the queue."""
+
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def dumps(value: Any) -> bytes:
+    """Serialize to compact JSON bytes (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(value, separators=(",", ":"), default=str).encode()
+
+
+def encode_event(event: Event) -> bytes:
+    """
+    One SSE frame. Strings are sent as raw data (e.g. DONE), dicts as JSON,
+    and plain text events reuse the pre-encoded envelope.
+    """
+    if isinstance(event, str):
+        return _DATA + event.encode() + _END
+    if len(event) == 2 and event.get("type") == "text":
+        return _TEXT_OPEN + dumps(event["content"]) + _TEXT_CLOSE
+    return _DATA + dumps(event) + _END
+
+
+def _is_text(event: Event) -> bool:
+    return isinstance(event, dict) and len(event) == 2 and event.get("type") == "text"
+
+
+async def encode_stream(
+    events: AsyncIterator[Event],
+    max_delay: float = DEFAULT_COALESCE_SECONDS,
+    max_bytes: int = DEFAULT_COALESCE_BYTES,
+    max_pending: int = DEFAULT_MAX_PENDING
+) -> AsyncIterator[bytes]:
+    """
+    Encode an event stream as SSE frames, merging consecutive text events.
+
+    Text is held back until it reaches max_bytes (UTF-8 encoded) or the
+    oldest held chunk is max_delay old, so a token stream becomes a few
+    frames per second per client instead of one per word. Any other event flushes held text first,
+    which keeps the event order intact. max_delay=0 disables coalescing.
+    """
+    if max_delay <= 0:
+        async for event in events:
+            yield encode_event(event)
+        return
+
+    loop = asyncio.get_running_loop()
+    # The source runs in its own task so held text can be flushed by a timer
+    # while the source is quiet (e.g. while a tool runs). The queue is
+    # bounded, so a client that reads slowly pauses the source.
+    queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=max_pending)
+    closing = False
+
+    async def pump():
+        try:
+            async for event in events:
+                await queue.put(event)
+        except BaseException as error:
+            # Includes a CancelledError raised by the source itself: the
+            # consumer would otherwise wait on the queue forever. When the
+            # consumer is the one cancelling, nobody is left to tell.
+            if not closing:
+                await queue.put(_Failure(error))
+            if not isinstance(error, Exception):
+                raise
+        else:
+            await queue.put(_SOURCE_DONE)
+
+    def flush_due():
+        # A full queue means events are waiting; the next one flushes
+        # held text itself once the deadline has passed
+        if not queue.full():
+            queue.put_nowait(_FLUSH_DUE)
+
+    source = asyncio.ensure_future(pump())
+    held: List[str] = []
+    held_bytes = 0
+    deadline = 0.0
+    timer: Optional[asyncio.TimerHandle] = None
+
+    try:
+        while True:
+            event = await queue.get()
+            if event is _FLUSH_DUE:
+                timer = None
+                if held:
+                    yield encode_event({"type": "text", "content": "".join(held)})
+                    held, held_bytes = [], 0
+                continue
+
+            if _is_text(event):
+                if not held:
+                    deadline = loop.time() + max_delay
+                    timer = loop.call_later(max_delay, flush_due)
+                held.append(event["content"])
+                held_bytes += len(event["content"].encode())
+                if held_bytes < max_bytes and loop.time() < deadline:
+                    continue
+            if held:
+                yield encode_event({"type": "text", "content": "".join(held)})
+                held, held_bytes = [], 0
+                if timer is not None:
+                    timer.cancel()
+                    timer = None
+            if event is _SOURCE_DONE:
+                break
+            if isinstance(event, _Failure):
+                raise event.error
+            if not _is_text(event):
+                yield encode_event(event)
+    finally:
+        closing = True
+        if timer is not None:
+            timer.cancel()
+        source.cancel()
@@ -0,0 +1,283 @@
+"""User Context Repository - Cached access to user financial contexts"""
+
+import json
+import math
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_DATA_PATH = Path(__file__).parent.parent / "data" / "mock_user_context.json"
+DEFAULT_USER_ID = "user_001"
+# Ledgers hold cents as int64 and sum them as float64 weights (exact below 2**53)
+MAX_TRANSACTION_CENTS = 2 ** 53
+
+
+def _empty_context() -> Dict[str, Any]:
+    """Context returned when no user data is available."""
+    return {
+        "income": {"monthly_gross": 0},
+        "debts": [],
+        "savings": {"total": 0}
+    }
+
+
+def _is_valid_transaction(transaction: Dict[str, Any]) -> bool:
+    """A transaction both the JSON store and the cents-based ledgers can hold."""
+    try:
+        # Only plain YYYY-MM-DD: the stored string is parsed again by
+        # numpy, which misreads "20240120" and rejects "2024-W03-1"
+        value = transaction["date"]
+        amount = transaction["amount"]
+        if date.fromisoformat(value).isoformat() != value:
+            return False
+        if not isinstance(amount, (int, float)) or isinstance(amount, bool):
+            return False
+        if not isinstance(transaction.get("category", "other"), str):
+            return False
+        # NaN/inf (and amounts too large for exact int64 cents) would poison
+        # every later aggregate
+        return math.isfinite(amount) and abs(round(amount * 100)) < MAX_TRANSACTION_CENTS
+    except (KeyError, TypeError, ValueError, OverflowError):
+        return False
+
+class JSONContextBackend:
+    """
+    Backend reading every user from a single JSON file.
+
+    The file is parsed once and only re-read when its mtime or size changes.
+    """
+
+    def __init__(self, data_path: Path = DEFAULT_DATA_PATH):
+        self.data_path = Path(data_path)
+        self._lock = threading.Lock()
+        # (mtime_ns, size) of the parsed file and its users, swapped as one
+        self._snapshot: Optional[Tuple[Tuple[int, int], Dict[str, Any]]] = None
+
+    def get_version(self, user_id: str) -> Optional[str]:
+        """Get the user's version token, or None if the user doesn't exist."""
+        snapshot = self._refresh()
+        if snapshot is None or user_id not in snapshot[1]:
+            return None
+        stamp = snapshot[0]
+        return f"{stamp[0]}-{stamp[1]}"
+
+    def load(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Load a user's context from the parsed file."""
+        snapshot = self._refresh()
+        return snapshot[1].get(user_id) if snapshot else None
+
+    def append_transactions(self, user_id: str, transactions: Iterable[Dict[str, Any]]) -> int:
+        """Append transactions to a user and rewrite the file atomically."""
+        transactions = list(transactions)
+        with self._lock:
+            with open(self.data_path, "r") as f:
+                data = json.load(f)
+            if user_id not in data:
+                raise ValueError(f"User {user_id} not found")
+            data[user_id].setdefault("transactions", []).extend(transactions)
+
+            fd, tmp_path = tempfile.mkstemp(dir=self.data_path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.data_path)
+            self._snapshot = None
+        return len(transactions)
+
+    def invalidate(self):
+        """Drop the parsed file so the next access re-reads it."""
+        with self._lock:
+            self._snapshot = None
+
+    def _refresh(self) -> Optional[Tuple[Tuple[int, int], Dict[str, Any]]]:
+        """Reload the data file if it changed since the last parse."""
+        try:
+            stat = os.stat(self.data_path)
+        except FileNotFoundError:
+            return None
+
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot[0] == stamp:
+            return snapshot
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            snapshot = self._snapshot
+            if snapshot is None or snapshot[0] != stamp:
+                with open(self.data_path, "r") as f:
+                    snapshot = (stamp, json.load(f))
+                self._snapshot = snapshot
+        return snapshot
+
+
+class _CachedUser:
+    """A cached snapshot plus values derived from it (e.g. columnar transactions)."""
+
+    __slots__ = ("version", "context", "derived")
+
+    def __init__(self, version: str, context: Dict[str, Any]):
+        self.version = version
+        self.context = context
+        self.derived: Dict[str, Any] = {}
+
+
+def _default_backend():
+    """SQLite when USER_CONTEXT_DB is set, otherwise the bundled JSON file."""
+    db_path = os.getenv("USER_CONTEXT_DB")
+    if db_path:
+        from app.services.sqlite_context_store import SQLiteContextStore
+        return SQLiteContextStore(db_path)
+    return JSONContextBackend(DEFAULT_DATA_PATH)
+
+
+class UserContextRepository:
+    """
+    Single access point for user financial contexts.
+
+    Per-user snapshots are cached (LRU) together with the backend's version
+    token and only reloaded when that token changes. Snapshots are handed
+    out by reference (no copying), so callers must treat them as read-only.
+    """
+
+    def __init__(self, backend=None, max_cached_users: int = 10000):
+        self._backend = backend
+        self.max_cached_users = max_cached_users
+        self._lock = threading.Lock()
+        self._ingest_lock = threading.Lock()
+        self._cache: "OrderedDict[str, _CachedUser]" = OrderedDict()
+
+    @property
+    def backend(self):
+        """Storage backend (resolved lazily so .env is loaded first)."""
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = _default_backend()
+        return self._backend
+
+    def get(self, user_id: str) -> Dict[str, Any]:
+        """Get a user's financial context (falls back to the default user)."""
+        return self.get_with_version(user_id)[0]
+
+    def get_version(self, user_id: str) -> str:
+        """Get a token that changes whenever the user's context changes."""
+        return self.get_with_version(user_id)[1]
+
+    def get_with_version(self, user_id: str) -> Tuple[Dict[str, Any], str]:
+        """Get a user's context together with its version token."""
+        entry = self._get_entry(user_id)
+        return entry.context, entry.version
+
+    def get_derived(self, user_id: str, name: str, build: Callable[[Dict[str, Any]], Any]) -> Any:
+        """
+        Get a value derived from the user's context, built once per version.
+
+        Args:
+            user_id: User identifier
+            name: Cache slot for the derived value
+            build: Called with the context when the slot is empty or stale
+        """
+        entry = self._get_entry(user_id)
+        value = entry.derived.get(name)
+        if value is None:
+            value = build(entry.context)
+            entry.derived[name] = value
+        return value
+
+    def get_transaction_columns(self, user_id: str):
+        """Get the user's transactions as a TransactionColumns view."""
+        from app.calculator.transaction_store import TransactionColumns
+        return self.get_derived(
+            user_id,
+            "transaction_columns",
+            lambda context: TransactionColumns.from_records(context.get("transactions", []))
+        )
+
+    def get_transaction_ledger(self, user_id: str):
+        """Get rolling per-day/per-month aggregates of the user's transactions."""
+        from app.calculator.transaction_ledger import TransactionLedger
+        return self.get_derived(
+            user_id,
+            "transaction_ledger",
+            lambda context: TransactionLedger.from_columns(self.get_transaction_columns(user_id))
+        )
+
+    def ingest_transactions(self, user_id: str, transactions: List[Dict[str, Any]]) -> str:
+        """
+        Persist new transactions and fold them into the user's ledger.
+
+        The ledger built for the previous version is carried over and
+        updated incrementally instead of being rebuilt from full history.
+
+        Returns:
+            The user's new version token
+
+        Raises:
+            ValueError: If the user doesn't exist or a transaction is malformed
+        """
+        # Everything is checked before anything is written, so a rejected
+        # batch leaves neither the store nor the ledger half-updated
+        for transaction in transactions:
+            if not _is_valid_transaction(transaction):
+                raise ValueError(f"Invalid transaction: {transaction}")
+
+        backend = self.backend
+        with self._ingest_lock:
+            version = backend.get_version(user_id)
+            if version is None:
+                raise ValueError(f"User {user_id} not found")
+
+            with self._lock:
+                previous = self._cache.get(user_id)
+            ledger = None
+            if previous is not None and previous.version == version:
+                ledger = previous.derived.get("transaction_ledger")
+
+            backend.append_transactions(user_id, transactions)
+            entry = self._get_entry(user_id)
+            if ledger is not None:
+                ledger.ingest(transactions)
+                entry.derived["transaction_ledger"] = ledger
+        return entry.version
+
+    def _get_entry(self, user_id: str) -> _CachedUser:
+        """Get the cached entry for a user, reloading it if its version changed."""
+        backend = self.backend
+        version = backend.get_version(user_id)
+        if version is None:
+            user_id = DEFAULT_USER_ID
+            version = backend.get_version(user_id)
+            if version is None:
+                return _CachedUser("missing", _empty_context())
+
+        with self._lock:
+            entry = self._cache.get(user_id)
+            if entry is not None and entry.version == version:
+                self._cache.move_to_end(user_id)
+                return entry
+
+        entry = _CachedUser(version, backend.load(user_id) or {})
+        with self._lock:
+            self._cache[user_id] = entry
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.max_cached_users:
+                self._cache.popitem(last=False)
+        return entry
+
+    def invalidate(self, user_id: Optional[str] = None):
+        """Drop cached snapshots (one user, or everything)."""
+        with self._lock:
+            if user_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(user_id, None)
+        if user_id is None and hasattr(self.backend, "invalidate"):
+            self.backend.invalidate()
+
+
+# Global user context repository instance
+user_context_repository = UserContextRepository()
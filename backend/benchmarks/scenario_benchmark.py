@@ -0,0 +1,83 @@
+"""Scenario Benchmark - In-process vs. process pool scenario projections
+
+Runs the same scenario plans serially and on the warm process pool across
+a range of workloads (scenarios x paths x months) and reports both times,
+the speedup and which path ScenarioEngine picks, so PARALLEL_MIN_WORK can
+be checked against the machine. Worker count follows SCENARIO_WORKERS.
+
+    cd backend && python -m benchmarks.scenario_benchmark --repeat 3
+"""
+
+import argparse
+import json
+import time
+
+from app.calculator import scenario_engine
+from app.calculator.scenario_engine import PARALLEL_MIN_WORK, ScenarioEngine
+from app.services.user_context_repository import DEFAULT_DATA_PATH
+
+# (scenarios, paths, months); the first row is the default plan_scenarios call
+WORKLOADS = [
+    (4, 2000, 24),
+    (6, 2000, 24),
+    (4, 2000, 60),
+    (4, 2000, 120),
+    (8, 2000, 120),
+    (4, 10000, 120),
+]
+
+
+def _scenarios(count: int):
+    return [
+        {"name": f"plan_{i}", "additional_savings": 100.0 * i, "home_price": 350000}
+        for i in range(count)
+    ]
+
+
+def _best_time(engine: ScenarioEngine, context, scenarios, months: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        engine.run(context, scenarios, months=months, seed=0)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user", default="user_001")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(DEFAULT_DATA_PATH) as f:
+        context = json.load(f)[args.user]
+
+    workers = scenario_engine._worker_count()
+    start = time.perf_counter()
+    scenario_engine._get_process_pool().submit(int).result()
+    print(f"{workers} workers, pool start {time.perf_counter() - start:.2f} s, "
+          f"PARALLEL_MIN_WORK {PARALLEL_MIN_WORK:,}")
+
+    try:
+        for n_scenarios, n_paths, months in WORKLOADS:
+            scenarios = _scenarios(n_scenarios)
+            serial = _best_time(
+                ScenarioEngine(n_paths=n_paths, parallel_min_work=float("inf")),
+                context, scenarios, months, args.repeat
+            )
+            pooled = _best_time(
+                ScenarioEngine(n_paths=n_paths, parallel_min_work=0),
+                context, scenarios, months, args.repeat
+            )
+            chosen = "pool" if ScenarioEngine(n_paths=n_paths)._use_process_pool(n_scenarios, months) else "serial"
+            print(
+                f"{n_scenarios:>2} x {n_paths:>5} x {months:>3} = {n_scenarios * n_paths * months:>9,}  "
+                f"serial {serial * 1000:>8.1f} ms  pool {pooled * 1000:>8.1f} ms  "
+                f"speedup {serial / pooled:>5.2f}x  engine uses {chosen}"
+            )
+    finally:
+        scenario_engine.shutdown_process_pool()
+
+
+if __name__ == "__main__":
+    main()
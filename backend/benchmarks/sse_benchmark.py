@@ -0,0 +1,96 @@
+"""SSE Benchmark - Per-word json.dumps frames vs. the coalescing encoder
+
+Simulates many concurrent chat streams of word-sized tokens and reports
+frames, bytes, frames/sec and CPU time per stream for both paths. Each
+stream writes its frames to its own local socket, as the HTTP server
+would, so per-frame send costs are included.
+
+    cd backend && python -m benchmarks.sse_benchmark --streams 200 --tokens 300
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.sse import DONE, encode_stream
+
+
+async def token_events(tokens: int, token_interval: float):
+    yield {"type": "tool_start", "tool": "calculate_dti", "tool_call_id": "call_1"}
+    yield {"type": "calculation", "kind": "dti", "result": {"dti": 12.67, "status": "excellent"}}
+    for i in range(tokens):
+        yield {"type": "text", "content": f"word{i % 50} "}
+        # Give other streams a turn, as real token arrival would
+        await asyncio.sleep(token_interval)
+    yield {"type": "suggestions", "suggestions": ["Create my personalized action plan"]}
+    yield DONE
+
+
+async def old_path(events):
+    """The previous generate(): one json.dumps and one frame per event."""
+    async for event in events:
+        if isinstance(event, str):
+            yield f"data: {event}\n\n"
+        else:
+            yield f"data: {json.dumps(event)}\n\n"
+
+
+async def consume(frames, totals):
+    # Like the server: one transport write per frame on the client's socket
+    reader_sock, writer_sock = socket.socketpair()
+    _, writer = await asyncio.open_connection(sock=writer_sock)
+    drain = asyncio.get_running_loop().run_in_executor(None, _drain, reader_sock)
+    async for frame in frames:
+        data = frame.encode() if isinstance(frame, str) else frame
+        writer.write(data)
+        await writer.drain()
+        totals[0] += 1
+        totals[1] += len(data)
+    writer.close()
+    await writer.wait_closed()
+    await drain
+
+
+def _drain(sock: socket.socket):
+    with sock:
+        while sock.recv(1 << 16):
+            pass
+
+
+async def run(path: str, streams: int, tokens: int, token_interval: float):
+    totals = [0, 0]
+    if path == "old":
+        make = lambda: old_path(token_events(tokens, token_interval))
+    else:
+        make = lambda: encode_stream(token_events(tokens, token_interval))
+
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=streams))
+    wall, cpu = time.perf_counter(), time.process_time()
+    await asyncio.gather(*(consume(make(), totals) for _ in range(streams)))
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+    print(
+        f"{path:>4}: {totals[0]:>9,} frames {totals[1] / 1e6:>8.2f} MB "
+        f"{totals[0] / wall:>11,.0f} frames/s  "
+        f"{cpu * 1e6 / streams:>8,.0f} us CPU/stream  "
+        f"{totals[0] / streams:>6.1f} frames/stream"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=200)
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--token-interval", type=float, default=0.0,
+                        help="seconds between tokens (0 = as fast as possible)")
+    args = parser.parse_args()
+
+    for path in ("old", "new"):
+        asyncio.run(run(path, args.streams, args.tokens, args.token_interval))
+
+
+if __name__ == "__main__":
+    main()
@@ -10,14 +10,28 @@ from fastapi import FastAPI, HTTPException
 from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, Tuple
+import asyncio
 import json
+from contextlib import asynccontextmanager
 
-from app.agent.financial_agent import FinancialAgent
+from app.agent.financial_agent import PROMPT_VERSION, FinancialAgent
+from app.agent.intent_router import intent_router
+from app.agent.memory_manager import FinancialMemoryManager
+from app.calculator.affordability import AffordabilityCalculator
+from app.calculator.scenario_engine import shutdown_process_pool
 from app.services.question_generator import generate_personalized_questions
 from app.models.coach import get_all_coaches, get_coach_by_id, CoachCategory
 from app.services.consent_manager import consent_manager
 from app.services.coach_manager import coach_manager
+from app.services.user_context_repository import user_context_repository
+from app.services.metrics import metrics
+from app.services.calculation_pool import calculation_pool
+from app.services.conversation_store import conversation_store
+from app.services.response_cache import CachedResponse, response_cache
+from app.services.sse import DONE, encode_stream
+from app.services.llm_gateway import GatewayRejected, llm_gateway
+from app.services.single_flight import SingleFlight, request_key
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -27,10 +41,20 @@ load_dotenv(dotenv_path=env_path)
 # Also try loading from current directory as fallback
 load_dotenv()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Stop calculation threads and scenario worker processes
+    calculation_pool.shutdown()
+    shutdown_process_pool()
+
+
 app = FastAPI(
     title="Financial Coach API",
     description="Neuro-Symbolic Financial Coach POC",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # CORS for Next.js frontend
@@ -43,9 +67,21 @@ app.add_middleware(
 )
 
 
+# Global in-flight deterministic calculations (curve sweeps, CSV exports)
+calculation_flights = SingleFlight("calculations")
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+
 class ChatRequest(BaseModel):
     message: str
     user_id: str = "user_001"
+    # Only needed when the server has no history for this user yet; an
+    # empty list starts a new conversation and drops the server's history
     conversation_history: Optional[List[dict]] = None
 
 
@@ -55,6 +91,12 @@ async def root():
     return {"status": "ok", "message": "Financial Coach API is running"}
 
 
+@app.get("/api/metrics")
+async def get_metrics():
+    """In-process counters and timings (agent pool reuse, latencies, cache hits)."""
+    return metrics.snapshot()
+
+
 class PersonalizedQuestionsRequest(BaseModel):
     user_id: str = "user_001"
     existing_goals: Optional[List[dict]] = None
@@ -67,6 +109,11 @@ class ConsentRequestModel(BaseModel):
     user_id: str
 
 
+class TransactionIngestRequest(BaseModel):
+    user_id: str = "user_001"
+    transactions: List[dict]
+
+
 class CoachMessageRequest(BaseModel):
     message: str
     coach_id: str
@@ -83,6 +130,8 @@ async def get_personalized_questions(request: PersonalizedQuestionsRequest):
             existing_goals=request.existing_goals
         )
         return {"questions": questions}
+    except GatewayRejected as e:
+        raise _too_busy(e)
     except Exception as e:
         # Fallback to default questions on error
         return {
@@ -96,12 +145,193 @@ async def get_personalized_questions(request: PersonalizedQuestionsRequest):
         }
 
 
+@app.post("/api/transactions/ingest")
+async def ingest_transactions(request: TransactionIngestRequest):
+    """Append new transactions and update the user's rolling spending aggregates."""
+    try:
+        version = await calculation_pool.run(
+            user_context_repository.ingest_transactions, request.user_id, request.transactions
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    ledger = user_context_repository.get_transaction_ledger(request.user_id)
+    return {
+        "ingested": len(request.transactions),
+        "version": version,
+        "monthly_aggregates": ledger.monthly_aggregates(months=3)
+    }
+
+
+@app.get("/api/affordability/curve")
+async def affordability_curve(
+    user_id: str = "user_001",
+    min_price: float = 100000,
+    max_price: float = 1000000,
+    step: float = 5000,
+    chunk_size: int = 200
+):
+    """
+    Stream an affordability price curve for charting.
+    Returns an SSE stream: one curve_meta frame, then curve_points frames.
+    """
+    user_context, version = user_context_repository.get_with_version(user_id)
+    try:
+        # Identical sweeps requested at the same time are computed once
+        curve = await calculation_flights.do(
+            request_key("affordability_curve", user_id, version, min_price, max_price, step),
+            lambda: calculation_pool.run(
+                AffordabilityCalculator().sweep,
+                user_context, min_price=min_price, max_price=max_price, step=step
+            )
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if "error" in curve:
+        raise HTTPException(status_code=400, detail=curve["error"])
+    
+    chunk_size = max(1, chunk_size)
+    
+    async def generate():
+        meta = {
+            "type": "curve_meta",
+            "points": len(curve["home_prices"]),
+            "max_affordable_home_price": curve["max_affordable_home_price"],
+            "current_savings": curve["current_savings"],
+            "guidelines": curve["guidelines"]
+        }
+        yield f"data: {json.dumps(meta)}\n\n"
+        
+        columns = [
+            curve["home_prices"].tolist(),
+            curve["monthly_payment"].tolist(),
+            curve["dti"].tolist(),
+            curve["front_end_ratio"].tolist(),
+            curve["is_affordable"].tolist()
+        ]
+        for start in range(0, len(columns[0]), chunk_size):
+            points = [
+                {
+                    "home_price": price,
+                    "monthly_payment": payment,
+                    "dti": dti,
+                    "front_end_ratio": front_end,
+                    "is_affordable": affordable
+                }
+                for price, payment, dti, front_end, affordable in zip(
+                    *(column[start:start + chunk_size] for column in columns)
+                )
+            ]
+            yield f"data: {json.dumps({'type': 'curve_points', 'points': points})}\n\n"
+        
+        yield "data: [DONE]\n\n"
+    
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+
+@app.get("/api/amortization")
+async def amortization_page(
+    home_price: float = 400000,
+    start_month: int = 1,
+    end_month: int = 12,
+    extra_principal: float = 0.0
+):
+    """One page of the amortization schedule (20% down) plus payoff summary."""
+    if start_month < 1:
+        raise HTTPException(status_code=400, detail="start_month must be >= 1")
+    if end_month < start_month:
+        raise HTTPException(status_code=400, detail="end_month must be >= start_month")
+    
+    schedule = _amortization_schedule(home_price, extra_principal)
+    # The summary is solved in closed form; only the page's rows are built
+    return {
+        "summary": schedule.summary(),
+        "start_month": start_month,
+        "end_month": end_month,
+        "rows": schedule.page(start_month, end_month)
+    }
+
+
+@app.get("/api/amortization/export")
+async def amortization_export(home_price: float = 400000, extra_principal: float = 0.0):
+    """Full amortization schedule as CSV, built from the vectorized path."""
+    schedule = _amortization_schedule(home_price, extra_principal)
+    arrays = await calculation_flights.do(
+        request_key("amortization_export", home_price, extra_principal),
+        lambda: calculation_pool.run(schedule.to_arrays)
+    )
+    columns = ["month", "payment", "principal", "interest", "extra_principal", "balance"]
+    
+    def generate():
+        yield ",".join(columns) + "\n"
+        rows = zip(*(arrays[column].tolist() for column in columns))
+        yield "".join(
+            f"{month},{payment:.2f},{principal:.2f},{interest:.2f},{extra:.2f},{balance:.2f}\n"
+            for month, payment, principal, interest, extra, balance in rows
+        )
+    
+    return StreamingResponse(
+        generate(),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=amortization.csv"}
+    )
+
+
+def _amortization_schedule(home_price: float, extra_principal: float):
+    """Schedule for a home bought with 20% down; 400 for prices or extras that make no sense."""
+    if home_price <= 0:
+        raise HTTPException(status_code=400, detail="home_price must be positive")
+    try:
+        return AffordabilityCalculator().amortization_schedule(
+            home_price * 0.80, extra_principal=extra_principal
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.post("/api/chat")
 async def chat_endpoint(request: ChatRequest):
     """
     Streaming chat endpoint with contextual conversation support.
-    Returns SSE stream with text chunks for LLM response.
+    Returns SSE stream with LLM tokens as they are generated, and tool_start /
+    tool_end / calculation events while tools run.
     """
+    # The client cleared its conversation (e.g. switched persona)
+    if request.conversation_history == []:
+        FinancialMemoryManager(request.user_id).reset()
+    
+    # Pure calculation questions are answered without a model call
+    routed = intent_router.answer(request.user_id, request.message)
+    _record_fast_path(routed is not None)
+    if routed is not None:
+        return StreamingResponse(
+            encode_stream(_replay_stream(request.user_id, request.message, routed.text, [(routed.kind, routed.result)])),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS
+        )
+    
+    # Repeated first questions against an unchanged profile replay a stored
+    # answer. Any earlier turn - sent by the client or held by the server -
+    # can change what a question means, so those requests bypass the cache
+    # (cache_key is None) and their answers are never stored
+    has_history = bool(request.conversation_history) or bool(
+        conversation_store.get_messages(request.user_id, limit=1)
+    )
+    cache_key, cached = response_cache.lookup(
+        "chat", request.user_id, request.message, PROMPT_VERSION, has_history
+    )
+    if cached is not None:
+        return StreamingResponse(
+            encode_stream(_replay_stream(request.user_id, request.message, cached.text, cached.calculations)),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS
+        )
+    
     if not os.getenv("OPENAI_API_KEY"):
         raise HTTPException(
             status_code=500,
@@ -112,81 +342,116 @@ async def chat_endpoint(request: ChatRequest):
     
     async def generate():
         full_response = ""
+        # Interactive chat queues ahead of background work; when shed, the
+        # stream carries the error since the response has already started
+        try:
+            ticket = await llm_gateway.acquire("chat")
+        except GatewayRejected as e:
+            yield {"type": "error", "content": str(e), "retry_after": e.retry_after}
+            return
         
         try:
-            async for chunk in agent.process_message(
+            async for event in agent.stream_events(
                 user_message=request.message,
                 conversation_history=request.conversation_history
             ):
-                full_response += chunk
-                # Stream text chunks as SSE
-                yield f"data: {json.dumps({'type': 'text', 'content': chunk})}\n\n"
-            
-            # After streaming is complete, send all tool results
-            if hasattr(agent, '_last_tool_results') and agent._last_tool_results:
-                for tool_type, tool_result in agent._last_tool_results:
-                    yield f"data: {json.dumps({'type': 'calculation', 'result': tool_result})}\n\n"
+                if event["type"] == "text":
+                    full_response += event["content"]
+                # Stream text tokens, tool start/end and calculation events as SSE;
+                # each calculation goes out as soon as its tool returns
+                yield event
             
-            # Also check memory for any missed calculations (fallback)
-            # This ensures action plans are always sent even if not in tool_results
-            if agent.memory_manager.last_calculations:
-                # Send action_plan if it exists and wasn't already sent
-                if 'action_plan' in agent.memory_manager.last_calculations:
-                    action_plan = agent.memory_manager.last_calculations.get('action_plan')
-                    if action_plan:
-                        # Check if we already sent it
-                        already_sent = hasattr(agent, '_last_tool_results') and any(
-                            t[0] == 'action_plan' for t in agent._last_tool_results
-                        )
-                        if not already_sent:
-                            yield f"data: {json.dumps({'type': 'calculation', 'result': action_plan})}\n\n"
-                
-                # Also send other calculations that might have been missed
-                for calc_type in ['readiness', 'dti', 'affordability', 'transaction_analysis', 'goal_recommendation']:
-                    if calc_type in agent.memory_manager.last_calculations:
-                        calc_result = agent.memory_manager.last_calculations.get(calc_type)
-                        if calc_result:
-                            already_sent = hasattr(agent, '_last_tool_results') and any(
-                                t[0] == calc_type for t in agent._last_tool_results
-                            )
-                            if not already_sent:
-                                yield f"data: {json.dumps({'type': 'calculation', 'result': calc_result})}\n\n"
+            if cache_key is not None and agent._last_error is None:
+                response_cache.put(cache_key, CachedResponse(full_response, list(agent._last_tool_results)))
             
-            # Generate follow-up suggestions
-            suggestions = _generate_follow_ups(full_response, agent.memory_manager.last_calculations)
+            # Generate follow-up suggestions from this turn's calculations
+            turn_calculations = dict(agent._last_tool_results)
+            if agent._last_tool_results:
+                turn_calculations["last"] = agent._last_tool_results[-1][1]
+            suggestions = _generate_follow_ups(full_response, turn_calculations)
             if suggestions:
-                yield f"data: {json.dumps({'type': 'suggestions', 'suggestions': suggestions})}\n\n"
+                yield {"type": "suggestions", "suggestions": suggestions}
             
-            yield "data: [DONE]\n\n"
+            yield DONE
+        
+        except asyncio.CancelledError:
+            # StreamingResponse cancels the stream when the client disconnects;
+            # stop paying for model tokens and calculations nobody will read
+            metrics.increment("chat.client_disconnects")
+            agent.cancel()
+            raise
         
         except Exception as e:
             error_msg = f"Error processing message: {str(e)}"
-            yield f"data: {json.dumps({'type': 'error', 'content': error_msg})}\n\n"
+            yield {"type": "error", "content": error_msg}
+        
+        finally:
+            llm_gateway.release(ticket)
     
+    # Word-sized tokens are coalesced into fewer, larger frames
     return StreamingResponse(
-        generate(),
+        encode_stream(generate()),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        }
+        headers=SSE_HEADERS
+    )
+
+
+@app.delete("/api/chat/history/{user_id}")
+async def reset_chat_history(user_id: str):
+    """Forget the server-side conversation for a user."""
+    FinancialMemoryManager(user_id).reset()
+    return {"success": True, "message": "Conversation cleared"}
+
+
+def _too_busy(rejected: GatewayRejected) -> HTTPException:
+    """429 for a model call shed by the LLM gateway."""
+    return HTTPException(
+        status_code=429,
+        detail=str(rejected),
+        headers={"Retry-After": str(rejected.retry_after)}
+    )
+
+
+def _record_fast_path(served: bool):
+    """Track the share of chat requests answered without a model call."""
+    metrics.increment("chat.requests")
+    if served:
+        metrics.increment("chat.fast_path_served")
+    metrics.set_gauge(
+        "chat.fast_path_ratio",
+        metrics.get_counter("chat.fast_path_served") / metrics.get_counter("chat.requests")
     )
 
 
+async def _replay_stream(user_id: str, message: str, text: str, calculations: List[Tuple[str, dict]]):
+    """Events for an answer produced without the agent: narration, calculations, suggestions."""
+    # Keep these turns in the conversation so later agent turns can refer to them
+    conversation_store.append(user_id, "user", message)
+    conversation_store.append(user_id, "assistant", text)
+    for kind, result in calculations:
+        conversation_store.store_calculation(user_id, kind, result)
+    
+    yield {"type": "text", "content": text}
+    for kind, result in calculations:
+        yield {"type": "calculation", "kind": kind, "result": result}
+    
+    turn_calculations = dict(calculations)
+    if calculations:
+        turn_calculations["last"] = calculations[-1][1]
+    suggestions = _generate_follow_ups(text, turn_calculations)
+    if suggestions:
+        yield {"type": "suggestions", "suggestions": suggestions}
+    
+    yield DONE
+
+
 def _generate_follow_ups(response: str, calculations: dict) -> List[str]:
     """Generate contextual follow-up suggestions based on response."""
     suggestions = []
     
-    # Check all calculations, not just last
-    has_action_plan = False
-    action_plan = None
-    
-    for calc_type, calc_data in calculations.items():
-        if calc_type == 'action_plan' or (isinstance(calc_data, dict) and ('goal' in calc_data or 'priority_actions' in calc_data)):
-            has_action_plan = True
-            action_plan = calc_data if isinstance(calc_data, dict) else None
-            break
+    # Calculations are keyed by their tool's kind tag
+    action_plan = calculations.get('action_plan')
+    has_action_plan = isinstance(action_plan, dict)
     
     # If action plan exists, suggest questions about the plan
     if has_action_plan and action_plan:
@@ -245,7 +510,7 @@ def _generate_follow_ups(response: str, calculations: dict) -> List[str]:
                     suggestions.append("What should I focus on to improve further?")
             
             # Always suggest creating a plan if user hasn't asked for one yet
-            if 'action_plan' not in str(last_calc) and 'goal' not in str(last_calc):
+            if 'goal_recommendation' not in calculations:
                 suggestions.append("Create my personalized action plan")
     
     return suggestions[:3]  # Limit to 3 suggestions
@@ -329,8 +594,7 @@ async def coach_chat(coach_id: str, request: CoachMessageRequest):
         )
     
     # Load user context
-    from app.agent.tools import _load_user_context
-    user_context = _load_user_context(request.user_id)
+    user_context = user_context_repository.get(request.user_id)
     
     # Get shared data based on consent
     shared_data = consent_manager.get_shared_data(
@@ -347,11 +611,12 @@ async def coach_chat(coach_id: str, request: CoachMessageRequest):
     
     # Process message with coach
     try:
-        response = await coach_instance.process_message(
-            message=request.message,
-            shared_data=shared_data,
-            conversation_history=request.conversation_history
-        )
+        async with llm_gateway.slot("coach_chat"):
+            response = await coach_instance.process_message(
+                message=request.message,
+                shared_data=shared_data,
+                conversation_history=request.conversation_history
+            )
         
         # Parse response for structured data (richContent, suggestions)
         import json
@@ -370,6 +635,8 @@ async def coach_chat(coach_id: str, request: CoachMessageRequest):
             pass
         
         return parsed_response
+    except GatewayRejected as e:
+        raise _too_busy(e)
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -0,0 +1,60 @@
+"""Shared fixtures: a scripted chat model that stands in for the LLM"""
+
+import asyncio
+import json
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class ScriptedModel(BaseChatModel):
+    """Chat model replaying canned responses, streaming text word by word."""
+
+    responses: list
+    prompts: list = []
+
+    @property
+    def _llm_type(self):
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.prompts.append(messages)
+        return ChatResult(generations=[ChatGeneration(message=self.responses.pop(0))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.prompts.append(messages)
+        message = self.responses.pop(0)
+        words = message.content.split(" ") if message.content else []
+        for i, word in enumerate(words):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + (" " if i < len(words) - 1 else "")))
+        if message.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+                for i, call in enumerate(message.tool_calls)
+            ]))
+
+
+class StalledModel(ScriptedModel):
+    """Streams one token, then waits (like a slow provider) until cancelled."""
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        yield ChatGenerationChunk(message=AIMessageChunk(content="Thinking"))
+        await asyncio.sleep(30)
+
+
+@pytest.fixture
+def scripted_model():
+    """Factory for a ScriptedModel that replays the given responses in order."""
+    def make(*responses):
+        return ScriptedModel(responses=list(responses), prompts=[])
+    return make
+
+
+@pytest.fixture
+def stalled_model():
+    return StalledModel(responses=[])
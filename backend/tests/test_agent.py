@@ -0,0 +1,344 @@
+"""Tests for agent pooling and tools"""
+
+import asyncio
+import json
+
+import pytest
+from langchain.agents import create_agent
+from langchain_core.messages import AIMessage
+from app.agent.agent_pool import AgentPool
+from app.agent.financial_agent import SYSTEM_PROMPT, FinancialAgent
+from app.agent.history_assembler import HistoryAssembler
+from app.agent.intent_router import IntentRouter
+from app.agent.memory_manager import FinancialMemoryManager
+from app.agent.tools import ToolResult, get_financial_tools, llm_view
+from app.calculator.dti_calculator import DTICalculator
+from app.services.calculation_cache import calculation_cache
+from app.services.conversation_store import ConversationStore
+from app.services.metrics import metrics
+from app.services.user_context_repository import user_context_repository
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    return AgentPool()
+
+
+def test_agents_share_pooled_graph_and_client(pool):
+    first = FinancialAgent(user_id="user_001", pool=pool)
+    second = FinancialAgent(user_id="user_002", pool=pool)
+
+    assert first.agent_runnable is second.agent_runnable
+    assert first.llm is second.llm
+    assert first.memory_manager is not second.memory_manager
+    assert first._config == {"configurable": {"user_id": "user_001"}}
+    assert pool.get_llm(temperature=0.7, streaming=False) is not first.llm
+
+
+def test_unbound_tools_read_user_from_config():
+    tools = {t.name: t for t in get_financial_tools()}
+    assert "config" not in tools["calculate_affordability"].args
+
+    hits = metrics.get_counter("calculation_cache.hits")
+    default = json.loads(tools["calculate_dti"].invoke({}))
+    tools["create_action_plan"].invoke({})
+    # create_action_plan reuses the cached DTI instead of recomputing it
+    assert metrics.get_counter("calculation_cache.hits") >= hits + 1
+    other = json.loads(tools["calculate_dti"].invoke({}, config={"configurable": {"user_id": "user_002"}}))
+    assert default["monthly_income"] != other["monthly_income"]
+
+
+def test_spending_analysis_reads_ledger_only_when_computing(monkeypatch):
+    reads = []
+    get_ledger = user_context_repository.get_transaction_ledger
+    monkeypatch.setattr(
+        user_context_repository, "get_transaction_ledger",
+        lambda user_id: reads.append(user_id) or get_ledger(user_id)
+    )
+    calculation_cache.invalidate("user_001")
+    analyze = {t.name: t for t in get_financial_tools()}["analyze_spending"]
+
+    first = analyze.invoke({"months": 2})
+    assert analyze.invoke({"months": 2}) == first
+    # The cached result was served without touching the ledger
+    assert reads == ["user_001"]
+
+
+def test_stream_events_yields_tokens_and_tool_events(pool, scripted_model):
+    model = scripted_model(
+        AIMessage(content="", tool_calls=[{"name": "calculate_dti", "args": {}, "id": "call_1"}]),
+        AIMessage(content="Your DTI looks excellent"),
+    )
+    pool._graph = create_agent(model=model, tools=pool.tools)
+    agent = FinancialAgent(user_id="user_002", pool=pool)
+
+    async def collect():
+        return [event async for event in agent.stream_events("What is my DTI?")]
+
+    events = asyncio.run(collect())
+    types = [event["type"] for event in events]
+    assert types == ["tool_start", "tool_end", "calculation", "text", "text", "text", "text"]
+    assert events[1] == {"type": "tool_end", "tool": "calculate_dti", "tool_call_id": "call_1", "kind": "dti"}
+    assert events[2]["kind"] == "dti" and events[2]["result"]["dti"] > 0
+    assert "".join(e["content"] for e in events if e["type"] == "text") == "Your DTI looks excellent"
+
+    kind, result = agent._last_tool_results[0]
+    assert kind == "dti" and result["monthly_income"] == 10000
+    assert agent.memory_manager.messages[-1]["content"] == "Your DTI looks excellent"
+
+
+def test_calculation_events_stream_once_per_tool_call(pool, scripted_model):
+    model = scripted_model(
+        AIMessage(content="", tool_calls=[
+            {"name": "calculate_dti", "args": {}, "id": "call_1"},
+            {"name": "get_readiness_score", "args": {}, "id": "call_2"},
+        ]),
+        AIMessage(content="Here is where you stand"),
+    )
+    pool._graph = create_agent(model=model, tools=pool.tools)
+    agent = FinancialAgent(user_id="user_001", pool=pool)
+
+    async def collect():
+        return [event async for event in agent.stream_events("How am I doing?")]
+
+    events = asyncio.run(collect())
+    calculations = [e for e in events if e["type"] == "calculation"]
+    assert sorted(e["tool_call_id"] for e in calculations) == ["call_1", "call_2"]
+    # Every card is out before the narration starts
+    first_text = next(i for i, e in enumerate(events) if e["type"] == "text")
+    assert all(events.index(e) < first_text for e in calculations)
+    assert sorted(kind for kind, _ in agent._last_tool_results) == ["dti", "readiness"]
+
+
+def test_cancel_stops_agent_run(pool, stalled_model):
+    pool._graph = create_agent(model=stalled_model, tools=pool.tools)
+    agent = FinancialAgent(user_id="user_002", pool=pool)
+    agent.memory_manager.store = ConversationStore()
+
+    async def collect():
+        events = []
+        async for event in agent.stream_events("What should I do?"):
+            events.append(event)
+            agent.cancel()
+        return events
+
+    cancelled = metrics.get_counter("agent.runs_cancelled")
+    events = asyncio.run(asyncio.wait_for(collect(), timeout=5))
+    assert events == [{"type": "text", "content": "Thinking"}]
+    assert agent._run_task.cancelled()
+    assert agent.memory_manager.messages == []
+    assert metrics.get_counter("agent.runs_cancelled") == cancelled + 1
+
+
+def test_system_prompt_prefix_is_identical_across_users(pool, scripted_model):
+    model = scripted_model(AIMessage(content="Hello"), AIMessage(content="Hi"))
+    pool._graph = create_agent(model=model, tools=pool.tools)
+
+    async def ask(user_id):
+        agent = FinancialAgent(user_id=user_id, pool=pool)
+        agent.memory_manager.store = ConversationStore()
+        return [event async for event in agent.stream_events("Hello")]
+
+    asyncio.run(ask("user_001"))
+    asyncio.run(ask("user_002"))
+    first, second = model.prompts
+    assert first[0].content == second[0].content == SYSTEM_PROMPT
+    assert "$10,000" not in SYSTEM_PROMPT
+    # The per-user snapshot comes after the static prefix, right before the question
+    assert first[-2].content != second[-2].content
+    assert "Monthly Income" in first[-2].content
+
+
+def test_prompt_prefix_metric_tracks_each_users_history(pool, scripted_model):
+    model = scripted_model(*[AIMessage(content=f"Answer {i}") for i in range(3)])
+    pool._graph = create_agent(model=model, tools=pool.tools)
+    store = ConversationStore()
+
+    async def ask(message):
+        agent = FinancialAgent(user_id="user_prefix", pool=pool)
+        agent.memory_manager.store = store
+        return [event async for event in agent.stream_events(message)]
+
+    stable = metrics.get_counter("prompt.prefix_stable")
+    changed = metrics.get_counter("prompt.prefix_changed")
+    asyncio.run(ask("Hello"))
+    # The next turn only appends to the history, so the prefix carries over
+    asyncio.run(ask("And then?"))
+    assert metrics.get_counter("prompt.prefix_stable") == stable + 1
+
+    # Replacing the stored history rewrites the prefix
+    store.clear("user_prefix")
+    store.append("user_prefix", "user", "Something else")
+    asyncio.run(ask("Again"))
+    assert metrics.get_counter("prompt.prefix_changed") == changed + 1
+
+
+@pytest.mark.parametrize("message, intent, args", [
+    ("What is my DTI?", "dti", {}),
+    ("What's my debt-to-income ratio?", "dti", {}),
+    ("What is my readiness score?", "readiness", {}),
+    ("how ready am I to buy a home", "readiness", {}),
+    ("Can I afford a $400k home?", "affordability", {"home_price": 400000}),
+    ("can i afford $1.2m", "affordability", {"home_price": 1200000}),
+    ("Is a 350,000 house affordable?", "affordability", {"home_price": 350000}),
+    ("How can I reduce my DTI?", None, None),
+    ("Can I afford a $400k home if I pay off my car?", None, None),
+    ("Can I afford a $40 home?", None, None),
+])
+def test_intent_router_match(message, intent, args):
+    match = IntentRouter().match(message)
+    if intent is None:
+        assert match is None
+    else:
+        assert match == (intent, args)
+
+
+def test_intent_router_answers_from_calculators():
+    answer = IntentRouter().answer("user_001", "Can I afford a $300k home?")
+    assert answer.kind == "affordability"
+    assert answer.result["home_price"] == 300000
+    assert not answer.result["is_affordable"]
+    assert f"${answer.result['max_affordable_home_price']:,.0f}" in answer.text
+
+
+def test_async_tools_run_concurrently_on_calculation_pool():
+    tools = {t.name: t for t in get_financial_tools()}
+    tasks = metrics.get_counter("calculation_pool.tasks")
+
+    async def run_siblings():
+        return await asyncio.gather(
+            tools["calculate_dti"].ainvoke({}, config={"configurable": {"user_id": "user_002"}}),
+            tools["get_readiness_score"].ainvoke({}),
+            tools["analyze_spending"].ainvoke({"months": 3}),
+        )
+
+    dti, readiness, spending = (json.loads(r) for r in asyncio.run(run_siblings()))
+    assert dti["monthly_income"] == 10000
+    assert "readiness_score" in readiness
+    assert "top_spending_categories" in spending
+    assert metrics.get_counter("calculation_pool.tasks") == tasks + 3
+
+
+@pytest.mark.parametrize("name, args, kind", [
+    ("create_action_plan", {"goal": "homeownership"}, "action_plan"),
+    ("recommend_goal", {"goal_type": "emergency_fund"}, "goal_recommendation"),
+    ("calculate_affordability", {"home_price": 350000}, "affordability"),
+])
+def test_tool_messages_carry_typed_artifact(name, args, kind):
+    tools = {t.name: t for t in get_financial_tools("user_001")}
+    message = tools[name].invoke({"name": name, "args": args, "id": "call_1", "type": "tool_call"})
+
+    assert isinstance(message.artifact, ToolResult)
+    assert message.artifact.kind == kind
+    assert json.loads(message.content) == json.loads(llm_view(kind, message.artifact.data))
+
+
+@pytest.mark.parametrize("name, args, dropped", [
+    ("calculate_dti", {}, "debt_breakdown"),
+    ("explore_readiness", {}, "scores"),
+    ("analyze_spending", {}, "peer_comparisons"),
+    ("plan_scenarios", {"home_prices": [400000]}, "median_path"),
+])
+def test_tool_content_is_compact_and_artifact_is_full(name, args, dropped):
+    tools = {t.name: t for t in get_financial_tools("user_001")}
+    message = tools[name].invoke({"name": name, "args": args, "id": "call_1", "type": "tool_call"})
+
+    assert dropped not in message.content
+    assert dropped in json.dumps(message.artifact.data)
+    assert len(message.content) * 2 < len(json.dumps(message.artifact.data, indent=2))
+
+
+def test_dti_view_keeps_every_debt_of_a_type():
+    context = {
+        "income": {"monthly_gross": 8000},
+        "debts": [
+            {"type": "credit_card", "balance": 5000, "monthly_payment": 300},
+            {"type": "credit_card", "balance": 2000, "monthly_payment": 100},
+            {"type": "auto_loan", "balance": 15000, "monthly_payment": 450},
+        ]
+    }
+    view = json.loads(llm_view("dti", DTICalculator().calculate(context)))
+    assert sorted(d["monthly_payment"] for d in view["debt_payments"]) == [100, 300, 450]
+    assert sum(d["monthly_payment"] for d in view["debt_payments"]) == view["total_monthly_debts"]
+
+
+def test_readiness_view_keeps_current_figures():
+    tools = {t.name: t for t in get_financial_tools("user_001")}
+    message = tools["get_readiness_score"].invoke({"name": "get_readiness_score", "args": {}, "id": "call_1", "type": "tool_call"})
+    breakdown = json.loads(message.content)["breakdown"]
+    full = message.artifact.data["breakdown"]
+
+    assert breakdown["dti_score"]["current_dti"] == full["dti_score"]["current_dti"]
+    assert breakdown["credit_score"]["current_score"] == full["credit_score"]["current_score"]
+    assert breakdown["savings_score"]["target_down_payment"] == full["savings_score"]["target_down_payment"]
+    assert breakdown["employment_score"]["points"] == "10/10"
+    assert "message" not in json.loads(message.content)
+
+
+def test_memory_persists_across_managers():
+    store = ConversationStore()
+    first = FinancialMemoryManager("user_001", window_size=2, store=store)
+    first.add_message("user", "What is my DTI?")
+    first.add_message("assistant", "12.7%")
+    first.store_calculation("dti", {"dti": 12.67})
+
+    second = FinancialMemoryManager("user_001", window_size=2, store=store)
+    assert second.has_history()
+    assert second.get_chat_history()[-1]["content"] == "12.7%"
+    assert second.get_last_dti() == 12.67
+
+
+def test_history_assembler_dedups_incoming_turns():
+    assembler = HistoryAssembler()
+    stored = [{"role": "user", "content": "What is my DTI?"}, {"role": "assistant", "content": "12.7%"}]
+    incoming = stored + [
+        {"role": "user", "content": "what is my  dti?"},
+        {"role": "user", "content": "Can I afford $400k?"},
+    ]
+    # Turns the server holds are skipped; asking the same thing again is a new turn
+    assert assembler.new_turns(stored, incoming) == incoming[2:]
+    assert assembler.new_turns(stored, stored) == []
+    # A client that is behind the server adds nothing
+    ahead = stored + [{"role": "user", "content": "ok"}, {"role": "assistant", "content": "Great"}]
+    assert assembler.new_turns(ahead, stored) == []
+
+
+def test_history_assembler_keeps_repeated_turns_and_order_after_ring_overflow():
+    assembler = HistoryAssembler()
+    conversation = []
+    for i in range(60):
+        conversation += [{"role": "user", "content": "ok"}, {"role": "assistant", "content": f"answer {i}"}]
+    # The ring buffer only kept the newest 100 turns; the client resends everything
+    stored = conversation[-100:]
+    assert assembler.new_turns(stored, conversation) == []
+
+    newer = conversation + [{"role": "user", "content": "ok"}, {"role": "assistant", "content": "answer 60"}]
+    assert assembler.new_turns(stored, newer) == newer[-2:]
+    # Only the new messages: a repeated "ok" is not mistaken for a stored turn
+    assert assembler.new_turns(stored, [{"role": "user", "content": "ok"}]) == [{"role": "user", "content": "ok"}]
+
+
+def test_history_assembler_folds_old_turns_into_cached_summary():
+    # One token per word keeps the budget arithmetic readable
+    assembler = HistoryAssembler(token_budget=24, token_counter=lambda text: len(text.split()))
+    turns = [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"turn {i} " + "word " * 6}
+        for i in range(8)
+    ]
+
+    history = assembler.assemble("user_001", turns)
+    assert [m.content for m in history.messages] == [t["content"] for t in turns[-2:]]
+    assert history.summary.count("\n- ") == 6
+    assert history.tokens <= 24 + assembler.count_tokens(history.summary) + 4
+
+    hits = metrics.get_counter("history.summary_cache_hits")
+    assert assembler.assemble("user_001", turns).summary == history.summary
+    assert metrics.get_counter("history.summary_cache_hits") == hits + 1
+
+    # The window moves forward (and the oldest turn leaves the ring buffer):
+    # the cached summary is extended rather than rebuilt
+    moved = turns[1:] + [{"role": "user", "content": "turn 8 " + "word " * 6}, {"role": "assistant", "content": "ok"}]
+    extended = assembler.assemble("user_001", moved)
+    assert extended.summary.startswith(history.summary)
+    assert "turn 7" in extended.summary
@@ -0,0 +1,139 @@
+"""Tests for the HTTP endpoints"""
+
+import asyncio
+import shutil
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain.agents import create_agent
+from langchain_core.messages import AIMessage
+
+import main
+from main import ChatRequest, app, chat_endpoint
+from app.agent.agent_pool import agent_pool
+from app.services.conversation_store import conversation_store
+from app.services.metrics import metrics
+from app.services.response_cache import response_cache
+from app.services.user_context_repository import DEFAULT_DATA_PATH, JSONContextBackend, UserContextRepository
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def test_empty_history_starts_new_conversation(client):
+    conversation_store.clear("user_003")
+    conversation_store.append("user_003", "user", "Tell me about the previous persona")
+    conversation_store.append("user_003", "assistant", "Old answer")
+
+    # Answered by the intent router, so no model is needed
+    response = client.post("/api/chat", json={
+        "message": "What is my DTI?", "user_id": "user_003", "conversation_history": []
+    })
+    assert response.status_code == 200
+    messages = conversation_store.get_messages("user_003")
+    assert [m["role"] for m in messages] == ["user", "assistant"]
+    assert messages[0]["content"] == "What is my DTI?"
+
+    # Without a history field the server keeps what it has
+    client.post("/api/chat", json={"message": "What is my readiness score?", "user_id": "user_003"})
+    assert len(conversation_store.get_messages("user_003")) == 4
+
+    assert client.delete("/api/chat/history/user_003").json()["success"]
+    assert conversation_store.get_messages("user_003") == []
+
+
+def test_repeated_question_is_replayed_from_cache(client, monkeypatch, scripted_model):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    model = scripted_model(AIMessage(content="Spring usually has the most listings"))
+    monkeypatch.setattr(agent_pool, "_graph", create_agent(model=model, tools=agent_pool.tools))
+    response_cache.invalidate("user_003")
+    hits = metrics.get_counter("response_cache.chat.hits")
+
+    # Each post starts a new conversation, so both are first questions
+    question = {
+        "message": "When is the best season to buy a house?", "user_id": "user_003", "conversation_history": []
+    }
+    first = client.post("/api/chat", json=question)
+    second = client.post("/api/chat", json=question)
+
+    assert len(model.prompts) == 1
+    assert metrics.get_counter("response_cache.chat.hits") == hits + 1
+    assert "listings" in first.text and "listings" in second.text
+
+    # Earlier turns, from the client or held by the server, can change the
+    # meaning of the question: the cache is bypassed and nothing is stored
+    bypassed = metrics.get_counter("response_cache.chat.bypassed")
+    entries = len(response_cache)
+    history = [{"role": "user", "content": "I live in Alaska"}, {"role": "assistant", "content": "Noted"}]
+    model.responses.append(AIMessage(content="In Alaska, late spring"))
+    client.post("/api/chat", json=dict(question, conversation_history=history))
+    assert conversation_store.get_messages("user_003")
+    model.responses.append(AIMessage(content="Up there, late spring"))
+    client.post("/api/chat", json={"message": question["message"], "user_id": "user_003"})
+
+    assert len(model.prompts) == 3
+    assert metrics.get_counter("response_cache.chat.bypassed") == bypassed + 2
+    assert len(response_cache) == entries
+
+
+@pytest.mark.parametrize("params", [
+    {"extra_principal": -100},
+    {"home_price": 0},
+    {"start_month": 0},
+    {"start_month": 12, "end_month": 1},
+])
+def test_amortization_rejects_invalid_parameters(client, params):
+    assert client.get("/api/amortization", params=params).status_code == 400
+
+
+def test_amortization_page(client):
+    page = client.get("/api/amortization", params={"start_month": 300, "end_month": 312}).json()
+    assert [row["month"] for row in page["rows"]] == list(range(300, 313))
+    assert page["summary"]["payoff_month"] == 360
+
+
+def test_client_disconnect_cancels_agent_run(monkeypatch, stalled_model):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(agent_pool, "_graph", create_agent(model=stalled_model, tools=agent_pool.tools))
+    conversation_store.clear("user_004")
+
+    async def scenario():
+        response = await chat_endpoint(ChatRequest(message="What should I do next?", user_id="user_004"))
+        first_frame = asyncio.Event()
+
+        async def send(message):
+            if message.get("body"):
+                first_frame.set()
+
+        async def receive():
+            await first_frame.wait()
+            return {"type": "http.disconnect"}
+
+        # Starlette's own disconnect listener cancels the stream
+        await asyncio.wait_for(response({"type": "http"}, receive, send), timeout=5)
+        await asyncio.sleep(0.05)
+
+    disconnects = metrics.get_counter("chat.client_disconnects")
+    cancelled = metrics.get_counter("agent.runs_cancelled")
+    asyncio.run(scenario())
+    assert metrics.get_counter("chat.client_disconnects") == disconnects + 1
+    assert metrics.get_counter("agent.runs_cancelled") >= cancelled + 1
+    assert conversation_store.get_messages("user_004") == []
+
+
+@pytest.mark.parametrize("amount", ["NaN", "Infinity", "-Infinity"])
+def test_ingest_rejects_non_finite_amounts(client, monkeypatch, tmp_path, amount):
+    path = tmp_path / "users.json"
+    shutil.copy(DEFAULT_DATA_PATH, path)
+    repo = UserContextRepository(JSONContextBackend(path))
+    repo.get_transaction_ledger("user_001")
+    monkeypatch.setattr(main, "user_context_repository", repo)
+    stored = len(repo.get("user_001")["transactions"])
+
+    # Python's JSON parser accepts these literals
+    body = '{"user_id": "user_001", "transactions": [{"date": "2024-01-20", "amount": %s}]}' % amount
+    response = client.post("/api/transactions/ingest", content=body, headers={"Content-Type": "application/json"})
+    assert response.status_code == 400
+    assert len(UserContextRepository(JSONContextBackend(path)).get("user_001")["transactions"]) == stored
@@ -1,9 +1,21 @@
 """Tests for calculator classes"""
 
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pytest
+from app.calculator.batch_scoring import BatchScoringEngine, context_arrays
 from app.calculator.dti_calculator import DTICalculator
-from app.calculator.affordability import AffordabilityCalculator
+from app.calculator.affordability import AffordabilityCalculator, annuity_factor
+from app.calculator.amortization import AmortizationSchedule
 from app.calculator.readiness_score import ReadinessScoreCalculator
+from app.calculator import scenario_engine
+from app.calculator.scenario_engine import ScenarioEngine
+from app.calculator.transaction_analyzer import TransactionAnalyzer
+from app.calculator.transaction_ledger import TransactionLedger
+from app.calculator.transaction_store import TransactionColumns
+from app.services.user_context_repository import DEFAULT_DATA_PATH
 
 
 @pytest.fixture
@@ -65,3 +77,313 @@ def test_readiness_score_calculator(sample_user_context):
     assert "level" in result
     assert "breakdown" in result
 
+
+
+@pytest.fixture
+def sample_transactions():
+    return [
+        {"date": "2024-01-15", "amount": -1200, "category": "rent"},
+        {"date": "2024-01-03", "amount": 7500, "category": "income"},
+        {"date": "2023-12-28", "amount": -200.5, "category": "dining"},
+        {"date": "2023-12-15", "amount": -1200, "category": "rent"},
+        {"date": "2023-12-03", "amount": 7500, "category": "income"},
+        {"date": "2023-11-28", "amount": -180.25, "category": "dining"},
+        {"date": "2023-11-20", "amount": -100},
+        {"date": "2023-10-01", "amount": -999, "category": "shopping"},
+    ]
+
+
+def test_transaction_analyzer(sample_user_context, sample_transactions):
+    context = dict(sample_user_context, transactions=sample_transactions)
+    result = TransactionAnalyzer().analyze(context, months=2)
+
+    # 2023-10-01 falls outside the 60-day window ending 2024-01-15
+    assert result["total_transactions_analyzed"] == 7
+    assert result["average_monthly_income"] == 7500
+    assert result["spending_by_category"] == {"rent": 1200.0, "dining": 190.38, "other": 50.0}
+    assert [c["category"] for c in result["top_spending_categories"]] == ["rent", "dining", "other"]
+    assert result["total_monthly_spending"] == pytest.approx(1440.38, abs=0.01)
+
+
+def test_transaction_columns(sample_user_context, sample_transactions):
+    columns = TransactionColumns.from_records(sample_transactions)
+    assert columns.amounts.tolist()[:3] == [-120000, 750000, -20050]
+    assert columns.categories == ["rent", "income", "dining", "other", "shopping"]
+
+    context = dict(sample_user_context, transactions=sample_transactions)
+    analyzer = TransactionAnalyzer()
+    assert analyzer.analyze(context, columns=columns) == analyzer.analyze(context)
+
+
+def test_transaction_ledger(sample_user_context, sample_transactions):
+    context = dict(sample_user_context, transactions=sample_transactions)
+    analyzer = TransactionAnalyzer()
+
+    ledger = TransactionLedger.from_columns(TransactionColumns.from_records(sample_transactions[:5]))
+    ledger.ingest(sample_transactions[5:])
+    for months in (1, 2, 3, 6):
+        assert analyzer.analyze(context, months=months, ledger=ledger) == analyzer.analyze(context, months=months)
+
+    january = ledger.monthly_aggregates(months=1)[0]
+    assert january["month"] == "2024-01"
+    assert january["income"] == 7500
+    assert january["spending_by_category"] == {"rent": 1200}
+
+
+# Figures the float-accumulating analyzer produced for the mock users (months=3)
+BASELINE_MOCK_USER_ANALYSIS = {
+    "user_001": (7500.0, 2486.67, 5013.33, 66.8, {
+        "rent": 1200.0, "auto_loan": 450.0, "student_loan": 350.0, "credit_card": 150.0,
+        "dining": 126.67, "shopping": 50.0, "utilities": 120.0, "groceries": 40.0
+    }),
+    "user_002": (10000.0, 3283.33, 6716.67, 67.2, {
+        "rent": 1800.0, "student_loan": 250.0, "dining": 510.0, "shopping": 356.67,
+        "entertainment": 100.0, "utilities": 140.0, "groceries": 126.67
+    }),
+    "user_003": (5000.0, 2306.67, 2693.33, 53.9, {
+        "rent": 900.0, "student_loan": 500.0, "credit_card": 300.0, "dining": 236.67,
+        "shopping": 210.0, "entertainment": 26.67, "utilities": 100.0, "groceries": 33.33
+    }),
+}
+
+
+@pytest.mark.parametrize("user_id", sorted(BASELINE_MOCK_USER_ANALYSIS))
+def test_transaction_analyzer_matches_baseline(user_id):
+    with open(DEFAULT_DATA_PATH) as f:
+        context = json.load(f)[user_id]
+    result = TransactionAnalyzer().analyze(context, months=3)
+
+    income, spending, savings, savings_rate, by_category = BASELINE_MOCK_USER_ANALYSIS[user_id]
+    assert result["average_monthly_income"] == income
+    assert result["total_monthly_spending"] == spending
+    assert result["monthly_savings"] == savings
+    assert result["savings_rate_percentage"] == savings_rate
+    assert result["spending_by_category"] == by_category
+    assert list(result["spending_by_category"]) == list(by_category)
+    assert result["overspending_alerts"] == []
+
+
+def test_transaction_analyzer_half_cent_difference_from_baseline():
+    context = {"income": {"monthly_gross": 7500}, "transactions": [
+        {"date": "2024-01-23", "amount": -221.08, "category": "rent"},
+        {"date": "2024-01-01", "amount": 89.38, "category": "dining"},
+        {"date": "2024-01-12", "amount": -248.88, "category": "rent"},
+        {"date": "2024-01-10", "amount": 92.67, "category": "rent"},
+    ]}
+    result = TransactionAnalyzer().analyze(context, months=1)
+
+    # Everything but the half-cent variance matches the float baseline
+    assert result["average_monthly_income"] == 182.05
+    assert result["spending_by_category"] == {"rent": 469.96}
+    comparison = result["peer_comparisons"]["rent"]
+    assert comparison["your_spending"] == 469.96
+    assert comparison["peer_average"] == 54.62
+    assert comparison["variance_percentage"] == 760.5
+    assert result["overspending_alerts"][0]["potential_savings"] == 4984.14
+
+    # 469.96 - 54.615 = 415.345: the baseline rounded it to 415.35
+    assert comparison["variance"] == 415.34
+    assert result["overspending_alerts"][0]["over_by"] == 415.34
+
+
+def test_batch_scoring_matches_scalar_calculators():
+    rng = np.random.default_rng(42)
+    contexts = [
+        {
+            "income": {
+                "monthly_gross": float(rng.choice([0, rng.uniform(2000, 20000)], p=[0.05, 0.95])),
+                "employment_length_months": int(rng.integers(0, 60))
+            },
+            "savings": {"total": float(rng.uniform(0, 150000))},
+            "debts": [{"monthly_payment": float(rng.uniform(0, 2500))} for _ in range(rng.integers(0, 4))],
+            "credit": {"score": int(rng.integers(550, 850))}
+        }
+        for _ in range(500)
+    ]
+    # Exact tier edges
+    contexts.append({"income": {"monthly_gross": 1000, "employment_length_months": 24},
+                     "savings": {"total": 80000}, "debts": [{"monthly_payment": 360}],
+                     "credit": {"score": 760}})
+
+    arrays = context_arrays(contexts)
+    batch = BatchScoringEngine().score(home_price=350000, **arrays)
+    dti_calc, readiness_calc, affordability_calc = (
+        DTICalculator(), ReadinessScoreCalculator(), AffordabilityCalculator()
+    )
+
+    for i, context in enumerate(contexts):
+        dti = dti_calc.calculate(context)
+        if dti["dti"] is None:
+            assert not batch["dti"]["valid"][i]
+        else:
+            assert batch["dti"]["dti"][i] == pytest.approx(dti["dti"])
+            assert batch["dti"]["status"][i] == dti["status"]
+
+        readiness = readiness_calc.calculate(context)
+        assert batch["readiness"]["readiness_score"][i] == readiness["readiness_score"]
+        assert batch["readiness"]["level"][i] == readiness["level"]
+
+        affordability = affordability_calc.check_affordability(350000, context)
+        assert bool(batch["affordability"]["is_affordable"][i]) == affordability["is_affordable"]
+        if "error" not in affordability:
+            assert batch["affordability"]["monthly_payment"][i] == pytest.approx(affordability["monthly_payment"])
+            assert batch["affordability"]["max_affordable_home_price"][i] == pytest.approx(
+                affordability["max_affordable_home_price"]
+            )
+
+
+def test_affordability_sweep(sample_user_context):
+    calc = AffordabilityCalculator()
+    sweep = calc.sweep(sample_user_context, min_price=100000, max_price=500000, step=100000)
+
+    assert sweep["home_prices"].tolist() == [100000, 200000, 300000, 400000, 500000]
+    for i, price in enumerate(sweep["home_prices"]):
+        single = calc.check_affordability(price, sample_user_context)
+        assert sweep["monthly_payment"][i] == pytest.approx(single["monthly_payment"])
+        assert sweep["dti"][i] == pytest.approx(single["dti"])
+        assert sweep["front_end_ratio"][i] == pytest.approx(single["front_end_ratio"])
+        assert bool(sweep["is_affordable"][i]) == single["is_affordable"]
+
+    hits = annuity_factor.cache_info().hits
+    calc.check_affordability(250000, sample_user_context)
+    assert annuity_factor.cache_info().hits > hits
+
+    with pytest.raises(ValueError):
+        calc.sweep(sample_user_context, min_price=1, max_price=10**9, step=1)
+
+
+@pytest.mark.parametrize("extras", [
+    {},
+    {"extra_principal": 500},
+    {"extra_payments": {12: 20000, 100: 5000}},
+])
+def test_amortization_schedule(extras):
+    schedule = AffordabilityCalculator().amortization_schedule(320000, **extras)
+    rows = schedule.page()
+    arrays = schedule.to_arrays()
+
+    assert rows[0]["payment"] == pytest.approx(2022.62, abs=0.01)
+    assert rows[-1]["balance"] == 0
+    assert len(rows) == len(arrays["month"])
+    assert arrays["balance"] == pytest.approx([r["balance"] for r in rows], abs=0.02)
+
+    # Paging jumps straight to the requested months
+    by_month = {r["month"]: r for r in rows}
+    last = rows[-1]["month"]
+    for row in schedule.page(last - 5, last + 5):
+        assert row == pytest.approx(by_month[row["month"]], abs=0.02)
+    assert schedule.page(last + 1, last + 10) == []
+
+
+def test_amortization_extra_principal_shortens_loan():
+    base = AmortizationSchedule(320000).summary()
+    faster = AmortizationSchedule(320000, extra_principal=500).summary()
+    assert base["payoff_month"] == 360
+    assert faster["payoff_month"] < 360
+    assert faster["total_interest"] < base["total_interest"]
+
+
+@pytest.mark.parametrize("kwargs", [
+    {},
+    {"extra_principal": 500},
+    {"interest_rate": 0.0, "extra_principal": 100},
+    {"loan_term_years": 15, "extra_principal": 1},
+])
+def test_amortization_summary_is_closed_form(kwargs, monkeypatch):
+    schedule = AmortizationSchedule(320000, **kwargs)
+    arrays = schedule.to_arrays()
+    monkeypatch.setattr(schedule, "to_arrays", lambda: pytest.fail("summary built the full schedule"))
+
+    summary = schedule.summary()
+    assert summary["payoff_month"] == arrays["month"][-1]
+    assert summary["total_interest"] == pytest.approx(arrays["interest"].sum(), abs=0.5)
+    with pytest.raises(ValueError):
+        AmortizationSchedule(320000, extra_principal=-100)
+
+
+def test_scenario_engine(sample_user_context, monkeypatch):
+    monkeypatch.setenv("SCENARIO_WORKERS", "2")
+    scenarios = [
+        {"name": "current_path"},
+        {"name": "extra_debt_payment", "extra_debt_payment": 500},
+        {"name": "higher_savings", "additional_savings": 500},
+        {"name": "home_300000", "home_price": 300000},
+    ]
+    serial = ScenarioEngine(n_paths=500).run(
+        sample_user_context, scenarios, months=24, seed=7
+    )
+    pooled = ScenarioEngine(n_paths=500, parallel_min_work=0).run(
+        sample_user_context, scenarios, months=24, seed=7
+    )
+    assert serial == pooled
+
+    by_name = {s["name"]: s for s in serial["scenarios"]}
+    base = by_name["current_path"]
+    assert len(base["median_path"]["savings"]) == 24
+    assert by_name["extra_debt_payment"]["final"]["total_debt"] < base["final"]["total_debt"]
+    assert by_name["higher_savings"]["final"]["savings"]["p50"] > base["final"]["savings"]["p50"]
+    assert base["final"]["savings"]["p10"] <= base["final"]["savings"]["p50"]
+    assert 0.0 <= by_name["home_300000"]["probability_affordable"] <= 1.0
+    assert serial["best_scenario"] in by_name
+
+
+def test_scenario_engine_runs_default_plan_in_process(sample_user_context, monkeypatch):
+    monkeypatch.setenv("SCENARIO_WORKERS", "8")
+
+    def no_pool():
+        raise AssertionError("default plan should not use the process pool")
+
+    monkeypatch.setattr(scenario_engine, "_get_process_pool", no_pool)
+    scenarios = [{"name": f"plan_{i}", "additional_savings": 100 * i} for i in range(4)]
+    engine = ScenarioEngine()
+    assert len(engine.run(sample_user_context, scenarios, months=24, seed=0)["scenarios"]) == 4
+
+    # The pool is only worth it for long horizons, many paths or many scenarios
+    assert not engine._use_process_pool(4, 24)
+    assert engine._use_process_pool(4, 120)
+    assert not engine._use_process_pool(1, 120)
+    monkeypatch.setenv("SCENARIO_WORKERS", "1")
+    assert not engine._use_process_pool(4, 120)
+
+
+def test_scenario_process_pool_is_created_once_and_spawns():
+    scenario_engine.shutdown_process_pool()
+    with ThreadPoolExecutor(max_workers=8) as threads:
+        pools = list(threads.map(lambda _: scenario_engine._get_process_pool(), range(8)))
+    assert all(pool is pools[0] for pool in pools)
+    assert pools[0]._mp_context.get_start_method() == "spawn"
+
+    scenario_engine.shutdown_process_pool()
+    assert scenario_engine._process_pool is None
+
+
+def test_readiness_grid_matches_scalar(sample_user_context):
+    calc = ReadinessScoreCalculator()
+    context = dict(sample_user_context, savings={"total": 5000}, credit={"score": 650})
+    grid = calc.calculate_grid(
+        context,
+        debt_reductions=[0, 200, 400, 800],
+        added_savings=[0, 30000, 60000, 75000],
+        credit_scores=[700, 760]
+    )
+    axes = grid["axes"]
+    assert axes["credit_score"] == [650, 700, 760]
+
+    monthly_debts = sum(d["monthly_payment"] for d in context["debts"])
+    for i, reduction in enumerate(axes["debt_reduction"]):
+        for j, extra in enumerate(axes["added_savings"]):
+            for k, score in enumerate(axes["credit_score"]):
+                scaled = dict(
+                    context,
+                    debts=[{"monthly_payment": monthly_debts - reduction}],
+                    savings={"total": 5000 + extra},
+                    credit={"score": score}
+                )
+                assert grid["scores"][i][j][k] == calc.calculate(scaled)["readiness_score"]
+
+    excellent = grid["thresholds"]["excellent"]
+    assert grid["current_score"] == 66
+    assert not excellent["already_met"]
+    assert excellent["added_savings_only"] == 60000
+    assert excellent["credit_score_only"] == 760
+    assert grid["thresholds"]["good"]["already_met"]
@@ -0,0 +1,303 @@
+"""Tests for the shared services"""
+
+import asyncio
+import json
+import threading
+
+import pytest
+from app.services.calculation_pool import CalculationPool
+from app.services.conversation_store import ConversationStore
+from app.services.llm_gateway import PRIORITY_BACKGROUND, GatewayRejected, LLMGateway
+from app.services.metrics import MetricsRegistry, metrics
+from app.services.response_cache import CachedResponse, ResponseCache, normalize_question
+from app.services.single_flight import SingleFlight, request_key
+from app.services.sse import DONE, encode_event, encode_stream
+
+
+def test_metrics_registry():
+    registry = MetricsRegistry(window=10)
+    registry.increment("hits")
+    registry.increment("hits", 2)
+    for value in range(20):
+        registry.observe("latency", value)
+
+    snapshot = registry.snapshot()
+    assert snapshot["counters"]["hits"] == 3
+    assert snapshot["timings"]["latency"]["count"] == 20
+    assert snapshot["timings"]["latency"]["min"] == 0
+    assert snapshot["timings"]["latency"]["p50"] == 15
+
+
+def test_cancelled_calculation_is_dropped_from_queue():
+    pool = CalculationPool(max_workers=1)
+    release = threading.Event()
+    ran = []
+
+    async def scenario():
+        busy = asyncio.ensure_future(pool.run(release.wait))
+        queued = asyncio.ensure_future(pool.run(ran.append, "queued"))
+        await asyncio.sleep(0.05)
+        queued.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        await busy
+
+    cancelled = metrics.get_counter("calculation_pool.cancelled")
+    asyncio.run(scenario())
+    pool.shutdown()
+    assert ran == []
+    assert metrics.get_counter("calculation_pool.cancelled") == cancelled + 1
+
+
+def test_conversation_store_ring_buffer_and_lru(tmp_path):
+    store = ConversationStore(max_messages=3, max_users=2, spill_path=str(tmp_path / "spill.db"))
+    for i in range(5):
+        store.append("user_001", "user", f"message {i}")
+    assert [m["content"] for m in store.get_messages("user_001")] == ["message 2", "message 3", "message 4"]
+    assert store.get_messages("user_001", limit=1) == [{"role": "user", "content": "message 4"}]
+
+    store.store_calculation("user_001", "dti", {"dti": 12.5})
+    store.append("user_002", "user", "hi")
+    store.append("user_003", "user", "hello")
+    # user_001 was least recently used and got spilled, then rehydrates
+    assert store.stats()["users"] == 2
+    assert store.get_messages("user_001")[-1]["content"] == "message 4"
+    assert store.get_calculations("user_001")["dti"] == {"dti": 12.5}
+
+
+def test_conversation_store_byte_budget():
+    store = ConversationStore(max_bytes=100)
+    store.append("user_001", "user", "x" * 80)
+    store.append("user_002", "user", "y" * 80)
+    assert store.get_messages("user_001") == []
+    assert store.stats() == {"users": 1, "bytes": 80}
+
+
+@pytest.mark.parametrize("first, second", [
+    ("Can I afford a $400k home?", "can i afford a 400,000 home"),
+    ("What is my DTI?!", "  what is my dti "),
+    ("Could I buy a $1.5 million house.", "could i buy a 1500000 house"),
+])
+def test_normalize_question(first, second):
+    assert normalize_question(first) == normalize_question(second)
+
+
+def test_response_cache_ttl_lru_and_bypass():
+    now = [0.0]
+    cache = ResponseCache(max_entries=2, ttl_seconds=60, clock=lambda: now[0])
+    answer = CachedResponse("Your DTI is 12.7%", [("dti", {"dti": 12.67})])
+
+    key, cached = cache.lookup("chat", "user_001", "What is my DTI?", "v1", has_history=False)
+    assert cached is None
+    cache.put(key, answer)
+    assert cache.lookup("chat", "user_001", "what is my dti", "v1", has_history=False)[1] == answer
+    # A new prompt version, or any history, never sees the stored answer
+    assert cache.lookup("chat", "user_001", "What is my DTI?", "v2", has_history=False)[1] is None
+    assert cache.lookup("chat", "user_001", "What is my DTI?", "v1", has_history=True) == (None, None)
+
+    cache.put(cache.lookup("chat", "user_002", "hi", "v1", False)[0], answer)
+    cache.put(cache.lookup("chat", "user_003", "hi", "v1", False)[0], answer)
+    assert len(cache) == 2
+    assert cache.lookup("chat", "user_001", "What is my DTI?", "v1", False)[1] is None
+
+    now[0] = 61
+    assert cache.lookup("chat", "user_003", "hi", "v1", False)[1] is None
+    assert metrics.snapshot()["gauges"]["response_cache.chat.hit_rate"] < 1
+
+
+def _parse_frames(frames):
+    payloads = b"".join(frames).decode().split("\n\n")[:-1]
+    return [p[len("data: "):] if p.endswith("]") else json.loads(p[len("data: "):]) for p in payloads]
+
+
+def test_sse_encoder_coalesces_text_and_keeps_order():
+    async def events():
+        for i in range(100):
+            yield {"type": "text", "content": f"w{i:02d} "}
+        yield {"type": "calculation", "kind": "dti", "result": {"dti": 12.5}}
+        yield {"type": "text", "content": "done"}
+        yield DONE
+
+    async def collect():
+        return [frame async for frame in encode_stream(events(), max_delay=10, max_bytes=50)]
+
+    frames = asyncio.run(collect())
+    parsed = _parse_frames(frames)
+    assert len(frames) < 20
+    texts = [e["content"] for e in parsed[:-3]]
+    assert "".join(texts) == "".join(f"w{i:02d} " for i in range(100))
+    assert parsed[-3:] == [{"type": "calculation", "kind": "dti", "result": {"dti": 12.5}}, {"type": "text", "content": "done"}, "[DONE]"]
+    assert json.loads(encode_event({"type": "text", "content": 'say "hi"'})[6:]) == {"type": "text", "content": 'say "hi"'}
+
+
+def test_sse_encoder_flushes_held_text_after_delay():
+    async def events():
+        yield {"type": "text", "content": "first"}
+        await asyncio.sleep(0.05)
+        yield {"type": "text", "content": "second"}
+
+    async def collect():
+        return [frame async for frame in encode_stream(events(), max_delay=0.01, max_bytes=512)]
+
+    assert [e["content"] for e in _parse_frames(asyncio.run(collect()))] == ["first", "second"]
+
+
+def test_sse_encoder_counts_bytes_and_applies_backpressure():
+    produced = []
+
+    async def events():
+        for i in range(100):
+            produced.append(i)
+            yield {"type": "text", "content": "éé"}
+
+    async def collect():
+        frames = []
+        stream = encode_stream(events(), max_delay=10, max_bytes=8, max_pending=4)
+        async for frame in stream:
+            frames.append(frame)
+            if len(frames) == 1:
+                await asyncio.sleep(0.01)
+                # The reader is slow: the source waits instead of running ahead
+                assert len(produced) <= 2 + 4 + 1
+        return frames
+
+    frames = asyncio.run(collect())
+    # Two 4-byte chunks fill an 8-byte frame (4 characters would not)
+    assert [e["content"] for e in _parse_frames(frames)] == ["éééé"] * 50
+
+
+def test_sse_encoder_ends_when_source_is_cancelled():
+    async def events():
+        yield {"type": "text", "content": "partial"}
+        raise asyncio.CancelledError()
+
+    async def collect():
+        frames = []
+        try:
+            async for frame in encode_stream(events(), max_delay=10, max_bytes=512):
+                frames.append(frame)
+        except asyncio.CancelledError:
+            return frames, True
+        return frames, False
+
+    # The consumer is woken instead of waiting on the queue forever
+    frames, cancelled = asyncio.run(asyncio.wait_for(collect(), timeout=5))
+    assert cancelled
+    assert [e["content"] for e in _parse_frames(frames)] == ["partial"]
+
+
+def test_llm_gateway_prioritizes_interactive_calls():
+    gateway = LLMGateway(max_concurrent=1, endpoint_limits={}, max_queue=10, max_wait_seconds=5)
+    order = []
+
+    async def call(endpoint, priority=0):
+        async with gateway.slot(endpoint, priority):
+            order.append(endpoint)
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        first = await gateway.acquire("chat")
+        waiting = [
+            asyncio.ensure_future(call("personalized_questions", PRIORITY_BACKGROUND)),
+            asyncio.ensure_future(call("chat")),
+        ]
+        await asyncio.sleep(0.01)
+        assert gateway.queue_depth == 2
+        gateway.release(first)
+        await asyncio.gather(*waiting)
+
+    asyncio.run(scenario())
+    assert order == ["chat", "personalized_questions"]
+    assert gateway.in_flight == 0
+
+
+def test_llm_gateway_endpoint_limit_and_shedding():
+    gateway = LLMGateway(
+        max_concurrent=40, endpoint_limits={"personalized_questions": 1, "coach_chat": 1},
+        max_queue=1, max_wait_seconds=1
+    )
+
+    async def scenario():
+        held = await gateway.acquire("personalized_questions", PRIORITY_BACKGROUND)
+        coach = await gateway.acquire("coach_chat")
+        # Other endpoints still get the free global slots
+        gateway.release(await gateway.acquire("chat"))
+
+        background = asyncio.ensure_future(gateway.acquire("personalized_questions", PRIORITY_BACKGROUND))
+        await asyncio.sleep(0)
+        # Full queue: another background call is shed, an interactive one displaces it
+        with pytest.raises(GatewayRejected) as shed:
+            await gateway.acquire("personalized_questions", PRIORITY_BACKGROUND)
+        assert shed.value.reason == "queue_full"
+        next_coach = asyncio.ensure_future(gateway.acquire("coach_chat"))
+        await asyncio.sleep(0)
+        with pytest.raises(GatewayRejected) as displaced:
+            await background
+        assert displaced.value.reason == "displaced"
+        gateway.release(coach)
+        gateway.release(await next_coach)
+
+        # An expected wait beyond the caller's deadline is shed without queueing
+        with pytest.raises(GatewayRejected) as hopeless:
+            await gateway.acquire("personalized_questions", PRIORITY_BACKGROUND, max_wait=0.001)
+        assert hopeless.value.reason == "deadline"
+        with pytest.raises(GatewayRejected) as late:
+            await gateway.acquire("personalized_questions", PRIORITY_BACKGROUND, max_wait=0.1)
+        assert late.value.reason == "timeout" and late.value.retry_after >= 1
+        gateway.release(held)
+
+    asyncio.run(scenario())
+    assert gateway.queue_depth == 0 and gateway.in_flight == 0
+
+
+def test_single_flight_shares_concurrent_identical_calls():
+    flights = SingleFlight("test")
+    calls = []
+
+    async def work(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    async def scenario():
+        key = request_key("sweep", {"b": 2, "a": 1})
+        assert key == request_key("sweep", {"a": 1, "b": 2})
+        results = await asyncio.gather(
+            flights.do(key, lambda: work(1)),
+            flights.do(key, lambda: work(1)),
+            flights.do(request_key("sweep", 3), lambda: work(3)),
+        )
+        assert len(flights) == 0
+        # Not a cache: the next call after completion runs again
+        await flights.do(key, lambda: work(1))
+        return results
+
+    assert asyncio.run(scenario()) == [2, 2, 6]
+    assert calls == [1, 3, 1]
+
+
+def test_single_flight_survives_one_caller_cancelling():
+    flights = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def scenario():
+        first = asyncio.ensure_future(flights.do("k", work))
+        second = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == "done"
+
+        # The shared call is cancelled once every caller has gone
+        only = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0)
+        task = flights._flights["k"].task
+        only.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await only
+        await asyncio.sleep(0)
+        assert task.cancelled() and len(flights) == 0
+
+    asyncio.run(scenario())
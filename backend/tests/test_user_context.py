@@ -0,0 +1,158 @@
+"""Tests for user context storage"""
+
+import json
+import os
+import shutil
+
+import pytest
+from app.services import calculation_cache as calculation_cache_module
+from app.services.calculation_cache import CalculationCache
+from app.services.sqlite_context_store import SQLiteContextStore
+from app.services.user_context_repository import (
+    DEFAULT_DATA_PATH,
+    JSONContextBackend,
+    UserContextRepository,
+)
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = tmp_path / "users.json"
+    path.write_text(json.dumps({
+        "user_001": {"income": {"monthly_gross": 7500}, "debts": []},
+        "user_002": {"income": {"monthly_gross": 10000}, "debts": []}
+    }))
+    return path
+
+
+def test_repository_caches_snapshots(data_file):
+    repo = UserContextRepository(JSONContextBackend(data_file))
+
+    first = repo.get("user_002")
+    assert first["income"]["monthly_gross"] == 10000
+    # Same object handed out again - no re-parse, no copy
+    assert repo.get("user_002") is first
+    # Unknown users fall back to the default user
+    assert repo.get("unknown")["income"]["monthly_gross"] == 7500
+
+
+def test_repository_reloads_on_change(data_file):
+    repo = UserContextRepository(JSONContextBackend(data_file))
+    version = repo.get_version("user_001")
+
+    data_file.write_text(json.dumps({"user_001": {"income": {"monthly_gross": 8000}}}))
+    stat = os.stat(data_file)
+    os.utime(data_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert repo.get("user_001")["income"]["monthly_gross"] == 8000
+    assert repo.get_version("user_001") != version
+
+
+def test_repository_missing_file(tmp_path):
+    repo = UserContextRepository(JSONContextBackend(tmp_path / "missing.json"))
+    assert repo.get("user_001")["income"]["monthly_gross"] == 0
+
+
+def test_sqlite_store_round_trips_json(tmp_path):
+    store = SQLiteContextStore(tmp_path / "contexts.db")
+    assert store.import_json(DEFAULT_DATA_PATH) == 3
+
+    with open(DEFAULT_DATA_PATH) as f:
+        expected = json.load(f)
+    for user_id, context in expected.items():
+        assert store.load(user_id) == context
+
+    january = store.get_transactions("user_001", start_date="2024-01-01", end_date="2024-01-31")
+    assert len(january) == 5
+    assert [t["date"] for t in january] == sorted(t["date"] for t in january)
+
+
+def test_repository_on_sqlite_backend(tmp_path):
+    store = SQLiteContextStore(tmp_path / "contexts.db")
+    store.import_json(DEFAULT_DATA_PATH)
+    repo = UserContextRepository(store)
+
+    context, version = repo.get_with_version("user_002")
+    assert repo.get("user_002") is context
+
+    store.append_transactions("user_002", [
+        {"date": "2024-02-01", "amount": -50, "category": "dining", "description": "Cafe"}
+    ])
+    updated, new_version = repo.get_with_version("user_002")
+    assert new_version != version
+    assert len(updated["transactions"]) == len(context["transactions"]) + 1
+
+
+def test_ingest_updates_ledger_incrementally(tmp_path):
+    path = tmp_path / "users.json"
+    shutil.copy(DEFAULT_DATA_PATH, path)
+    repo = UserContextRepository(JSONContextBackend(path))
+    ledger = repo.get_transaction_ledger("user_001")
+    version = repo.get_version("user_001")
+
+    new_version = repo.ingest_transactions("user_001", [
+        {"date": "2024-01-20", "amount": -300, "category": "dining"}
+    ])
+
+    assert new_version != version
+    assert repo.get_transaction_ledger("user_001") is ledger
+    assert ledger.monthly_aggregates(months=1)[0]["spending_by_category"]["dining"] == 300
+    with pytest.raises(ValueError):
+        repo.ingest_transactions("user_001", [{"date": "not-a-date", "amount": 1}])
+
+
+@pytest.mark.parametrize("transaction", [
+    {"date": "20240120", "amount": -10},
+    {"date": "2024-W03-1", "amount": -10},
+    {"date": "2024-01-20T10:00", "amount": -10},
+    {"date": "2024-01-20", "amount": True},
+    {"date": "2024-01-20", "amount": "10"},
+    {"date": "2024-01-20", "amount": float("nan")},
+    {"date": "2024-01-20", "amount": float("inf")},
+    {"date": "2024-01-20", "amount": -float("inf")},
+    {"date": "2024-01-20", "amount": 1e307},
+    {"date": "2024-01-20", "amount": -10, "category": ["dining"]},
+])
+def test_ingest_rejects_non_canonical_transactions(tmp_path, transaction):
+    path = tmp_path / "users.json"
+    shutil.copy(DEFAULT_DATA_PATH, path)
+    repo = UserContextRepository(JSONContextBackend(path))
+    # A warm ledger would be updated incrementally after the write
+    repo.get_transaction_ledger("user_001")
+    stored = len(repo.get("user_001")["transactions"])
+    with pytest.raises(ValueError):
+        repo.ingest_transactions("user_001", [{"date": "2024-01-21", "amount": -5}, transaction])
+
+    # Nothing was stored, so a fresh repository still builds the ledger
+    reopened = UserContextRepository(JSONContextBackend(path))
+    assert len(reopened.get("user_001")["transactions"]) == stored
+    assert reopened.get_transaction_ledger("user_001").monthly_aggregates(months=1)
+
+
+def test_calculation_cache_keys_on_version_and_args(data_file, monkeypatch):
+    repo = UserContextRepository(JSONContextBackend(data_file))
+    monkeypatch.setattr(calculation_cache_module, "user_context_repository", repo)
+    cache = CalculationCache(max_entries=2)
+    calls = []
+
+    def income(context, scale=1):
+        calls.append(scale)
+        return context["income"]["monthly_gross"] * scale
+
+    assert cache.get_or_compute("user_001", "income", income) == 7500
+    assert cache.get_or_compute("user_001", "income", income) == 7500
+    assert cache.get_or_compute("user_001", "income", lambda c: income(c, 2), scale=2) == 15000
+    assert calls == [1, 2]
+
+    # A new context version drops the user's old entries
+    data_file.write_text(json.dumps({"user_001": {"income": {"monthly_gross": 8000}}}))
+    stat = os.stat(data_file)
+    os.utime(data_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert cache.get_or_compute("user_001", "income", income) == 8000
+    assert len(cache) == 1
+
+    # LRU eviction
+    cache.get_or_compute("user_002", "income", income)
+    cache.get_or_compute("user_002", "income", lambda c: income(c, 3), scale=3)
+    assert len(cache) == 2
+    assert calls == [1, 2, 1, 1, 3]